@@ -1,22 +1,48 @@
 import os
 import json
+import re
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 GITHUB_BASE = "https://raw.githubusercontent.com/kachun0918/ymd-ryo/main/assets/dllm/"
+# Optional sidecar: {"06.gif": {"tags": ["cat", "happy"], "aliases": ["開心貓"]}, ...}
+# (a plain list is taken as tags: {"06.gif": ["cat", "happy"]})
+TAGS_FILE = os.path.join(script_dir, "tags.json")
 files = []
 
 print(f"📂 Scanning directory: {script_dir}")
 
+sidecar = {}
+if os.path.exists(TAGS_FILE):
+    with open(TAGS_FILE, "r", encoding="utf-8") as f:
+        sidecar = json.load(f)
+    print(f"🏷️ Loaded tags for {len(sidecar)} files from tags.json")
 
-for filename in os.listdir(script_dir):
+
+def filename_tags(filename):
+    # "happy-cat_02.gif" -> ["happy", "cat"]; bare numbers carry no meaning
+    stem = os.path.splitext(filename)[0].lower()
+    return [word for word in re.split(r"[\W_]+", stem) if word and not word.isdigit()]
+
+
+for filename in sorted(os.listdir(script_dir)):
     if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
         full_url = f"{GITHUB_BASE}{filename}"
-        files.append(full_url)
+        extra = sidecar.get(filename, {})
+        if isinstance(extra, list):
+            extra = {"tags": extra}
+        tags = filename_tags(filename) + [t for t in extra.get("tags", []) if t]
+        files.append(
+            {
+                "url": full_url,
+                "tags": list(dict.fromkeys(tags)),
+                "aliases": extra.get("aliases", []),
+            }
+        )
 
 output_path = os.path.join(script_dir, "dllm_links.json")
 
-with open(output_path, "w") as f:
-    json.dump(files, f, indent=4)
+with open(output_path, "w", encoding="utf-8") as f:
+    json.dump(files, f, indent=4, ensure_ascii=False)
 
 print(f"✅ Generated dllm_links.json at: {output_path}")
-print(f"🎉 Found {len(files)} links!")
\ No newline at end of file
+print(f"🎉 Found {len(files)} links!")
@@ -0,0 +1,8 @@
+import os
+
+
+def use_dummy_settings():
+    """core.config requires credentials at import time; benchmarks never log in."""
+    os.environ.setdefault("BOT_TOKEN", "benchmark")
+    os.environ.setdefault("OWNER_ID", "1")
+    os.environ.setdefault("ADMIN_ROLE_NAME", "Admin")
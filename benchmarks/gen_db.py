@@ -0,0 +1,145 @@
+"""
+Synthetic quotes database generator, from a few thousand rows to tens of millions.
+
+    python -m benchmarks.gen_db --rows 1000000 -o db/bench/quotes-1000000.db
+
+The data is shaped like production: guild sizes and authors follow Zipf
+distributions (a few very active servers and people), content mixes English,
+Cantonese/CJK and emoji, and a share of rows look like legacy data from before
+the link filter and the newer columns existed (links in content, NULL adder,
+added_timestamp and uses).
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import time
+
+from benchmarks import use_dummy_settings
+
+CHUNK = 50_000
+# Zipf exponents; ~1.1 gives a heavy head like real activity
+GUILD_SKEW = 1.1
+AUTHOR_SKEW = 1.1
+LEGACY_SHARE = 0.05
+LINK_SHARE = 0.02
+FIRST_GUILD_ID = 100_000
+
+WORDS_EN = ["lol", "cake", "arcade", "tomorrow", "why", "ok", "the", "is", "a", "lie", "bro"]
+WORDS_CJK = ["早晨", "食咗飯未", "好攰", "唔該", "係咪", "今日", "聽日", "打機", "真係", "冇嘢"]
+EMOJI = ["😂", "🔥", "🤡", "💀", "👍", "🥲", "🎹", "🐸"]
+
+
+def author_id(guild_id: int, rank: int) -> int:
+    """Author ids are per guild, so ranks don't collide across servers."""
+    return guild_id * 1000 + rank
+
+
+def zipf_cum_weights(n: int, skew: float) -> list:
+    return list(itertools.accumulate(1 / (rank**skew) for rank in range(1, n + 1)))
+
+
+def _content(rng: random.Random, i: int) -> str:
+    kind = rng.random()
+    if kind < 0.5:
+        words = rng.choices(WORDS_EN, k=rng.randint(2, 14))
+    elif kind < 0.85:
+        words = rng.choices(WORDS_CJK, k=rng.randint(1, 8))
+    else:
+        words = rng.choices(WORDS_EN + WORDS_CJK, k=rng.randint(2, 10))
+    if rng.random() < 0.3:
+        words.append("".join(rng.choices(EMOJI, k=rng.randint(1, 3))))
+    # The id suffix keeps rows distinct, as the save path's duplicate check expects
+    return f"{' '.join(words)} {i}"
+
+
+def iter_rows(rows: int, guild_ids: list, authors: int, seed: int = 0):
+    """Yields quote tuples (guild_id, user_id, content, timestamp, channel_id,
+    adder_user_id, added_timestamp, uses)."""
+    rng = random.Random(seed)
+    guild_weights = zipf_cum_weights(len(guild_ids), GUILD_SKEW)
+    author_weights = zipf_cum_weights(authors, AUTHOR_SKEW)
+    now = int(time.time())
+
+    for start in range(0, rows, CHUNK):
+        size = min(CHUNK, rows - start)
+        guilds = rng.choices(guild_ids, cum_weights=guild_weights, k=size)
+        ranks = rng.choices(range(authors), cum_weights=author_weights, k=size)
+        adders = rng.choices(range(authors), cum_weights=author_weights, k=size)
+        for offset in range(size):
+            i = start + offset
+            gid = guilds[offset]
+            user_id = author_id(gid, ranks[offset])
+            content = _content(rng, i)
+            written = now - rng.randint(0, 5 * 365 * 86400)
+            if rng.random() < LINK_SHARE:
+                content += f" https://example.com/{i}"
+            if rng.random() < LEGACY_SHARE:
+                yield (gid, user_id, content, str(written), gid + 1, None, None, None)
+                continue
+            yield (
+                gid,
+                user_id,
+                content,
+                str(written),
+                gid + 1 + rng.randrange(20),
+                author_id(gid, adders[offset]),
+                written + rng.randint(0, 30 * 86400),
+                int(rng.paretovariate(1.5)) - 1,
+            )
+
+
+def generate(path: str, rows: int, guilds: int = 100, authors: int = 500, seed: int = 0) -> str:
+    """Writes a fresh database at `path` and returns it."""
+    use_dummy_settings()
+    from core.db import SCHEMA
+
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    # Bulk-load settings; the file is throwaway until it is complete
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    # Table first, indexes/triggers/rollups afterwards: building them once over the
+    # loaded rows is far faster than maintaining them row by row.
+    conn.execute(SCHEMA[0])
+    guild_ids = [FIRST_GUILD_ID + g for g in range(guilds)]
+    started = time.perf_counter()
+    with conn:
+        conn.executemany(
+            "INSERT INTO quotes (guild_id, user_id, content, timestamp, channel_id, "
+            "adder_user_id, added_timestamp, uses) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            iter_rows(rows, guild_ids, authors, seed),
+        )
+    for statement in SCHEMA[1:]:
+        conn.execute(statement)
+    conn.commit()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    print(f"Generated {rows:,} rows in {time.perf_counter() - started:.1f}s -> {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic quotes database.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--authors", type=int, default=500, help="distinct authors per guild")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="default: db/bench/quotes-<rows>.db")
+    args = parser.parse_args()
+    generate(
+        args.output or f"db/bench/quotes-{args.rows}.db",
+        args.rows,
+        args.guilds,
+        args.authors,
+        args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Replays a synthetic command mix against the real cogs (Recorder, dllm, CCTV,
+Management) wired to the fakes in tests/fakes.py, and reports throughput and
+latency percentiles per command.
+
+    python -m benchmarks.loadgen --quotes 100000 --rate 200 --duration 20
+    python -m benchmarks.loadgen --mix "9up=70,save=10,dllm=20" --latency 0.08
+    python -m benchmarks.loadgen --json after.json --compare before.json
+
+Requests are scheduled open-loop at --rate, and latency is measured from each
+request's scheduled start, so a slow command shows up as queueing delay instead of
+silently lowering the offered load. --latency adds a simulated Discord round trip
+to every fake REST call. By default the REST scheduler keeps its real budget
+(40 req/s global, per-route buckets); --no-rest-budget lifts it to measure the
+code paths alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import gen_db  # noqa: E402
+from tests import fakes, shims  # noqa: E402
+
+DEFAULT_MIX = "9up=45,9up_user=10,9uptop=8,9uplist=5,9upstats=5,save=7,dllm=15,cctv=2,list=3"
+PERCENTILES = (50, 90, 99)
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LoadGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.saved = 0
+
+    async def setup(self):
+        from cogs.features.cctv import CCTV
+        from cogs.features.dllm import dllm
+        from cogs.features.quote_stats import QuoteStats
+        from cogs.features.quotes_record import Recorder
+        from cogs.util.management import Management
+        from core import rest as rest_module
+        from core.asset_index import AssetIndex
+        from core.db import quote_db
+        from core.rate_limit import rate_limits
+
+        # Synthetic traffic would mostly measure rejections; --rate-limits keeps them
+        if not self.args.rate_limits:
+            rate_limits.defaults = {}
+
+        if self.args.no_rest_budget:
+            rest_module.ROUTE_RATE = rest_module.ROUTE_BURST = 1e9
+            rest_module.rest.global_bucket = rest_module._TokenBucket(1e9, 1e9)
+
+        self.bot = fakes.FakeBot()
+        self.members = {}
+        self.channels = {}
+        # Same ids as benchmarks.gen_db, so generated authors are members of the fakes
+        for g in range(self.args.guilds):
+            guild = self.bot.add_guild(f"Guild {g}", guild_id=gen_db.FIRST_GUILD_ID + g)
+            self.members[guild.id] = [
+                guild.add_member(f"m{i}", user_id=gen_db.author_id(guild.id, i))
+                for i in range(self.args.members)
+            ]
+            self.channels[guild.id] = [
+                guild.add_channel(f"c{i}") for i in range(self.args.channels)
+            ]
+        self.owner = fakes.FakeMember(name="owner", user_id=fakes.OWNER_ID)
+
+        if quote_db.layout != "single":
+            raise SystemExit("loadgen generates a single-file database; unset DB_LAYOUT")
+        gen_db.generate(
+            quote_db.path_for(self.bot.guilds[0].id),
+            self.args.quotes,
+            self.args.guilds,
+            self.args.members,
+            self.args.seed,
+        )
+
+        self.recorder = Recorder(self.bot)
+        self.dllm = dllm(self.bot)
+        self.dllm.index = AssetIndex([f"https://cdn.example/{i}.gif" for i in range(100)])
+        self.cctv = CCTV(self.bot)
+        self.management = Management(self.bot)
+        self.stats = QuoteStats(self.bot)
+        for cog in (self.recorder, self.dllm, self.cctv, self.management, self.stats):
+            await self.bot.add_cog(cog)
+
+    def _context(self, author=None, content="", reference=None):
+        guild = self.rng.choice(self.bot.guilds)
+        channel = self.rng.choice(self.channels[guild.id])
+        author = author or self.rng.choice(self.members[guild.id])
+        return fakes.FakeContext(self.bot, guild, channel, author, content, reference)
+
+    async def run_command(self, name: str):
+        ctx = self._context()
+        members = self.members[ctx.guild.id]
+        if name == "9up":
+            await fakes.invoke(ctx, self.recorder, "9up", None)
+        elif name == "9up_user":
+            await fakes.invoke(ctx, self.recorder, "9up", self.rng.choice(members[:10]))
+        elif name == "9uptop":
+            await fakes.invoke(ctx, self.recorder, "9uptop", None)
+        elif name == "9uplist":
+            await fakes.invoke(ctx, self.recorder, "9uplist", self.rng.choice(members[:10]))
+        elif name == "9upstats":
+            await fakes.invoke(ctx, self.stats, "9upstats", None)
+        elif name == "save":
+            self.saved += 1
+            words = " ".join(self.rng.choice("abcdefghij") * 3 for _ in range(8))
+            original = ctx.channel.post(self.rng.choice(members), f"{words} {self.saved}")
+            ctx = fakes.FakeContext(
+                self.bot, ctx.guild, ctx.channel, ctx.author, "!save", original.reply_to()
+            )
+            await fakes.invoke(ctx, self.recorder, "save")
+        elif name == "dllm":
+            await fakes.invoke(ctx, self.dllm, "dllm")
+        elif name == "cctv":
+            await fakes.invoke(ctx, self.cctv, "cctv", "sdvx", self.rng.choice("LR"))
+        elif name == "list":
+            ctx.author = self.owner
+            await fakes.invoke(ctx, self.management, "list")
+        else:
+            raise ValueError(f"Unknown command in mix: {name}")
+
+    async def _timed(self, name: str, scheduled: float):
+        try:
+            await self.run_command(name)
+        except Exception as e:
+            self.errors[name] += 1
+            if self.errors[name] == 1:
+                print(f"⚠️ {name} failed: {type(e).__name__}: {e}")
+        self.latencies[name].append(time.perf_counter() - scheduled)
+
+    async def run(self):
+        mix = parse_mix(self.args.mix)
+        names, weights = list(mix), list(mix.values())
+        total = int(self.args.rate * self.args.duration)
+        fakes.Network.latency = self.args.latency
+
+        # Warm-up: first-use costs (webhook creation, index builds) are not steady state
+        for name in names:
+            await self._timed(name, time.perf_counter())
+        self.latencies.clear()
+        self.errors.clear()
+
+        tasks = []
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / self.args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = self.rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(self._timed(name, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        results = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            results[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput": len(values) / elapsed,
+                **{f"p{p}_ms": percentile(values, p) * 1000 for p in PERCENTILES},
+                "max_ms": values[-1] * 1000,
+            }
+        done = sum(r["count"] for r in results.values())
+        results["_total"] = {
+            "count": done,
+            "errors": sum(self.errors.values()),
+            "throughput": done / elapsed,
+            "elapsed_s": elapsed,
+            "offered_rate": self.args.rate,
+        }
+        return results
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'command':<10} {'count':>6} {'err':>4} {'req/s':>8}"
+    header += "".join(f" {'p' + str(p):>8}" for p in PERCENTILES) + f" {'max':>8}"
+    print(header + ("   Δp99 vs baseline" if baseline else ""))
+    for name, r in results.items():
+        if name.startswith("_"):
+            continue
+        line = f"{name:<10} {r['count']:>6} {r['errors']:>4} {r['throughput']:>8.1f}"
+        line += "".join(f" {r[f'p{p}_ms']:>7.1f}ms" for p in PERCENTILES)
+        line += f" {r['max_ms']:>7.1f}ms"
+        if baseline and name in baseline:
+            before = baseline[name]["p99_ms"]
+            change = (r["p99_ms"] - before) / before * 100 if before else 0.0
+            line += f"   {change:+.0f}%"
+        print(line)
+    total = results["_total"]
+    print(
+        f"\nTotal: {total['count']} commands in {total['elapsed_s']:.1f}s "
+        f"= {total['throughput']:.1f} req/s (offered {total['offered_rate']}), "
+        f"{total['errors']} errors"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic load benchmark for the bot's cogs.")
+    parser.add_argument("--quotes", type=int, default=10_000, help="rows in the generated DB")
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--members", type=int, default=200, help="members per guild")
+    parser.add_argument("--channels", type=int, default=20, help="channels per guild")
+    parser.add_argument("--rate", type=float, default=100, help="commands per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="command=weight,...")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated REST RTT (s)")
+    parser.add_argument("--no-rest-budget", action="store_true")
+    parser.add_argument("--rate-limits", action="store_true", help="keep command rate limits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="scratch directory (default: a new temp dir)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file from an earlier run")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    out_path = os.path.abspath(args.json) if args.json else None
+
+    workdir = fakes.prepare_environment(args.workdir)
+    shims.install()
+    print(f"Working in {workdir}")
+
+    async def session():
+        from core.db import quote_db
+
+        generator = LoadGenerator(args)
+        await generator.setup()
+        try:
+            return await generator.run()
+        finally:
+            await generator.bot.remove_cogs()
+            await quote_db.close_all()
+
+    results = asyncio.run(session())
+    print_report(results, baseline)
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Times the quote commands' SQL against synthetic databases of growing size and prints
+each statement's EXPLAIN QUERY PLAN, flagging full table scans.
+
+    python -m benchmarks.queries --sizes 1000,100000,1000000
+    python -m benchmarks.queries --sizes 10000000 --reps 5 --json q.json
+
+Databases are generated with benchmarks.gen_db into db/bench/ and reused by later
+runs (--regenerate to rebuild). Each query runs against the busiest guild and a
+median-sized one, since Zipf-shaped data makes the two behave very differently.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import time
+
+from benchmarks import gen_db
+
+# The statements the cogs run, with named parameters (kept in step with the code)
+QUERIES = {
+    "9up random": """
+        SELECT id, content, timestamp, channel_id, user_id, adder_user_id, added_timestamp, uses
+        FROM quotes WHERE guild_id = :guild_id AND content NOT LIKE '%http%'
+        ORDER BY RANDOM() LIMIT 1
+    """,
+    "9up @user": """
+        SELECT id, content, timestamp, channel_id, user_id, adder_user_id, added_timestamp, uses
+        FROM quotes WHERE guild_id = :guild_id AND content NOT LIKE '%http%'
+        AND user_id = :user_id ORDER BY RANDOM() LIMIT 1
+    """,
+    "trigger phrase": """
+        SELECT id, content FROM quotes WHERE guild_id = :guild_id
+        AND content NOT LIKE '%http%' AND content LIKE :phrase ESCAPE '\\'
+        ORDER BY RANDOM() LIMIT 1
+    """,
+    "9uptop": """
+        SELECT content, user_id, uses FROM quotes
+        WHERE guild_id = :guild_id AND uses > 0 ORDER BY uses DESC LIMIT 10
+    """,
+    "9uptop @user": """
+        SELECT content, user_id, uses FROM quotes
+        WHERE guild_id = :guild_id AND user_id = :user_id AND uses > 0
+        ORDER BY uses DESC LIMIT 10
+    """,
+    "9uplist": """
+        SELECT content, added_timestamp, adder_user_id, uses FROM quotes
+        WHERE guild_id = :guild_id AND user_id = :user_id ORDER BY added_timestamp DESC
+    """,
+    "save dup check": """
+        SELECT id FROM quotes
+        WHERE guild_id = :guild_id AND user_id = :user_id AND content = :content
+    """,
+    "weighted index build": """
+        SELECT id, user_id, uses, added_timestamp FROM quotes
+        WHERE guild_id = :guild_id AND content NOT LIKE '%http%' ORDER BY id
+    """,
+    "9upstats top": """
+        SELECT user_id, quotes, uses FROM stats_author
+        WHERE guild_id = :guild_id AND quotes > 0 ORDER BY quotes DESC LIMIT 5
+    """,
+    "export stream": """
+        SELECT * FROM quotes WHERE guild_id = :guild_id ORDER BY id
+    """,
+}
+
+
+def pick_params(conn) -> dict:
+    """Parameters for the busiest guild and a median one."""
+    guilds = conn.execute(
+        "SELECT guild_id, COUNT(*) FROM quotes GROUP BY guild_id ORDER BY 2 DESC"
+    ).fetchall()
+    chosen = {"largest": guilds[0][0], "median": guilds[len(guilds) // 2][0]}
+
+    params = {}
+    for label, gid in chosen.items():
+        user_id, content = conn.execute(
+            "SELECT user_id, content FROM quotes WHERE guild_id = ? "
+            "GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1",
+            (gid,),
+        ).fetchone()
+        params[label] = {
+            "guild_id": gid,
+            "user_id": user_id,
+            "content": content,
+            "phrase": "%早晨%",
+            "rows": dict(guilds)[gid],
+        }
+    return params
+
+
+def query_plan(conn, sql: str, params: dict) -> list:
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def plan_warnings(plan: list) -> list:
+    warnings = []
+    # "SCAN quotes" without an index reads the whole table; "SEARCH" or
+    # "SCAN quotes USING INDEX" do not
+    if any(step.startswith("SCAN quotes") and "INDEX" not in step for step in plan):
+        warnings.append("full scan")
+    # A temp B-tree means every matching row is sorted before LIMIT applies
+    if any("TEMP B-TREE" in step for step in plan):
+        warnings.append("sorts all matches")
+    return warnings
+
+
+def time_query(conn, sql: str, params: dict, reps: int) -> list:
+    timings = []
+    for _ in range(reps):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_database(path: str, reps: int) -> dict:
+    conn = sqlite3.connect(path)
+    total = conn.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+    params = pick_params(conn)
+    results = {"rows": total, "queries": {}}
+
+    for name, sql in QUERIES.items():
+        entry = {"plan": query_plan(conn, sql, params["largest"]), "timings": {}}
+        for label, p in params.items():
+            bound = {k: v for k, v in p.items() if f":{k}" in sql}
+            conn.execute(sql, bound).fetchall()  # warm the page cache
+            timings = time_query(conn, sql, bound, reps)
+            entry["timings"][label] = {
+                "guild_rows": p["rows"],
+                "median_ms": statistics.median(timings),
+                "p95_ms": sorted(timings)[max(0, round(0.95 * len(timings)) - 1)],
+            }
+        entry["warnings"] = plan_warnings(entry["plan"])
+        results["queries"][name] = entry
+    conn.close()
+    return results
+
+
+def print_results(results: dict, show_plans: bool):
+    rows = results["rows"]
+    print(f"\n=== {rows:,} rows ===")
+    print(f"{'query':<22} {'largest guild':>22} {'median guild':>22}")
+    for name, entry in results["queries"].items():
+        cells = []
+        for label in ("largest", "median"):
+            t = entry["timings"][label]
+            cells.append(f"{t['median_ms']:8.2f} / {t['p95_ms']:8.2f}ms")
+        flag = f"  ⚠️ {', '.join(entry['warnings'])}" if entry["warnings"] else ""
+        print(f"{name:<22} {cells[0]:>22} {cells[1]:>22}{flag}")
+        if show_plans:
+            for step in entry["plan"]:
+                print(f"    {step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quote queries by database size.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--dir", default="db/bench")
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--plans", action="store_true", help="print every query plan")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    all_results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        path = os.path.join(args.dir, f"quotes-{size}.db")
+        if args.regenerate or not os.path.exists(path):
+            gen_db.generate(path, size, guilds=args.guilds)
+        results = bench_database(path, args.reps)
+        print_results(results, args.plans)
+        all_results[size] = results
+
+    print("\nTimings are median / p95 per query. Plans shown are for the largest guild.")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,127 @@ import os
 import random
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
-from core.capture import Capture
+from core.capture import Capture, CaptureUnavailable
 from core.iam import not_blacklisted
+from core.rest import rest
+
+CAPTURE_MODES = ("frame", "burst", "clip")
+
+# Seconds before a request that is still working shows its progress message. Cached
+# lookups and quick grabs finish first and cost a single message.
+PROGRESS_DELAY = 1.5
+
+
+class ProgressReply:
+    """
+    One response per request, edited through its stages. Prefix commands get a status
+    message only once the work takes longer than PROGRESS_DELAY; slash commands defer
+    (Discord shows "thinking…") and edit the original response.
+    """
+
+    def __init__(self, ctx, delay=None):
+        self.ctx = ctx
+        self.delay = PROGRESS_DELAY if delay is None else delay
+        self.stage = None
+        self.message = None
+        self.shown = False
+        self.done = False
+        self._lock = asyncio.Lock()
+        self._timer = None
+
+    async def start(self, stage):
+        self.stage = stage
+        if self.ctx.interaction is not None:
+            await self.ctx.defer()
+        self._timer = asyncio.create_task(self._show_later())
+
+    async def _show_later(self):
+        await asyncio.sleep(self.delay)
+        async with self._lock:
+            if not self.done:
+                try:
+                    await self._show(self.stage)
+                except discord.HTTPException:
+                    pass  # Progress is cosmetic; finish() still answers
+
+    async def update(self, stage):
+        self.stage = stage
+        async with self._lock:
+            if self.shown and not self.done:
+                await self._show(stage)
+
+    async def _show(self, content):
+        if self.ctx.interaction is not None:
+            await self.ctx.interaction.edit_original_response(content=content)
+        elif self.message is None:
+            self.message = await self.ctx.send(content)
+        else:
+            await self.message.edit(content=content)
+        self.shown = True
+
+    async def finish(self, content=None, *, embed=None, file=None):
+        async with self._lock:
+            self.done = True
+        if self._timer is not None:
+            self._timer.cancel()
+
+        attachments = [file] if file else []
+        if self.ctx.interaction is not None:
+            return await self.ctx.interaction.edit_original_response(
+                content=content, embed=embed, attachments=attachments
+            )
+        if self.message is not None:
+            return await self.message.edit(content=content, embed=embed, attachments=attachments)
+        return await self.ctx.send(content, embed=embed, file=file)
 
 
 class CCTV(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.monitor = Capture("https://www.youtube.com/@SilvercordTST/streams")
-
-    @commands.command()
+        # One capture per guild at a time. Taken after the reply is deferred, unlike
+        # commands.max_concurrency, so a queued slash command never misses Discord's 3s
+        # interaction deadline.
+        self.guild_locks = {}
+
+    async def cog_unload(self):
+        self.monitor.encode_pool.shutdown(wait=False, cancel_futures=True)
+        await asyncio.to_thread(self.monitor.flush)
+
+    def _capture_plan(self, mode):
+        """(Capture method, file extension, progress text) for a capture mode."""
+        monitor = self.monitor
+        if mode == "burst":
+            return (
+                monitor.capture_burst,
+                monitor.extension,
+                f"🎞️ Recording {monitor.burst_frames} frames, {monitor.burst_interval:g}s apart",
+            )
+        if mode == "clip":
+            return monitor.capture_clip, "mp4", f"🎬 Recording a {monitor.clip_seconds}s clip"
+        return monitor.capture_frame, monitor.extension, "📸 Capturing"
+
+    @commands.hybrid_command()
+    @app_commands.describe(
+        game="sdvx or iidx",
+        side="L or R (random if left out)",
+        mode="frame (default), burst (frames over a few seconds) or clip (short video)",
+    )
     @not_blacklisted()
     @commands.cooldown(1, 10, commands.BucketType.user)
-    @commands.max_concurrency(1, per=commands.BucketType.guild, wait=True)
-    async def cctv(self, ctx, game: str, side: str = None):
+    async def cctv(self, ctx, game: str, side: str = None, mode: str = "frame"):
         """
-        Usage: !cctv <game> [side]
-        Example: !cctv sdvx L  |  !cctv sdvx
+        Usage: !cctv <game> [side] [burst|clip]
+        Example: !cctv sdvx L  |  !cctv sdvx  |  !cctv sdvx R burst
         """
         game = game.lower()
+        # `!cctv sdvx clip`: the side was left out
+        if side is not None and side.lower() in CAPTURE_MODES:
+            side, mode = None, side
+        mode = mode.lower()
 
         if game == "iidx":
             embed = discord.Embed(
@@ -39,29 +139,56 @@ class CCTV(commands.Cog):
             side = side.upper()
             if side not in ["L", "R"]:
                 return await ctx.send("❌ Invalid side! Use **L** or **R**.")
+            if mode not in CAPTURE_MODES:
+                return await ctx.send("❌ Invalid mode! Use **burst** or **clip**.")
+            capture, extension, stage = self._capture_plan(mode)
 
-            status_msg = await ctx.send(f"🔍 Searching live: **SDVX - {side}** ...")
+            progress = ProgressReply(ctx)
+            await progress.start(f"🔍 Searching live: **SDVX - {side}** ...")
 
             loop = asyncio.get_event_loop()
+            key = ctx.guild.id if ctx.guild else ctx.channel.id
+            lock = self.guild_locks.setdefault(key, asyncio.Lock())
+            if lock.locked():
+                await progress.update("🚦 Another user is checking the CCTV, you're next ...")
+
+            try:
+                async with lock:
+                    await progress.update(f"🔍 Searching live: **SDVX - {side}** ...")
+                    # Get URL
+                    stream_data = await loop.run_in_executor(
+                        None, self.monitor.get_stream_info, game, side
+                    )
+                    if stream_data:
+                        await progress.update(f"{stage} **SDVX - {side}** ...")
+                        # Capture (the encode pool bounds concurrent ffmpeg processes)
+                        suffix = "" if mode == "frame" else f"_{mode}"
+                        filename = f"cctv_{game}_{side}{suffix}.{extension}"
+                        file_path = await loop.run_in_executor(
+                            self.monitor.encode_pool,
+                            capture,
+                            stream_data["url"],
+                            filename,
+                            self.monitor.crop_for(game, side),
+                        )
+            except CaptureUnavailable as e:
+                return await progress.finish(
+                    f"⏳ **CCTV temporarily unavailable** ({e.name} keeps failing).\n"
+                    f"Try again in {max(1, round(e.retry_after))}s."
+                )
 
-            # Get URL
-            stream_data = await loop.run_in_executor(None, self.monitor.get_stream_info, game, side)
             if not stream_data:
-                await status_msg.delete()
-                return await ctx.send(
+                return await progress.finish(
                     f"⚠️ **Stream Offline**\nCould not find a live stream for SDVX {side}."
                 )
 
             url = stream_data["url"]
             title = stream_data["title"]
 
-            # Capture
-            filename = f"cctv_{game}_{side}.jpg"
-            file_path = await loop.run_in_executor(None, self.monitor.capture_frame, url, filename)
-
-            await status_msg.delete()
-
-            if file_path and os.path.exists(file_path):
+            limit = getattr(ctx.guild, "filesize_limit", 10 * 1024 * 1024)
+            if file_path and os.path.exists(file_path) and os.path.getsize(file_path) > limit:
+                await progress.finish("❌ The capture is too large to upload here.")
+            elif file_path and os.path.exists(file_path):
                 # 3. Upload
                 file = discord.File(file_path, filename=filename)
                 embed = discord.Embed(
@@ -71,11 +198,16 @@ class CCTV(commands.Cog):
                     if side == "R"
                     else discord.Color.blue(),
                 )
-                embed.set_image(url=f"attachment://{filename}")
+                # Clips play as a plain attachment under the embed
+                if mode != "clip":
+                    embed.set_image(url=f"attachment://{filename}")
                 embed.set_footer(text=f"Requested by {ctx.author.display_name}")
-                await ctx.send(file=file, embed=embed)
+                # Large upload: goes through the channel's message budget
+                await rest.request(
+                    f"messages:{ctx.channel.id}", lambda: progress.finish(embed=embed, file=file)
+                )
             else:
-                await ctx.send("❌ Error: Failed to capture frame from the stream.")
+                await progress.finish("❌ Error: Failed to capture frame from the stream.")
 
         else:
             await ctx.send(f"❓ Unknown game `{game}`. Supported games: `sdvx`, `iidx`")
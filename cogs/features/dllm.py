@@ -1,78 +1,116 @@
 import discord
 from discord.ext import commands
+import asyncio
 import json
-import random
 import os
 import logging
 
+from core.asset_index import AssetIndex
+from core.iam import not_blacklisted, rate_limited
+from core.rest import (
+    delete_message,
+    forget_webhook,
+    get_webhook,
+    run_in_background,
+    send_webhook,
+)
+
 logger = logging.getLogger("bot.dllm")
 
 class dllm(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.links_file = "data/dllm_links.json"
-        self.links = []
+        # Replaced wholesale on reload, never mutated: readers always see a complete index
+        self.index = AssetIndex()
         self._load_links()
 
     def _load_links(self):
-        if os.path.exists(self.links_file):
-            try:
-                with open(self.links_file, "r") as f:
-                    self.links = json.load(f)
-                logger.info(f"✅ Loaded {len(self.links)} DLLM assets.")
-            except Exception as e:
-                logger.error(f"❌ Failed to load DLLM links: {e}")
-                self.links = []
-        else:
+        """Builds a new index from the links file and swaps it in. A failed reload keeps
+        serving the previous index."""
+        if not os.path.exists(self.links_file):
             logger.warning(f"⚠️ DLLM file not found at {self.links_file}")
-            self.links = []
+            return False
+        try:
+            with open(self.links_file, "r", encoding="utf-8") as f:
+                index = AssetIndex(json.load(f))
+        except Exception as e:
+            logger.error(f"❌ Failed to load DLLM links: {e}")
+            return False
+        self.index = index
+        logger.info(f"✅ Loaded {len(index)} DLLM assets ({len(index.tags)} tags).")
+        return True
 
-    async def _get_webhook(self, ctx):
+    @staticmethod
+    def _webhook_channel(ctx):
+        """Webhooks live on the parent channel of a thread."""
         is_thread = isinstance(ctx.channel, discord.Thread)
-        channel = ctx.channel.parent if is_thread else ctx.channel
-
-        webhooks = await channel.webhooks()
-        webhook = next((w for w in webhooks if w.user == self.bot.user), None)
-
-        if not webhook:
-            webhook = await channel.create_webhook(name="Yamada Proxy")
+        return (ctx.channel.parent if is_thread else ctx.channel), is_thread
 
+    async def _get_webhook(self, ctx):
+        channel, is_thread = self._webhook_channel(ctx)
+        webhook = await get_webhook(
+            channel, "Yamada Proxy", match=lambda w: w.user == self.bot.user
+        )
         return webhook, is_thread
 
     @commands.command(aliases=["sticker", "gif"])
-    async def dllm(self, ctx):
-        
-        if not self.links:
+    @not_blacklisted()
+    @rate_limited()
+    async def dllm(self, ctx, *, query: str = None):
+        """
+        Usage: !dllm [tag or alias]
+        Example: !dllm  |  !dllm cat  |  !dllm happy cat
+        """
+        if not self.index:
             return await ctx.send("❌ No assets loaded!")
 
-        sticker_url = random.choice(self.links)
-        try:
-            await ctx.message.delete()
-        except (discord.Forbidden, discord.NotFound):
-            pass  # If we can't delete, just move on
+        sticker_url = self.index.pick(query)
+        if sticker_url is None:
+            return await ctx.send(f"❓ No sticker matches `{query}`. See `!dllmtags`.")
+        # Background priority: under load the delete is shed, not the sticker
+        run_in_background(delete_message(ctx.message))
 
         if ctx.channel.permissions_for(ctx.guild.me).manage_webhooks:
             try:
                 webhook, is_thread = await self._get_webhook(ctx)
-                
-                await webhook.send(
+
+                await send_webhook(
+                    webhook,
                     content=sticker_url,
                     username=ctx.author.display_name,
                     avatar_url=ctx.author.display_avatar.url,
                     thread=ctx.channel if is_thread else discord.utils.MISSING
                 )
-                return 
+                return
+            except discord.NotFound:
+                channel, _ = self._webhook_channel(ctx)
+                forget_webhook(channel.id, "Yamada Proxy")
+                logger.warning("Webhook was deleted, falling back to a normal message.")
             except Exception as e:
                 logger.error(f"Webhook impersonation failed: {e}")
 
         # Fallback (Normal Bot Message)
         await ctx.send(sticker_url)
 
+    # --- COMMAND: !dllmtags ---
+    @commands.command()
+    async def dllmtags(self, ctx):
+        tags = self.index.top_tags()
+        if not tags:
+            return await ctx.send("🏷️ No tagged stickers yet.")
+        listing = ", ".join(f"`{tag}` ({count})" for tag, count in tags)
+        await ctx.send(f"🏷️ **Sticker tags:** {listing}")
+
     @commands.command(hidden=True)
     @commands.is_owner()
     async def reload_dllm(self, ctx):
-        self._load_links()
-        await ctx.send(f"🔄 Reloaded! Total assets: **{len(self.links)}**")
+        # Parsing and indexing thousands of assets stays off the event loop
+        if not await asyncio.to_thread(self._load_links):
+            return await ctx.send(
+                f"❌ Reload failed, still serving **{len(self.index)}** assets. Check the logs."
+            )
+        await ctx.send(f"🔄 Reloaded! Total assets: **{len(self.index)}**")
 
 async def setup(bot):
     await bot.add_cog(dllm(bot))
\ No newline at end of file
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+import discord
+from discord.ext import commands, tasks
+
+from core.config import settings
+from core.iam import is_admin, not_blacklisted
+from core.rest import rest
+from core.server_settings import server_settings
+
+logger = logging.getLogger("discord.hko")
+
+REQUEST_TIMEOUT = 10
+# Warning pushes go out this many channels at a time, with a pause between batches,
+# so a typhoon signal change doesn't flood the REST budget
+PUSH_BATCH = 20
+PUSH_PAUSE = 1.0
+
+
+def parse_current(data: dict) -> dict:
+    """rhrread: current readings at the Observatory."""
+    temps = data.get("temperature", {}).get("data", [])
+    observatory = next((t for t in temps if t.get("place") == "Hong Kong Observatory"), None)
+    observatory = observatory or (temps[0] if temps else {})
+    humidity = data.get("humidity", {}).get("data", [])
+    icons = data.get("icon") or []
+    return {
+        "temperature": observatory.get("value"),
+        "humidity": humidity[0].get("value") if humidity else None,
+        "icon": icons[0] if icons else None,
+        "updated": data.get("updateTime"),
+    }
+
+
+def parse_forecast(data: dict) -> dict:
+    """flw: local weather forecast text."""
+    return {
+        "situation": data.get("generalSituation", ""),
+        "period": data.get("forecastPeriod", ""),
+        "forecast": data.get("forecastDesc", ""),
+        "outlook": data.get("outlook", ""),
+        "updated": data.get("updateTime"),
+    }
+
+
+def parse_warnings(data: dict) -> dict:
+    """warnsum: {warning type: {"code", "name", "issued"}} for warnings in force."""
+    warnings = {}
+    for key, entry in (data or {}).items():
+        if not isinstance(entry, dict) or entry.get("actionCode") == "CANCEL":
+            continue
+        warnings[key] = {
+            "code": entry.get("code", key),
+            "name": entry.get("name", key),
+            "issued": entry.get("issueTime"),
+        }
+    return warnings
+
+
+def diff_warnings(before: dict, after: dict) -> tuple:
+    """(issued or changed, cancelled) between two parse_warnings() results."""
+    changed = [w for key, w in after.items() if before.get(key, {}).get("code") != w["code"]]
+    cancelled = [w for key, w in before.items() if key not in after]
+    return changed, cancelled
+
+
+class HKOFeed:
+    """
+    The HKO open data API, polled by one task. Each dataset is fetched with
+    If-None-Match / If-Modified-Since, so an unchanged feed costs a 304 and no parsing;
+    the parsed results are shared by every guild and command.
+    """
+
+    DATASETS = {"rhrread": parse_current, "flw": parse_forecast, "warnsum": parse_warnings}
+
+    def __init__(self, base_url: str, lang: str):
+        self.base_url = base_url
+        self.lang = lang
+        self.data = {}  # dataset -> parsed result
+        self.validators = {}  # dataset -> request headers for the next conditional GET
+        self.fetched_at = None
+        self.stats = {"fetches": 0, "not_modified": 0, "errors": 0}
+
+    async def fetch(self, session: aiohttp.ClientSession, dataset: str) -> bool:
+        """Fetches one dataset. Returns True when its parsed content changed."""
+        self.stats["fetches"] += 1
+        params = {"dataType": dataset, "lang": self.lang}
+        headers = self.validators.get(dataset, {})
+        async with session.get(self.base_url, params=params, headers=headers) as resp:
+            if resp.status == 304:
+                self.stats["not_modified"] += 1
+                return False
+            resp.raise_for_status()
+            raw = await resp.json(content_type=None)
+            validators = {}
+            if resp.headers.get("ETag"):
+                validators["If-None-Match"] = resp.headers["ETag"]
+            if resp.headers.get("Last-Modified"):
+                validators["If-Modified-Since"] = resp.headers["Last-Modified"]
+            self.validators[dataset] = validators
+
+        parsed = self.DATASETS[dataset](raw)
+        changed = self.data.get(dataset) != parsed
+        self.data[dataset] = parsed
+        return changed
+
+    async def refresh(self, session: aiohttp.ClientSession) -> set:
+        """Fetches every dataset concurrently. Returns the names of those that changed."""
+        results = await asyncio.gather(
+            *(self.fetch(session, name) for name in self.DATASETS), return_exceptions=True
+        )
+        changed = set()
+        for name, result in zip(self.DATASETS, results):
+            if isinstance(result, Exception):
+                self.stats["errors"] += 1
+                logger.warning(f"🌦️ HKO {name} fetch failed: {result!r}")
+            elif result:
+                changed.add(name)
+        self.fetched_at = time.time()
+        return changed
+
+
+class HKO(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.feed = HKOFeed(settings.HKO_API_URL, settings.HKO_LANG)
+        self.session = None
+        self.warnings = None  # last pushed state; None until the first successful fetch
+        self.pushed = 0
+        self._refresh_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+        self.poll.change_interval(seconds=settings.HKO_POLL_SECONDS)
+        self.poll.start()
+
+    async def cog_unload(self):
+        self.poll.cancel()
+        if self.session is not None:
+            await self.session.close()
+
+    async def refresh(self):
+        """One poll. Concurrent callers (poller, first command) share a single fetch."""
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return
+        async with self._refresh_lock:
+            changed = await self.feed.refresh(self.session)
+
+        if "warnsum" not in self.feed.data:
+            return
+        current = self.feed.data["warnsum"]
+        # The first fetch is the baseline: a restart must not re-announce warnings
+        if self.warnings is not None and "warnsum" in changed:
+            issued, cancelled = diff_warnings(self.warnings, current)
+            if issued or cancelled:
+                await self.push_warnings(issued, cancelled)
+        self.warnings = current
+
+    @tasks.loop(seconds=300)
+    async def poll(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"🌦️ HKO poll failed: {e}")
+
+    @poll.before_loop
+    async def before_poll(self):
+        await self.bot.wait_until_ready()
+
+    def subscribed_channels(self) -> list:
+        channels = []
+        for gid, values in server_settings.data.items():
+            channel_id = values.get("hko_channel")
+            guild = channel_id and self.bot.get_guild(int(gid))
+            channel = guild and guild.get_channel_or_thread(channel_id)
+            if channel is not None and channel.permissions_for(guild.me).send_messages:
+                channels.append(channel)
+        return channels
+
+    def warning_embed(self, issued: list, cancelled: list) -> discord.Embed:
+        embed = discord.Embed(
+            title="⚠️ HKO Weather Warnings",
+            color=discord.Color.orange() if issued else discord.Color.green(),
+        )
+        if issued:
+            embed.add_field(
+                name="In force", value="\n".join(f"• {w['name']}" for w in issued), inline=False
+            )
+        if cancelled:
+            embed.add_field(
+                name="Cancelled",
+                value="\n".join(f"• ~~{w['name']}~~" for w in cancelled),
+                inline=False,
+            )
+        embed.set_footer(text="Hong Kong Observatory")
+        return embed
+
+    async def push_warnings(self, issued: list, cancelled: list):
+        channels = self.subscribed_channels()
+        if not channels:
+            return
+        embed = self.warning_embed(issued, cancelled)
+        logger.info(f"🌦️ Pushing HKO warning change to {len(channels)} channels")
+
+        # Warnings are safety alerts, so they go at normal priority rather than being
+        # shed under load; the batches and pauses keep the fan-out from crowding replies.
+        for start in range(0, len(channels), PUSH_BATCH):
+            batch = channels[start : start + PUSH_BATCH]
+            results = await asyncio.gather(
+                *(
+                    rest.request(
+                        f"messages:{channel.id}",
+                        lambda channel=channel: channel.send(embed=embed),
+                    )
+                    for channel in batch
+                ),
+                return_exceptions=True,
+            )
+            for channel, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"🌦️ HKO push to {channel.id} failed: {result}")
+                else:
+                    self.pushed += 1
+            if start + PUSH_BATCH < len(channels):
+                await asyncio.sleep(PUSH_PAUSE)
+
+    # --- COMMAND: !weather ---
+    @commands.command()
+    @not_blacklisted()
+    async def weather(self, ctx):
+        """Current Hong Kong weather, forecast and warnings (from the shared HKO cache)."""
+        if "rhrread" not in self.feed.data:
+            # Nothing polled yet (just started): fetch once, shared with the poller
+            await self.refresh()
+        current = self.feed.data.get("rhrread")
+        if current is None:
+            await ctx.send("🌦️ Weather data is unavailable right now. Try again later.")
+            return
+
+        forecast = self.feed.data.get("flw", {})
+        warnings = self.feed.data.get("warnsum", {})
+        embed = discord.Embed(
+            title="🌦️ Hong Kong Weather",
+            description=forecast.get("forecast") or None,
+            color=discord.Color.blue(),
+        )
+        if current["temperature"] is not None:
+            embed.add_field(name="🌡️ Temperature", value=f"{current['temperature']}°C")
+        if current["humidity"] is not None:
+            embed.add_field(name="💧 Humidity", value=f"{current['humidity']}%")
+        if current["icon"] is not None:
+            embed.set_thumbnail(
+                url=f"https://www.hko.gov.hk/images/HKOWxIconOutline/pic{current['icon']}.png"
+            )
+        if warnings:
+            embed.add_field(
+                name="⚠️ Warnings",
+                value="\n".join(f"• {w['name']}" for w in warnings.values()),
+                inline=False,
+            )
+        if forecast.get("outlook"):
+            embed.add_field(name="🔭 Outlook", value=forecast["outlook"][:1024], inline=False)
+        embed.set_footer(text=f"Hong Kong Observatory • {current['updated'] or 'n/a'}")
+        await ctx.send(embed=embed)
+
+    # --- COMMAND: !hkowarn [#channel] ---
+    @commands.command(name="hkowarn")
+    @is_admin()
+    async def set_warning_channel(self, ctx, channel: Optional[discord.TextChannel] = None):
+        """
+        Posts HKO warning changes (typhoon signals, rainstorms, ...) to a channel.
+        Usage: !hkowarn #channel  (no channel shows the setup)
+        """
+        if not ctx.guild:
+            return
+
+        if channel is None:
+            cid = server_settings.get_val(ctx.guild.id, "hko_channel")
+            if cid is None:
+                await ctx.send("🌦️ Warning alerts are off. Turn them on with `!hkowarn #channel`.")
+            else:
+                await ctx.send(f"🌦️ Warning alerts go to <#{cid}>.")
+            return
+
+        await server_settings.set_val(ctx.guild.id, "hko_channel", channel.id)
+        await ctx.send(
+            embed=discord.Embed(
+                description=f"✅ HKO warning changes will be posted in {channel.mention}.",
+                color=discord.Color.green(),
+            )
+        )
+
+    # --- COMMAND: !hkowarnoff ---
+    @commands.command(name="hkowarnoff")
+    @is_admin()
+    async def disable_warning_channel(self, ctx):
+        if not ctx.guild:
+            return
+
+        await server_settings.set_val(ctx.guild.id, "hko_channel", None)
+        await ctx.send("🛑 HKO warning alerts turned off.")
+
+
+async def setup(bot):
+    await bot.add_cog(HKO(bot))
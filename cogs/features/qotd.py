@@ -0,0 +1,284 @@
+import asyncio
+import heapq
+import logging
+import re
+import time
+import zlib
+from collections import defaultdict
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+from core.db import quote_db
+from core.iam import is_admin
+from core.member_cache import member_profiles
+from core.quote_index import quote_index
+from core.server_settings import server_settings
+
+logger = logging.getLogger("discord.qotd")
+
+# Posts reuse Recorder's webhook mimic path
+DEPENDS_ON = ("cogs.features.quotes_record",)
+
+MIN_INTERVAL_HOURS = 1
+MAX_INTERVAL_HOURS = 24 * 7
+# Each guild fires at a stable offset within this window after its configured time,
+# so thousands of guilds set to 09:00 don't all post in the same second.
+MAX_JITTER = 600
+# Guilds due within one wave share one DB read per file
+WAVE_SIZE = 100
+# Pause between posts inside a wave, keeps fan-out well under the REST budget
+POST_SPACING = 0.25
+# Random quotes drawn per guild, so one by a bot (legacy/imported rows) can be skipped
+CANDIDATES = 3
+DAY = 86400
+
+TIME_PATTERN = re.compile(r"^([01]?\d|2[0-3]):([0-5]\d)$")
+
+WAVE_QUERY = """
+    SELECT guild_id, id, content, timestamp, channel_id,
+        user_id, adder_user_id, added_timestamp, uses
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY guild_id ORDER BY RANDOM()) AS pick
+        FROM quotes
+        WHERE guild_id IN ({placeholders})
+        AND content NOT LIKE '%http%'
+    )
+    WHERE pick <= {candidates}
+    ORDER BY guild_id, pick
+"""
+
+
+def next_fire_time(
+    guild_id: int, hhmm: str, interval_hours: int, last_slot: Optional[float], now: float
+) -> float:
+    """
+    Next post time for a guild. The first post is the next HH:MM (UTC, plus the guild's
+    stable jitter); after that, one interval after the last slot posted. A slot missed
+    while the bot was down is returned as is (in the past), so it fires on startup.
+    """
+    if last_slot is not None:
+        return last_slot + interval_hours * 3600
+    hours, minutes = map(int, hhmm.split(":"))
+    jitter = zlib.crc32(str(guild_id).encode()) % min(MAX_JITTER, interval_hours * 900)
+    first = now - now % DAY + hours * 3600 + minutes * 60 + jitter
+    return first if first > now else first + DAY
+
+
+def current_slot(fire_at: float, interval_hours: int, now: float) -> float:
+    """The latest slot at or before `now` (several missed slots catch up as one post)."""
+    period = interval_hours * 3600
+    return fire_at + max(0, (now - fire_at) // period) * period
+
+
+class QuoteOfTheDay(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.heap = []  # (fire_at, guild_id); stale entries are skipped lazily
+        self.next_fire = {}  # guild_id -> fire_at of its live heap entry
+        self.wakeup = asyncio.Event()
+        self.runner = None
+        self.posted = 0
+
+    async def cog_load(self):
+        self.runner = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        if self.runner:
+            self.runner.cancel()
+
+    def schedule(self, guild_id: int, now: Optional[float] = None):
+        """(Re)computes a guild's next post from its settings; drops it if disabled."""
+        self.next_fire.pop(guild_id, None)
+        if not server_settings.get_val(guild_id, "qotd_channel"):
+            return
+
+        fire_at = next_fire_time(
+            guild_id,
+            server_settings.get_val(guild_id, "qotd_time"),
+            server_settings.get_val(guild_id, "qotd_interval"),
+            server_settings.get_val(guild_id, "qotd_last"),
+            now or time.time(),
+        )
+        self.next_fire[guild_id] = fire_at
+        heapq.heappush(self.heap, (fire_at, guild_id))
+        self.wakeup.set()
+
+    async def _pop_due(self, now: float) -> list:
+        due = []
+        while self.heap and self.heap[0][0] <= now and len(due) < WAVE_SIZE:
+            fire_at, guild_id = heapq.heappop(self.heap)
+            if self.next_fire.get(guild_id) != fire_at:
+                continue  # rescheduled or disabled since this entry was pushed
+            self.next_fire.pop(guild_id)
+            interval = server_settings.get_val(guild_id, "qotd_interval")
+            due.append((guild_id, current_slot(fire_at, interval, now)))
+        if due:
+            # Recorded before posting: a crash mid-wave skips a post rather than repeating it
+            await server_settings.set_vals([(gid, "qotd_last", slot) for gid, slot in due])
+            for guild_id, _ in due:
+                self.schedule(guild_id, now)
+        return [guild_id for guild_id, _ in due]
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        for gid in list(server_settings.data):
+            # Each shard worker only posts for the guilds it is connected to
+            if self.bot.get_guild(int(gid)):
+                self.schedule(int(gid))
+        logger.info(f"📅 QOTD scheduler started with {len(self.next_fire)} guilds")
+
+        while True:
+            self.wakeup.clear()
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = await self._pop_due(time.time())
+            if due:
+                try:
+                    await self._dispatch_wave(due)
+                except Exception as e:
+                    logger.error(f"QOTD wave of {len(due)} guilds failed: {e}")
+
+    @staticmethod
+    def _by_file(guild_ids) -> list:
+        by_file = defaultdict(list)
+        for gid in guild_ids:
+            by_file[quote_db.path_for(gid)].append(gid)
+        return list(by_file.values())
+
+    async def _fetch_wave(self, guild_ids: list) -> dict:
+        """A few random candidate quotes per guild, with a single query per DB file."""
+        candidates = defaultdict(list)
+        for gids in self._by_file(guild_ids):
+            query = WAVE_QUERY.format(
+                placeholders=", ".join("?" * len(gids)), candidates=CANDIDATES
+            )
+            async with quote_db.connect(gids[0]) as db:
+                async with db.execute(query, gids) as cursor:
+                    rows = await cursor.fetchall()
+            for row in rows:
+                candidates[row[0]].append(row[1:])
+        return candidates
+
+    async def _count_uses(self, posted: dict):
+        for gids in self._by_file(posted):
+            async with quote_db.connect(gids[0]) as db:
+                await db.executemany(
+                    "UPDATE quotes SET uses = uses + 1 WHERE id = ?", [(posted[g],) for g in gids]
+                )
+                await db.commit()
+        for gid, quote_id in posted.items():
+            quote_index.used(gid, quote_id)
+
+    async def _pick(self, guild, rows):
+        """First candidate not written by a bot, with its resolved author (or None)."""
+        for row in rows:
+            member = await member_profiles.resolve(guild, row[4])
+            if member is None or not member.bot:
+                return row, member
+        return None, None
+
+    async def _dispatch_wave(self, guild_ids: list):
+        recorder = self.bot.get_cog("Recorder")
+        if recorder is None:
+            return
+
+        candidates = await self._fetch_wave(guild_ids)
+        posted = {}
+        for gid, rows in candidates.items():
+            guild = self.bot.get_guild(gid)
+            channel = guild and guild.get_channel_or_thread(
+                server_settings.get_val(gid, "qotd_channel")
+            )
+            if channel is None or not channel.permissions_for(guild.me).send_messages:
+                logger.warning(f"QOTD channel for guild {gid} is missing or not writable")
+                continue
+            try:
+                row, member = await self._pick(guild, rows)
+                if row is None:
+                    continue
+                await recorder.send_quote(channel, guild, row, member=member)
+                posted[gid] = row[0]
+                self.posted += 1
+            except Exception as e:
+                logger.warning(f"QOTD post failed in guild {gid}: {e}")
+            await asyncio.sleep(POST_SPACING)
+        if posted:
+            await self._count_uses(posted)
+
+    # --- COMMAND: !9upqotd #channel [hours] [HH:MM] ---
+    @commands.command(name="9upqotd")
+    @is_admin()
+    async def set_qotd(
+        self,
+        ctx,
+        channel: Optional[discord.TextChannel] = None,
+        hours: int = 24,
+        at: str = "09:00",
+    ):
+        """
+        Posts a random quote to a channel every few hours.
+        Usage: !9upqotd #channel [hours=24] [HH:MM UTC=09:00]  (no channel shows the setup)
+        """
+        if not ctx.guild:
+            return
+
+        if channel is None:
+            next_at = self.next_fire.get(ctx.guild.id)
+            if next_at is None:
+                await ctx.send("📅 Quote of the day is off. Set it with `!9upqotd #channel`.")
+                return
+            cid = server_settings.get_val(ctx.guild.id, "qotd_channel")
+            await ctx.send(f"📅 Next quote in <#{cid}> <t:{int(next_at)}:R>.")
+            return
+
+        if not MIN_INTERVAL_HOURS <= hours <= MAX_INTERVAL_HOURS:
+            await ctx.send(f"❌ Interval must be {MIN_INTERVAL_HOURS}-{MAX_INTERVAL_HOURS} hours.")
+            return
+        match = TIME_PATTERN.match(at)
+        if not match:
+            await ctx.send("❌ Time must be HH:MM (UTC), e.g. `09:00`.")
+            return
+
+        await server_settings.set_vals(
+            [
+                (ctx.guild.id, "qotd_channel", channel.id),
+                (ctx.guild.id, "qotd_interval", hours),
+                (ctx.guild.id, "qotd_time", f"{int(match[1]):02d}:{match[2]}"),
+                # A new schedule starts over at the configured time
+                (ctx.guild.id, "qotd_last", None),
+            ]
+        )
+        self.schedule(ctx.guild.id)
+
+        await ctx.send(
+            embed=discord.Embed(
+                description=(
+                    f"✅ A quote will be posted in {channel.mention} every **{hours}h**, "
+                    f"first <t:{int(self.next_fire[ctx.guild.id])}:R>."
+                ),
+                color=discord.Color.green(),
+            )
+        )
+
+    # --- COMMAND: !9upqotdoff ---
+    @commands.command(name="9upqotdoff")
+    @is_admin()
+    async def disable_qotd(self, ctx):
+        if not ctx.guild:
+            return
+
+        await server_settings.set_val(ctx.guild.id, "qotd_channel", None)
+        self.schedule(ctx.guild.id)
+        await ctx.send("🛑 Quote of the day turned off.")
+
+
+async def setup(bot):
+    await bot.add_cog(QuoteOfTheDay(bot))
@@ -0,0 +1,141 @@
+import time
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+from core.db import WEEK, quote_db
+from core.iam import not_blacklisted
+from core.member_cache import CachedMember
+
+TOP_COUNT = 5
+WEEKS_SHOWN = 8
+BAR_WIDTH = 12
+
+
+def _bar(value: int, peak: int) -> str:
+    filled = round(BAR_WIDTH * value / peak) if peak else 0
+    return "█" * filled + "·" * (BAR_WIDTH - filled)
+
+
+class QuoteStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def _fetch(self, db, query, params):
+        async with db.execute(query, params) as cursor:
+            return await cursor.fetchall()
+
+    async def _guild_stats(self, ctx):
+        gid = ctx.guild.id
+        this_week = int(time.time()) // WEEK
+
+        # Rollup tables hold one row per author/adder/week, never per quote
+        async with quote_db.connect(gid) as db:
+            totals = await self._fetch(
+                db,
+                "SELECT SUM(quotes), SUM(uses), COUNT(*) FROM stats_author "
+                "WHERE guild_id = ? AND quotes > 0",
+                (gid,),
+            )
+            authors = await self._fetch(
+                db,
+                "SELECT user_id, quotes, uses FROM stats_author "
+                "WHERE guild_id = ? AND quotes > 0 ORDER BY quotes DESC LIMIT ?",
+                (gid, TOP_COUNT),
+            )
+            adders = await self._fetch(
+                db,
+                "SELECT adder_user_id, quotes FROM stats_adder "
+                "WHERE guild_id = ? AND quotes > 0 ORDER BY quotes DESC LIMIT ?",
+                (gid, TOP_COUNT),
+            )
+            weeks = await self._fetch(
+                db,
+                "SELECT week, saved, used FROM stats_week WHERE guild_id = ? AND week > ?",
+                (gid, this_week - WEEKS_SHOWN),
+            )
+
+        quotes, uses, people = totals[0]
+        if not quotes:
+            await ctx.send("📜 No quotes saved in this server yet.")
+            return
+
+        embed = discord.Embed(
+            title="📊 9up Stats",
+            description=f"**{quotes}** quotes from **{people}** people • used **{uses}** times",
+            color=discord.Color.gold(),
+        )
+        embed.add_field(
+            name="🗣️ Most Quoted",
+            value="\n".join(f"<@{uid}> • **{n}** ({u} uses)" for uid, n, u in authors),
+            inline=True,
+        )
+        embed.add_field(
+            name="✍️ Top Recorders",
+            value="\n".join(f"{f'<@{uid}>' if uid else 'Unknown'} • **{n}**" for uid, n in adders),
+            inline=True,
+        )
+
+        by_week = {week: (saved, used) for week, saved, used in weeks}
+        peak = max((saved for saved, _ in by_week.values()), default=0)
+        lines = []
+        for week in range(this_week - WEEKS_SHOWN + 1, this_week + 1):
+            saved, used = by_week.get(week, (0, 0))
+            lines.append(f"<t:{week * WEEK}:d> `{_bar(saved, peak)}` +{saved} • {used} uses")
+        embed.add_field(name="📅 Weekly Activity", value="\n".join(lines), inline=False)
+
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    async def _member_stats(self, ctx, member):
+        gid = ctx.guild.id
+        async with quote_db.connect(gid) as db:
+            quoted = await self._fetch(
+                db,
+                "SELECT quotes, uses FROM stats_author WHERE guild_id = ? AND user_id = ?",
+                (gid, member.id),
+            )
+            quotes, uses = quoted[0] if quoted else (0, 0)
+            rank = await self._fetch(
+                db,
+                "SELECT COUNT(*) + 1 FROM stats_author WHERE guild_id = ? AND quotes > ?",
+                (gid, quotes),
+            )
+            added = await self._fetch(
+                db,
+                "SELECT quotes FROM stats_adder WHERE guild_id = ? AND adder_user_id = ?",
+                (gid, member.id),
+            )
+
+        embed = discord.Embed(title=f"📊 9up Stats: {member.display_name}", color=member.color)
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.add_field(
+            name="🗣️ Quoted",
+            value=f"**{quotes}** quotes" + (f" • rank #{rank[0][0]}" if quotes else ""),
+            inline=True,
+        )
+        embed.add_field(name="🔁 Used", value=f"**{uses}** times", inline=True)
+        embed.add_field(
+            name="✍️ Recorded", value=f"**{added[0][0] if added else 0}** quotes", inline=True
+        )
+        await ctx.send(embed=embed)
+
+    # --- COMMAND: !9upstats [@user] ---
+    @commands.command(name="9upstats")
+    @not_blacklisted()
+    async def stats(self, ctx, member: Optional[CachedMember] = None):
+        """
+        Shows who is quoted most, who records most, and weekly activity.
+        Usage: !9upstats (Server) OR !9upstats @User
+        """
+        if not ctx.guild:
+            return
+
+        if member:
+            await self._member_stats(ctx, member)
+        else:
+            await self._guild_stats(ctx)
+
+
+async def setup(bot):
+    await bot.add_cog(QuoteStats(bot))
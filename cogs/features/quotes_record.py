@@ -1,53 +1,59 @@
+import asyncio
 import logging
 import os
+import time
 from typing import Optional
 
-import aiosqlite
 import discord
 from discord.ext import commands
 
-from core.iam import not_blacklisted
+from core import backup, near_dup
+from core.db import INSERT_QUOTE_IF_NEW, SINGLE_DB, UNCOUNT_WEEK_USES, quote_db
+from core.iam import is_admin, is_owner, not_blacklisted, rate_limited
+from core.member_cache import CachedMember, MemberProfile, member_profiles
+from core.quote_index import MODES, quote_index
+from core.rest import forget_webhook, get_webhook, send_webhook
+from core.server_settings import server_settings
 from core.views import PaginationView, DeleteQuoteView
 
 logger = logging.getLogger("discord.recorder")
 
+IMPORT_BATCH_SIZE = 200
+IMPORT_PROGRESS_INTERVAL = 5  # seconds between progress message edits
+
+
+def validate_quote_message(msg: discord.Message) -> Optional[str]:
+    """Returns why a message can't be saved as a quote, or None if it can."""
+    if msg.author.bot:
+        return "I cannot save messages from bots."
+    if msg.webhook_id is not None:
+        return "I cannot save webhook messages."
+    if "http://" in msg.content or "https://" in msg.content:
+        return "I cannot save messages containing links."
+    if not msg.content:
+        return "Cannot save empty messages."
+    return None
+
 
 class Recorder(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = "db/quotes.db"
 
     async def cog_load(self):
-        if not os.path.exists("db"):
-            os.makedirs("db")
-
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("PRAGMA journal_mode=WAL")
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS quotes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    content TEXT,
-                    timestamp TEXT,
-                    channel_id INTEGER,
-                    adder_user_id INTEGER,
-                    added_timestamp INTEGER,
-                    uses INTEGER DEFAULT 0
-                )
-            """
-            )
-            await db.execute(
-                "CREATE INDEX IF NOT EXISTS idx_guild_user ON quotes(guild_id, user_id)"
+        # Files are opened (and their schema created) lazily by quote_db
+        if quote_db.layout != "single" and os.path.exists(SINGLE_DB):
+            logger.warning(
+                f"⚠️ DB layout is '{quote_db.layout}' but {SINGLE_DB} still exists. "
+                "Run `python -m core.backup split` to migrate it."
             )
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_uses ON quotes(uses DESC)")
-            await db.commit()
 
+    async def cog_unload(self):
+        await quote_db.close_all()
 
     # --- COMMAND: !save ---
     @commands.command(name="save")
     @not_blacklisted()
+    @rate_limited()
     async def save_quote(self, ctx):
         if not ctx.guild:
             return
@@ -55,7 +61,7 @@ class Recorder(commands.Cog):
         async def send_error(text):
             embed = discord.Embed(
                 title="❌ error",
-                description=text, 
+                description=text,
                 color=discord.Color.red())
             await ctx.send(embed=embed)
 
@@ -71,62 +77,80 @@ class Recorder(commands.Cog):
             return
 
         # 3. Validation Checks
-        if ref_msg.author.bot:
-            await send_error("I cannot save messages from bots.")
-            return
-
-        if ref_msg.webhook_id is not None:
-            await send_error("I cannot save webhook messages.")
-            return
-
-        if "http://" in ref_msg.content or "https://" in ref_msg.content:
-            await send_error("I cannot save messages containing links.")
-            return
-
-        if not ref_msg.content:
-            await send_error("Cannot save empty messages.")
+        error = validate_quote_message(ref_msg)
+        if error:
+            await send_error(error)
             return
 
         # 4. Data Prep
         orig_time = int(ref_msg.created_at.timestamp())
         orig_channel = ref_msg.channel.id
 
-        # 5. Database Interaction
-        async with aiosqlite.connect(self.db_path) as db:
+        # 5. Database Interaction (replies wait until the connection is released)
+        duplicate = similar = None
+        async with quote_db.connect(ctx.guild.id) as db:
             # Check duplications
             cursor = await db.execute(
                 "SELECT id FROM quotes WHERE guild_id = ? AND user_id = ? AND content = ?",
                 (ctx.guild.id, ref_msg.author.id, ref_msg.content),
             )
-            data = await cursor.fetchone()
+            duplicate = await cursor.fetchone()
 
-            if data:
-                embed = discord.Embed(
-                    description=f"⚠️ I already have that quote saved for **{ref_msg.author.display_name}**!",
-                    color=discord.Color.gold()
+            if not duplicate:
+                # Check near-duplicates (punctuation, case, emoji variations)
+                await near_dup.index_pending(db, ctx.guild.id)
+                similar = await near_dup.find_near_duplicate(
+                    db, ctx.guild.id, ref_msg.author.id, ref_msg.content
                 )
-                await ctx.send(embed=embed)
-                return
 
-            # Insert new quote
-            await db.execute(
-                """
-                INSERT INTO quotes (
-                guild_id, user_id, content, timestamp,
-                channel_id, adder_user_id, added_timestamp, uses)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
-                """,
-                (
-                    ctx.guild.id,
-                    ref_msg.author.id,
-                    ref_msg.content,
-                    str(orig_time),
-                    orig_channel,
-                    ctx.author.id,
-                    int(discord.utils.utcnow().timestamp()),
+            if duplicate or similar:
+                await db.commit()
+            else:
+                # Insert new quote
+                added_ts = int(discord.utils.utcnow().timestamp())
+                cursor = await db.execute(
+                    """
+                    INSERT INTO quotes (
+                    guild_id, user_id, content, timestamp,
+                    channel_id, adder_user_id, added_timestamp, uses)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                    """,
+                    (
+                        ctx.guild.id,
+                        ref_msg.author.id,
+                        ref_msg.content,
+                        str(orig_time),
+                        orig_channel,
+                        ctx.author.id,
+                        added_ts,
+                    ),
+                )
+                await near_dup.add_to_index(db, ctx.guild.id, cursor.lastrowid, ref_msg.content)
+                await db.commit()
+
+        if duplicate:
+            embed = discord.Embed(
+                description=f"⚠️ I already have that quote saved for **{ref_msg.author.display_name}**!",
+                color=discord.Color.gold()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        if similar:
+            embed = discord.Embed(
+                description=(
+                    f"⚠️ That's almost the same as a quote already saved for "
+                    f"**{ref_msg.author.display_name}** ({similar[2]:.0%} similar):\n"
+                    f"「{similar[1][:200]}」"
                 ),
+                color=discord.Color.gold(),
             )
-            await db.commit()
+            await ctx.send(embed=embed)
+            return
+
+        quote_index.added(
+            ctx.guild.id, cursor.lastrowid, ref_msg.author.id, ref_msg.content, added_ts
+        )
 
         # 6. Logging
         log_guildname = ctx.guild.name.replace("\n", " ")
@@ -146,175 +170,250 @@ class Recorder(commands.Cog):
 
         # 7. Success Embed
         success_embed = discord.Embed(
-            description=f"**{ref_msg.content}**", 
+            description=f"**{ref_msg.content}**",
             color=discord.Color.green()
         )
         success_embed.set_author(
-            name=f"✅ Recorded", 
+            name=f"✅ Recorded",
             icon_url=ref_msg.author.display_avatar.url
         )
         success_embed.set_footer(text=f"Saved by {ctx.author.display_name}")
-        
+
         await ctx.send(embed=success_embed)
 
-    # --- COMMAND: 9up @user ---
-    @commands.command(name="9up")
-    @not_blacklisted()
-    async def get_quote(self, ctx, member: Optional[discord.Member] = None, *, flags: str = ""):
-        if not ctx.guild:
-            return
+    async def fetch_random_quote(
+        self, guild_id: int, user_id=None, contains=None, mode="uniform", channel_id=None
+    ):
+        """
+        Picks a random clean quote (optionally by one user, or containing a phrase)
+        and counts it as used. Returns the row or None.
+        mode: one of quote_index.MODES; channel_id: apply that channel's no-repeat window.
+        """
+        window = server_settings.get_val(guild_id, "quote_no_repeat") if channel_id else 0
+        if contains is None and (mode != "uniform" or window):
+            return await self._fetch_weighted_quote(guild_id, user_id, mode, channel_id, window)
+
+        query = """
+            SELECT id, content, timestamp, channel_id,
+                user_id, adder_user_id, added_timestamp, uses
+            FROM quotes
+            WHERE guild_id = ?
+            AND content NOT LIKE '%http%'
+        """
+        params = [guild_id]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if contains is not None:
+            escaped = contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query += " AND content LIKE ? ESCAPE '\\'"
+            params.append(f"%{escaped}%")
+        query += " ORDER BY RANDOM() LIMIT 1"
+
+        async with quote_db.connect(guild_id) as db:
+            async with db.execute(query, params) as cursor:
+                row = await cursor.fetchone()
+
+            if row:
+                # --- INCREMENT USAGE COUNT ---
+                await db.execute("UPDATE quotes SET uses = uses + 1 WHERE id = ?", (row[0],))
+                await db.commit()
+                quote_index.used(guild_id, row[0])
 
-        # Check if -f is included
-        show_footer = "-f" in flags
+        return row
 
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                if member:
-                    query = """
-                        SELECT id, content, timestamp, channel_id,
-                            user_id, adder_user_id, added_timestamp, uses
-                        FROM quotes
-                        WHERE guild_id = ?
-                        AND user_id = ?
-                        AND content NOT LIKE '%http%'
-                        ORDER BY RANDOM() LIMIT 1
-                    """
-                    params = (ctx.guild.id, member.id)
-                else:
-                    query = """
-                        SELECT id, content, timestamp, channel_id,
-                            user_id, adder_user_id, added_timestamp, uses
-                        FROM quotes
-                        WHERE guild_id = ?
-                        AND content NOT LIKE '%http%'
-                        ORDER BY RANDOM() LIMIT 1
-                    """
-                    params = (ctx.guild.id,)
+    async def _fetch_weighted_quote(self, guild_id, user_id, mode, channel_id, window):
+        index = await quote_index.get(guild_id)
+        recent = quote_index.recent_picks(channel_id, window) if window else ()
+        quote_id = index.sample(mode, user_id, exclude=recent)
+        if quote_id is None:
+            return None
 
-                async with db.execute(query, params) as cursor:
-                    row = await cursor.fetchone()
-
-                if not row:
-                    if member:
-                        await ctx.send(f"📜 No clean records for **{member.display_name}**.")
-                    else:
-                        await ctx.send("📜 No valid quotes found in this server.")
-                    return
-
-                # Unpack new columns
-                (
-                    quote_id,
-                    content,
-                    timestamp_str,
-                    channel_id,
-                    author_id,
-                    adder_id,
-                    added_ts,
-                    uses,
-                ) = row
+        async with quote_db.connect(guild_id) as db:
+            async with db.execute(
+                """
+                SELECT id, content, timestamp, channel_id,
+                    user_id, adder_user_id, added_timestamp, uses
+                FROM quotes WHERE id = ?
+                """,
+                (quote_id,),
+            ) as cursor:
+                row = await cursor.fetchone()
+
+            if row is None:
+                # Deleted behind the index's back (e.g. by another shard worker)
+                quote_index.invalidate(guild_id)
+                return None
+            await db.execute("UPDATE quotes SET uses = uses + 1 WHERE id = ?", (quote_id,))
+            await db.commit()
 
-                # --- INCREMENT USAGE COUNT ---
-                await db.execute("UPDATE quotes SET uses = uses + 1 WHERE id = ?", (quote_id,))
-                await db.commit()
+        quote_index.used(guild_id, quote_id)
+        if window:
+            recent.append(quote_id)
+        return row
+
+    async def send_quote(self, channel, guild, row, member=None, show_footer=False):
+        """Posts a quote row into `channel`, mimicking its author through a webhook."""
+        # Unpack new columns
+        (
+            quote_id,
+            content,
+            timestamp_str,
+            channel_id,
+            author_id,
+            adder_id,
+            added_ts,
+            uses,
+        ) = row
+
+        # Resolve member if we are in "Random" mode
+        if member is None:
+            member = await member_profiles.resolve(guild, author_id)
+            if not member:
+                # Remember departed users too, so they don't cost a REST call every time
+                member = member_profiles.put(
+                    guild.id,
+                    MemberProfile(
+                        author_id,
+                        "Unknown User",
+                        guild.icon.url if guild.icon else None,
+                        discord.Color.default(),
+                    ),
+                )
 
-            # Resolve member if we are in "Random" mode
-            if member is None:
-                member = ctx.guild.get_member(author_id)
-                if not member:
-                    try:
-                        member = await ctx.guild.fetch_member(author_id)
-                    except discord.NotFound:
-
-                        class DummyMember:
-                            display_name = "Unknown User"
-                            display_avatar = ctx.guild.icon or discord.Embed.Empty
-                            color = discord.Color.default()
-                            bot = False
-
-                        member = DummyMember()
-
-            # --- RUNTIME BOT CHECK ---
-            if member.bot:
-                await ctx.send("🤖 Cannot add bot message.")
-                return
+        # --- RUNTIME BOT CHECK ---
+        if member.bot:
+            await channel.send("🤖 Cannot add bot message.")
+            return
 
-            mimic_name = f"🗣️ {member.display_name}"
+        mimic_name = f"🗣️ {member.display_name}"
 
-            # --- FOOTER EMBED ---
-            footer_embed = None
+        # --- FOOTER EMBED ---
+        footer_embed = None
 
-            if show_footer:
-                current_uses = uses + 1
+        if show_footer:
+            current_uses = uses + 1
 
-                adder_text = f"<@{adder_id}>" if adder_id else "System"
-                added_date_text = f"<t:{added_ts}:R>" if added_ts else "Unknown date"
+            adder_text = f"<@{adder_id}>" if adder_id else "System"
+            added_date_text = f"<t:{added_ts}:R>" if added_ts else "Unknown date"
 
-                footer_embed = discord.Embed(color=member.color)
-                # Row 1: Original Context
-                footer_embed.add_field(
-                    name="📜 Original", value=f"<#{channel_id}>\n<t:{timestamp_str}:f>", inline=True
-                )
-                # Row 2: Adder Info
-                footer_embed.add_field(
-                    name="✍️ Added By", value=f"{adder_text}\n{added_date_text}", inline=True
-                )
-                # Row 3: Stats
-                footer_embed.add_field(
-                    name="📊 Popularity", value=f"Triggered **{current_uses}** times", inline=False
+            footer_embed = discord.Embed(color=member.color)
+            # Row 1: Original Context
+            footer_embed.add_field(
+                name="📜 Original", value=f"<#{channel_id}>\n<t:{timestamp_str}:f>", inline=True
+            )
+            # Row 2: Adder Info
+            footer_embed.add_field(
+                name="✍️ Added By", value=f"{adder_text}\n{added_date_text}", inline=True
+            )
+            # Row 3: Stats
+            footer_embed.add_field(
+                name="📊 Popularity", value=f"Triggered **{current_uses}** times", inline=False
+            )
+
+        # --- WEBHOOK ---
+        perms = channel.permissions_for(guild.me)
+        if perms.manage_webhooks:
+            is_thread = isinstance(channel, discord.Thread)
+            dest_channel = channel.parent if is_thread else channel
+            try:
+                webhook = await get_webhook(dest_channel, "MimicBot")
+
+                await send_webhook(
+                    webhook,
+                    content=content,
+                    username=mimic_name,
+                    avatar_url=member.display_avatar.url,
+                    thread=channel if is_thread else discord.utils.MISSING,
+                    allowed_mentions=discord.AllowedMentions.none(),
+                    embed=footer_embed,
                 )
+                return
+            except discord.NotFound:
+                # Cached webhook was deleted; it will be recreated next time
+                forget_webhook(dest_channel.id, "MimicBot")
+                logger.warning("Webhook was deleted. Falling back to Embed.")
+            except Exception as e:
+                logger.warning(f"Webhook failed: {e}. Falling back to Embed.")
+
+        # --- Fallback to Embed ---
+        main_embed = discord.Embed(description=content, color=member.color)
+        main_embed.set_author(
+            name=mimic_name,
+            icon_url=member.display_avatar.url
+            if hasattr(member.display_avatar, "url")
+            else member.display_avatar,
+        )
+
+        # Merge footer fields into main embed if needed
+        if show_footer and footer_embed:
+            for field in footer_embed.fields:
+                main_embed.add_field(name=field.name, value=field.value, inline=field.inline)
+
+        await channel.send(embed=main_embed, allowed_mentions=discord.AllowedMentions.none())
+
+    # --- COMMAND: 9up @user ---
+    @commands.command(name="9up")
+    @not_blacklisted()
+    @rate_limited()
+    async def get_quote(self, ctx, member: Optional[CachedMember] = None, *, flags: str = ""):
+        if not ctx.guild:
+            return
 
-            # --- WEBHOOK ---
-            perms = ctx.channel.permissions_for(ctx.guild.me)
-            if perms.manage_webhooks:
-                try:
-                    if isinstance(ctx.channel, discord.Thread):
-                        dest_channel = ctx.channel.parent
-                        is_thread = True
-                    else:
-                        dest_channel = ctx.channel
-                        is_thread = False
-
-                    webhooks = await dest_channel.webhooks()
-                    webhook = discord.utils.get(webhooks, name="MimicBot")
-                    if not webhook:
-                        webhook = await dest_channel.create_webhook(name="MimicBot")
-
-                    await webhook.send(
-                        content=content,
-                        username=mimic_name,
-                        avatar_url=member.display_avatar.url,
-                        thread=ctx.channel if is_thread else discord.utils.MISSING,
-                        allowed_mentions=discord.AllowedMentions.none(),
-                        embed=footer_embed,
-                    )
-                    return
-                except Exception as e:
-                    logger.warning(f"Webhook failed: {e}. Falling back to Embed.")
-
-            # --- Fallback to Embed ---
-            main_embed = discord.Embed(description=content, color=member.color)
-            main_embed.set_author(
-                name=mimic_name,
-                icon_url=member.display_avatar.url
-                if hasattr(member.display_avatar, "url")
-                else member.display_avatar,
+        # Check if -f is included; a mode name overrides the server's default mode
+        words = flags.split()
+        show_footer = "-f" in words
+        mode = next(
+            (w for w in words if w in MODES), server_settings.get_val(ctx.guild.id, "quote_mode")
+        )
+
+        try:
+            row = await self.fetch_random_quote(
+                ctx.guild.id, member.id if member else None, mode=mode, channel_id=ctx.channel.id
             )
 
-            # Merge footer fields into main embed if needed
-            if show_footer and footer_embed:
-                for field in footer_embed.fields:
-                    main_embed.add_field(name=field.name, value=field.value, inline=field.inline)
+            if not row:
+                if member:
+                    await ctx.send(f"📜 No clean records for **{member.display_name}**.")
+                else:
+                    await ctx.send("📜 No valid quotes found in this server.")
+                return
 
-            await ctx.send(embed=main_embed, allowed_mentions=discord.AllowedMentions.none())
+            await self.send_quote(ctx.channel, ctx.guild, row, member, show_footer)
 
         except Exception as e:
             logger.error(f"Database error during fetch: {e}")
             await ctx.send("❌ An internal database error occurred.")
 
+    # --- COMMAND: !9upmode <mode> [no_repeat] ---
+    @commands.command(name="9upmode")
+    @is_admin()
+    async def set_quote_mode(self, ctx, mode: str, no_repeat: int = 0):
+        """
+        Sets how 9up picks quotes in this server.
+        uniform: any quote equally • popular: favours often-used quotes
+        rare: favours rarely-used quotes • recent: favours newly saved quotes
+        no_repeat: a channel won't repeat a quote until this many others were shown.
+        Usage: !9upmode popular 20
+        """
+        if not ctx.guild:
+            return
+
+        mode = mode.lower()
+        if mode not in MODES:
+            await ctx.send(f"❌ Mode must be one of: {', '.join(MODES)}.")
+            return
+        no_repeat = max(0, min(no_repeat, 500))
+
+        await server_settings.set_val(ctx.guild.id, "quote_mode", mode)
+        await server_settings.set_val(ctx.guild.id, "quote_no_repeat", no_repeat)
+        repeat_text = f", no repeats within **{no_repeat}** quotes" if no_repeat else ""
+        await ctx.send(f"🎲 9up now picks **{mode}**{repeat_text}.")
+
     # --- COMMAND: !9uplist @user ---
     @commands.command(name="9uplist")
     @not_blacklisted()
-    async def list_quotes(self, ctx, member: discord.Member):
+    async def list_quotes(self, ctx, member: CachedMember):
         if not ctx.guild:
             return
 
@@ -323,7 +422,7 @@ class Recorder(commands.Cog):
             await ctx.send("🤖 Bots do not have quote records.")
             return
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with quote_db.connect(ctx.guild.id) as db:
             # 2. Updated Query: Added 'uses' column
             query = """
                 SELECT content, added_timestamp, adder_user_id, uses
@@ -345,7 +444,7 @@ class Recorder(commands.Cog):
     # --- COMMAND: !9uptop ---
     @commands.command(name="9uptop")
     @not_blacklisted()
-    async def top_quotes(self, ctx, member: Optional[discord.Member] = None):
+    async def top_quotes(self, ctx, member: Optional[CachedMember] = None):
         """
         Shows the top 10 most used quotes.
         Usage: !9uptop (Global) OR !9uptop @User (User specific)
@@ -354,7 +453,7 @@ class Recorder(commands.Cog):
             return
 
         async with ctx.typing():
-            async with aiosqlite.connect(self.db_path) as db:
+            async with quote_db.connect(ctx.guild.id) as db:
                 if member:
                     # --- Scenario A: Specific User Ranking ---
                     query = """
@@ -402,7 +501,7 @@ class Recorder(commands.Cog):
                 display_content = content.replace("\n", " ")
                 if len(display_content) > 40:
                     display_content = display_content[:37] + "..."
-                
+
                 # --- RANK EMOJI ---
                 rank = medals[index] if index < 3 else f"`#{index + 1}`"
 
@@ -418,13 +517,190 @@ class Recorder(commands.Cog):
             embed.description = leaderboard_text
             await ctx.send(embed=embed)
 
+    # --- COMMAND: !9upimport [#channel] [emoji] ---
+    async def _iter_import_history(self, channel, emoji, after_id):
+        """
+        Streams candidate messages oldest first without buffering the history.
+        Pins mode rescans all pins (dedup makes that idempotent); reaction mode
+        resumes after the last checkpointed message.
+        """
+        if emoji is None:
+            async for msg in channel.pins(limit=None, oldest_first=True):
+                yield msg
+        else:
+            after = discord.Object(after_id) if after_id else None
+            async for msg in channel.history(limit=None, after=after, oldest_first=True):
+                yield msg
+
+    @commands.command(name="9upimport")
+    @is_admin()
+    @commands.max_concurrency(1, per=commands.BucketType.guild)
+    async def import_quotes(
+        self, ctx, channel: Optional[discord.TextChannel] = None, emoji: Optional[str] = None
+    ):
+        """
+        Imports pinned messages (or messages carrying a reaction) as quotes.
+        Usage: !9upimport [#channel] [emoji]
+        """
+        if not ctx.guild:
+            return
+
+        channel = channel or ctx.channel
+        source = f"reaction:{emoji}" if emoji else "pins"
+        what = f"messages reacted with {emoji}" if emoji else "pinned messages"
+        status = await ctx.send(f"📥 Importing {what} from {channel.mention}...")
+
+        scanned = imported = skipped = 0
+        last_progress = time.monotonic()
+
+        async def report(prefix="📥 Importing"):
+            await status.edit(
+                content=f"{prefix} {what} from {channel.mention}\n"
+                f"Scanned **{scanned}** • Imported **{imported}** • Skipped **{skipped}**"
+            )
+
+        async with quote_db.connect(ctx.guild.id) as db:
+            async with db.execute(
+                """
+                SELECT last_message_id FROM import_progress
+                WHERE guild_id = ? AND channel_id = ? AND source = ?
+                """,
+                (ctx.guild.id, channel.id, source),
+            ) as cursor:
+                row = await cursor.fetchone()
+        after_id = row[0] if row and emoji else None
+
+        batch = []
+        last_id = after_id
+
+        async def flush():
+            nonlocal imported, skipped
+            # Only hold the guild's connection for the batch, not the whole history scan
+            async with quote_db.connect(ctx.guild.id) as db:
+                # rowcount, not total_changes: trigger writes (rollups) aren't quotes
+                cursor = await db.executemany(INSERT_QUOTE_IF_NEW, batch)
+                inserted = cursor.rowcount
+                # Checkpoint in the same transaction as the rows it covers
+                await db.execute(
+                    """
+                    INSERT INTO import_progress
+                    (guild_id, channel_id, source, last_message_id, imported)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (guild_id, channel_id, source) DO UPDATE SET
+                        last_message_id = excluded.last_message_id,
+                        imported = imported + excluded.imported
+                    """,
+                    (ctx.guild.id, channel.id, source, last_id, inserted),
+                )
+                await db.commit()
+            if inserted:
+                quote_index.invalidate(ctx.guild.id)
+            imported += inserted
+            skipped += len(batch) - inserted
+            batch.clear()
+
+        now_ts = int(discord.utils.utcnow().timestamp())
+        async for msg in self._iter_import_history(channel, emoji, after_id):
+            scanned += 1
+            last_id = msg.id
+
+            if emoji and not any(str(r.emoji) == emoji for r in msg.reactions):
+                continue
+            if validate_quote_message(msg):
+                skipped += 1
+                continue
+
+            batch.append(
+                {
+                    "guild_id": ctx.guild.id,
+                    "user_id": msg.author.id,
+                    "content": msg.content,
+                    "timestamp": str(int(msg.created_at.timestamp())),
+                    "channel_id": channel.id,
+                    "adder_user_id": ctx.author.id,
+                    "added_timestamp": now_ts,
+                    "uses": 0,
+                }
+            )
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+
+            if time.monotonic() - last_progress > IMPORT_PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                await report()
+
+        if batch or last_id != after_id:
+            await flush()
+
+        logger.info(
+            f"📥 Imported {imported} quotes from #{channel.name} ({source}), "
+            f"scanned {scanned}, skipped {skipped}"
+        )
+        await report("✅ Finished importing")
+
+    @import_quotes.error
+    async def import_quotes_error(self, ctx, error):
+        if isinstance(error, commands.MaxConcurrencyReached):
+            await ctx.send("⏳ An import is already running in this server.")
+        elif isinstance(error, commands.BadArgument):
+            await ctx.send(f"⚠️ Usage: `{ctx.prefix}9upimport [#channel] [emoji]`")
+        elif isinstance(error, commands.CommandInvokeError):
+            logger.error(f"Error in 9upimport: {error.original}", exc_info=error.original)
+            await ctx.send("❌ Import stopped by an error. Run it again to resume.")
+
+    # --- COMMAND: !9upexport [ndjson|csv] ---
+    @commands.command(name="9upexport", hidden=True)
+    @is_owner()
+    async def export_quotes(self, ctx, fmt: str = "ndjson"):
+        """
+        Exports this server's quotes as a gzip-compressed NDJSON or CSV file.
+        Usage: !9upexport [ndjson|csv]
+        """
+        if not ctx.guild:
+            return
+
+        fmt = fmt.lower()
+        if fmt not in backup.EXPORT_FORMATS:
+            await ctx.send(f"❌ Unknown format. Use one of: `{', '.join(backup.EXPORT_FORMATS)}`")
+            return
+
+        filename = f"quotes-{ctx.guild.id}-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}.gz"
+        out_path = os.path.join(backup.BACKUP_DIR, filename)
+        os.makedirs(backup.BACKUP_DIR, exist_ok=True)
+
+        async with ctx.typing():
+            # Snapshot + export run in a thread; the backup API copies in small steps,
+            # so quote commands keep working while this runs.
+            snap_path = await asyncio.to_thread(
+                backup.snapshot, quote_db.path_for(ctx.guild.id), out_path + ".snapshot.db"
+            )
+            try:
+                count = await asyncio.to_thread(
+                    backup.export_quotes, snap_path, ctx.guild.id, out_path, fmt
+                )
+            finally:
+                os.remove(snap_path)
+
+        size = os.path.getsize(out_path)
+        if size <= ctx.guild.filesize_limit:
+            await ctx.send(
+                f"📤 Exported **{count}** quotes ({size / 1024:.1f} KB).",
+                file=discord.File(out_path, filename=filename),
+            )
+            os.remove(out_path)
+        else:
+            await ctx.send(
+                f"📤 Exported **{count}** quotes, but the file is too large to upload "
+                f"({size / 1024 / 1024:.1f} MB). Saved on the server as `{out_path}`."
+            )
+
     # --- COMMAND: !9updelete @user ---
     @commands.command(name="9updel")
     @not_blacklisted()
     async def delete_quote_menu(self, ctx, member: discord.Member):
         if not ctx.guild: return
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with quote_db.connect(ctx.guild.id) as db:
             # ⚠️ CHANGED QUERY: Added 'id' at the end to identify rows for deletion
             query = """
                 SELECT content, added_timestamp, adder_user_id, uses, id
@@ -440,16 +716,84 @@ class Recorder(commands.Cog):
             return
 
         # Create View
-        view = DeleteQuoteView(rows, f"Delete Quote: {member.display_name}", member, ctx, self.db_path)
+        view = DeleteQuoteView(rows, f"Delete Quote: {member.display_name}", member, ctx)
         embed = view.create_embed()
-        
+
         # Send message and link it to the view (so view can edit it later)
         msg = await ctx.send(embed=embed, view=view)
         view.message = msg
 
+    # --- COMMAND: !9updupes [merge] ---
+    @commands.command(name="9updupes")
+    @is_admin()
+    @commands.max_concurrency(1, per=commands.BucketType.guild)
+    async def find_duplicates(self, ctx, action: str = ""):
+        """
+        Lists clusters of near-duplicate quotes by the same person.
+        `merge` keeps the oldest quote of each cluster, adds the others' uses to it,
+        and deletes the others.
+        Usage: !9updupes [merge]
+        """
+        if not ctx.guild:
+            return
+
+        merge = action.lower() == "merge"
+        async with ctx.typing():
+            # Index everything saved without a signature, a batch per connection hold
+            while True:
+                async with quote_db.connect(ctx.guild.id) as db:
+                    indexed = await near_dup.index_pending(db, ctx.guild.id)
+                    await db.commit()
+                if not indexed:
+                    break
+
+            async with quote_db.connect(ctx.guild.id) as db:
+                clusters = await near_dup.scan_guild(db, ctx.guild.id)
+                if merge and clusters:
+                    for keep, *dupes in clusters:
+                        moved = sum(d[3] or 0 for d in dupes)
+                        await db.execute(
+                            "UPDATE quotes SET uses = uses + ? WHERE id = ?", (moved, keep[0])
+                        )
+                        await db.execute(UNCOUNT_WEEK_USES, (moved, ctx.guild.id))
+                        await db.executemany(
+                            "DELETE FROM quotes WHERE id = ?", [(d[0],) for d in dupes]
+                        )
+                    await db.commit()
+
+        if not clusters:
+            await ctx.send("✨ No near-duplicate quotes found.")
+            return
+
+        removed = sum(len(c) - 1 for c in clusters)
+        if merge:
+            quote_index.invalidate(ctx.guild.id)
+            logger.info(f"🧹 Merged {removed} near-duplicate quotes in guild {ctx.guild.id}")
+
+        lines = []
+        for cluster in clusters[:10]:
+            keep = cluster[0]
+            preview = keep[2].replace("\n", " ")
+            if len(preview) > 50:
+                preview = preview[:47] + "..."
+            lines.append(f"• <@{keep[1]}> 「{preview}」 ×{len(cluster)}")
+        if len(clusters) > 10:
+            lines.append(f"...and {len(clusters) - 10} more clusters")
+
+        title = (
+            f"🧹 Merged {removed} duplicates" if merge
+            else f"🔍 {len(clusters)} duplicate clusters ({removed} extra quotes)"
+        )
+        embed = discord.Embed(title=title, description="\n".join(lines), color=discord.Color.gold())
+        if not merge:
+            embed.set_footer(text=f"Run {ctx.prefix}9updupes merge to merge them.")
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
     # --- ERROR HANDLER ---
     @get_quote.error
     async def get_quote_error(self, ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            return  # blacklist / rate limit: answered (or not) by the global handler
         if isinstance(error, commands.MissingRequiredArgument):
             await ctx.send(f"⚠️ Please tag a user. Usage: `{ctx.prefix}9up @User`")
         elif isinstance(error, commands.MemberNotFound):
@@ -0,0 +1,240 @@
+import logging
+import time
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+from core.aho_corasick import AhoCorasick
+from core.blacklist import blacklist_store
+from core.db import quote_db
+from core.iam import is_admin, not_blacklisted
+from core.member_cache import CachedMember
+from core.server_settings import server_settings
+
+logger = logging.getLogger("discord.triggers")
+
+# Replies reuse Recorder's quote selection and webhook mimic path
+DEPENDS_ON = ("cogs.features.quotes_record",)
+
+MAX_PHRASE_LENGTH = 100
+MAX_TRIGGERS_PER_GUILD = 500
+# Prune the per-channel cooldown table once it grows past this many channels
+MAX_COOLDOWN_ENTRIES = 10000
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and (char.isalnum() or char == "_")
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    """ASCII-word phrases must not match inside a longer word ("cat" in "category").
+    CJK and other scripts have no spaces between words, so they match anywhere."""
+    if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+        return False
+    if _is_word_char(text[end - 1]) and end < len(text) and _is_word_char(text[end]):
+        return False
+    return True
+
+
+class TriggerEngine:
+    """One guild's compiled triggers: an Aho-Corasick automaton over the phrases."""
+
+    def __init__(self, rows):
+        self.targets = {phrase.lower(): user_id for phrase, user_id in rows}
+        self.automaton = AhoCorasick(self.targets)
+
+    def add(self, phrase: str, user_id):
+        self.targets[phrase.lower()] = user_id
+        self.automaton.add(phrase)
+
+    def remove(self, phrase: str):
+        self.targets.pop(phrase.lower(), None)
+        self.automaton.remove(phrase)
+
+    def match(self, text: str):
+        """Returns (phrase, user_id) of the first trigger found in `text`, or None."""
+        lowered = text.lower()
+        for start, end, phrase in self.automaton.iter_matches(text):
+            if _on_word_boundary(lowered, start, end):
+                return phrase, self.targets[phrase]
+        return None
+
+
+class Triggers(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.engines = {}  # guild_id -> TriggerEngine, or None when the guild has no triggers
+        self.last_fired = {}  # channel_id -> monotonic time of the last auto-reply
+        self.fired = 0
+
+    async def _get_engine(self, guild_id: int):
+        if guild_id in self.engines:
+            return self.engines[guild_id]
+
+        # Compiled lazily on the first message seen from each guild
+        async with quote_db.connect(guild_id) as db:
+            async with db.execute(
+                "SELECT phrase, user_id FROM triggers WHERE guild_id = ?", (guild_id,)
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        engine = TriggerEngine(rows) if rows else None
+        self.engines[guild_id] = engine
+        return engine
+
+    def _on_cooldown(self, guild_id: int, channel_id: int) -> bool:
+        cooldown = server_settings.get_val(guild_id, "trigger_cooldown")
+        last = self.last_fired.get(channel_id)
+        return last is not None and time.monotonic() - last < cooldown
+
+    def _mark_fired(self, channel_id: int):
+        now = time.monotonic()
+        self.last_fired[channel_id] = now
+        if len(self.last_fired) > MAX_COOLDOWN_ENTRIES:
+            # Anything older than an hour can't be on cooldown any more
+            self.last_fired = {c: t for c, t in self.last_fired.items() if now - t < 3600}
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if not message.guild or message.author.bot or not message.content:
+            return
+
+        engine = await self._get_engine(message.guild.id)
+        if engine is None:
+            return
+
+        # Commands are not chatter
+        if message.content.startswith(server_settings.get_prefix(message.guild.id)):
+            return
+        if self._on_cooldown(message.guild.id, message.channel.id):
+            return
+
+        hit = engine.match(message.content)
+        if hit is None:
+            return
+        if blacklist_store.is_blocked(message.guild.id, message.author.id, "9up"):
+            return
+
+        phrase, user_id = hit
+        self._mark_fired(message.channel.id)
+
+        recorder = self.bot.get_cog("Recorder")
+        if recorder is None:
+            return
+
+        try:
+            # Quotes by the trigger's member, or else quotes that mention the phrase
+            row = await recorder.fetch_random_quote(
+                message.guild.id, user_id, None if user_id else phrase
+            )
+            if row:
+                self.fired += 1
+                await recorder.send_quote(message.channel, message.guild, row)
+        except Exception as e:
+            logger.error(f"Trigger reply failed for '{phrase}': {e}")
+
+    # --- COMMAND: !9uptrigger "phrase" [@user] ---
+    @commands.command(name="9uptrigger")
+    @is_admin()
+    async def add_trigger(self, ctx, phrase: str, member: Optional[CachedMember] = None):
+        """
+        Replies with a saved quote whenever someone says the phrase.
+        Usage: !9uptrigger "good morning" [@User]
+        """
+        if not ctx.guild:
+            return
+
+        phrase = phrase.strip()
+        if not phrase or len(phrase) > MAX_PHRASE_LENGTH:
+            await ctx.send(f"❌ Phrase must be 1-{MAX_PHRASE_LENGTH} characters.")
+            return
+
+        engine = await self._get_engine(ctx.guild.id)
+        if engine is not None and len(engine.targets) >= MAX_TRIGGERS_PER_GUILD:
+            await ctx.send(f"❌ This server already has {MAX_TRIGGERS_PER_GUILD} triggers.")
+            return
+
+        user_id = member.id if member else None
+        async with quote_db.connect(ctx.guild.id) as db:
+            await db.execute(
+                """
+                INSERT INTO triggers (guild_id, phrase, user_id, adder_user_id)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (guild_id, phrase) DO UPDATE SET
+                    user_id = excluded.user_id, adder_user_id = excluded.adder_user_id
+                """,
+                (ctx.guild.id, phrase.lower(), user_id, ctx.author.id),
+            )
+            await db.commit()
+
+        # Only this guild's automaton is touched
+        if engine is None:
+            self.engines[ctx.guild.id] = TriggerEngine([(phrase, user_id)])
+        else:
+            engine.add(phrase, user_id)
+
+        target = f"quotes by **{member.display_name}**" if member else "quotes mentioning it"
+        await ctx.send(
+            embed=discord.Embed(
+                description=f"✅ Saying `{phrase}` will now summon {target}.",
+                color=discord.Color.green(),
+            )
+        )
+
+    # --- COMMAND: !9upuntrigger "phrase" ---
+    @commands.command(name="9upuntrigger")
+    @is_admin()
+    async def remove_trigger(self, ctx, *, phrase: str):
+        if not ctx.guild:
+            return
+
+        phrase = phrase.strip().strip('"').lower()
+        async with quote_db.connect(ctx.guild.id) as db:
+            cursor = await db.execute(
+                "DELETE FROM triggers WHERE guild_id = ? AND phrase = ?", (ctx.guild.id, phrase)
+            )
+            await db.commit()
+
+        if cursor.rowcount == 0:
+            await ctx.send(f"⚠️ No trigger `{phrase}` in this server.")
+            return
+
+        engine = self.engines.get(ctx.guild.id)
+        if engine is not None:
+            engine.remove(phrase)
+            if not engine.targets:
+                self.engines[ctx.guild.id] = None
+
+        await ctx.send(f"🗑️ Removed trigger `{phrase}`.")
+
+    # --- COMMAND: !9uptriggers ---
+    @commands.command(name="9uptriggers")
+    @not_blacklisted()
+    async def list_triggers(self, ctx):
+        if not ctx.guild:
+            return
+
+        engine = await self._get_engine(ctx.guild.id)
+        if engine is None:
+            await ctx.send("📜 No triggers set up in this server.")
+            return
+
+        lines = [
+            f"• `{phrase}` → " + (f"<@{user_id}>" if user_id else "matching quotes")
+            for phrase, user_id in sorted(engine.targets.items())
+        ]
+        desc = "\n".join(lines)
+        if len(desc) > 4000:
+            desc = desc[:3990] + "\n..."
+
+        await ctx.send(
+            embed=discord.Embed(
+                title=f"🔔 Triggers ({len(lines)})", description=desc, color=discord.Color.blue()
+            ),
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
+
+
+async def setup(bot):
+    await bot.add_cog(Triggers(bot))
@@ -3,6 +3,8 @@ import logging
 import discord
 from discord.ext import commands
 
+from core.iam import RateLimited
+
 logger = logging.getLogger("bot.errorhandler")
 
 
@@ -12,15 +14,25 @@ class ErrorHandler(commands.Cog):
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
-        # IGNORE LOCAL HANDLERS
-        if hasattr(ctx.command, "on_error"):
-            return
+        # IGNORE LOCAL HANDLERS (they leave failed checks to us, so rate limits read the same)
         error = getattr(error, "original", error)
+        if hasattr(ctx.command, "on_error") and not isinstance(error, commands.CheckFailure):
+            return
 
         # IGNORE "COMMAND NOT FOUND"
         if isinstance(error, commands.CommandNotFound):
             return
 
+        # RATE LIMITED: say so once per burst, then shed silently (replying costs REST calls)
+        if isinstance(error, RateLimited):
+            if error.first:
+                where = {"user": "you", "channel": "this channel", "guild": "this server"}
+                await ctx.send(
+                    f"🚦 Slow down, too many `{ctx.command.name}` from {where[error.scope]}. "
+                    f"Try again in **{error.retry_after:.1f}s**."
+                )
+            return
+
         # SILENCE STEALTH CHECK
         # If a user is not owner, or is blacklisted, we do NOTHING.
         if isinstance(error, (commands.CheckFailure, commands.NotOwner, commands.MissingRole)):
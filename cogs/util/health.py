@@ -1,34 +1,245 @@
+import asyncio
+import io
 import os
 import platform
+import re
 import time
+import tracemalloc
+from array import array
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 import discord
-import psutil
-from discord.ext import commands
+from discord.ext import commands, tasks
 
+from core.db import quote_db
 from core.iam import is_owner
+from core.memory_report import diff_sites, live_views, render, take_snapshot, top_sites
+from core.rate_limit import rate_limits
+from core.rest import rest
+
+# key, label, unit
+METRICS = (
+    ("rss", "RAM", "MB"),
+    ("cpu", "CPU", "%"),
+    ("latency", "Gateway", "ms"),
+    ("loop_lag", "Loop lag", "ms"),
+    ("db_held", "DB held", ""),
+    ("db_idle", "DB idle", ""),
+    ("commands", "Commands", "/min"),
+    ("disk", "Disk", "%"),
+)
+SAMPLE_SECONDS = 60
+# 24h at one sample a minute
+HISTORY_SIZE = 24 * 60
+LAG_PROBE_SECONDS = 0.5
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_WIDTH = 30
+WINDOW_PATTERN = re.compile(r"^(\d+)([mh])$")
+# tracemalloc snapshots kept for !memdiff; each one holds every traced block
+MAX_SNAPSHOTS = 4
+
+
+class HealthHistory:
+    """
+    Fixed-size ring buffer of samples, one preallocated array per metric: memory stays
+    the same however long the bot runs, and the oldest sample is overwritten first.
+    """
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self.times = array("d", [0.0] * size)
+        self.columns = {key: array("d", [0.0] * size) for key, _, _ in METRICS}
+        self.next = 0
+        self.count = 0
+
+    def append(self, timestamp: float, sample: dict):
+        self.times[self.next] = timestamp
+        for key, column in self.columns.items():
+            column[self.next] = sample.get(key, 0.0)
+        self.next = (self.next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def _order(self):
+        start = (self.next - self.count) % self.size
+        return [(start + i) % self.size for i in range(self.count)]
+
+    def latest(self) -> dict:
+        if not self.count:
+            return {}
+        i = (self.next - 1) % self.size
+        return {key: column[i] for key, column in self.columns.items()}
+
+    def window(self, seconds: float, now: float) -> dict:
+        """Chronological values per metric for samples newer than `seconds`."""
+        slots = [i for i in self._order() if self.times[i] >= now - seconds]
+        return {key: [column[i] for i in slots] for key, column in self.columns.items()}
+
+
+def sparkline(values: list, width: int = SPARK_WIDTH) -> str:
+    if not values:
+        return ""
+    # Average into at most `width` buckets so any window fits one line
+    step = max(1, -(-len(values) // width))
+    points = [
+        sum(values[i : i + step]) / len(values[i : i + step]) for i in range(0, len(values), step)
+    ]
+    low, high = min(points), max(points)
+    span = (high - low) or 1
+    top = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[round((p - low) / span * top)] for p in points)
 
 
 class Health(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.start_time = time.time()
+        self._shard_samples = {}  # shard_id -> (gateway sequence, monotonic time)
+        self.shard_rates = {}  # shard_id -> events/s over the last sample window
+        self.history = HealthHistory()
+        self._process = None
+        self._commands = 0  # since the last sample
+        self._max_lag = 0.0  # worst event loop lag since the last sample
+        self._last_probe = None
+        self.snapshots = OrderedDict()  # number -> tracemalloc snapshot
+        self._snapshot_seq = 0
+
+    async def cog_load(self):
+        self.sample_shards.start()
+        self.probe_loop_lag.start()
+        self.record_sample.start()
+
+    async def cog_unload(self):
+        self.sample_shards.cancel()
+        self.probe_loop_lag.cancel()
+        self.record_sample.cancel()
+        # Tracing slows every allocation; never leave it running past the cog
+        self.snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx):
+        self._commands += 1
+
+    @tasks.loop(seconds=LAG_PROBE_SECONDS)
+    async def probe_loop_lag(self):
+        # How late this wakeup is: time the loop spent busy with something else
+        now = time.monotonic()
+        if self._last_probe is not None:
+            lag = max(0.0, now - self._last_probe - LAG_PROBE_SECONDS)
+            self._max_lag = max(self._max_lag, lag)
+        self._last_probe = now
+
+    @tasks.loop(seconds=SAMPLE_SECONDS)
+    async def record_sample(self):
+        # Imported lazily: psutil is only needed once the bot is up
+        import psutil
+
+        if self._process is None:
+            self._process = psutil.Process(os.getpid())
+            # cpu_percent() measures since its previous call; the first one is always 0.0
+            psutil.cpu_percent(interval=None)
+            return
+
+        db_held, db_idle = quote_db.connection_counts()
+        sample = {
+            "rss": self._process.memory_info().rss / 1024 / 1024,
+            "cpu": psutil.cpu_percent(interval=None),
+            "latency": self.bot.latency * 1000 if self.bot.latency == self.bot.latency else 0,
+            "loop_lag": self._max_lag * 1000,
+            "db_held": db_held,
+            "db_idle": db_idle,
+            "commands": self._commands * 60 / SAMPLE_SECONDS,
+            "disk": psutil.disk_usage("/").percent,
+        }
+        self._commands = 0
+        self._max_lag = 0.0
+        self.history.append(time.time(), sample)
+
+    @record_sample.before_loop
+    async def before_record_sample(self):
+        await self.bot.wait_until_ready()
+
+    def _trend_lines(self, seconds: float) -> str:
+        values = self.history.window(seconds, time.time())
+        lines = []
+        for key, label, unit in METRICS:
+            series = values[key]
+            if not series:
+                continue
+            low, high = min(series), max(series)
+            avg = sum(series) / len(series)
+            lines.append(
+                f"{label:<9}{sparkline(series):<{SPARK_WIDTH}} {low:.0f}/{avg:.0f}/{high:.0f}{unit}"
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _shard_sequence(shard):
+        # The gateway sequence number increases by one per dispatched event, so its
+        # delta between samples is the shard's event count. discord.py has no public
+        # accessor for it; if these internals move, rates just show as unknown.
+        ws = getattr(getattr(shard, "_parent", None), "ws", None)
+        sequence = getattr(ws, "sequence", None)
+        return sequence if isinstance(sequence, int) else None
+
+    @tasks.loop(seconds=30)
+    async def sample_shards(self):
+        now = time.monotonic()
+        for shard_id, shard in self.bot.shards.items():
+            seq = self._shard_sequence(shard)
+            if seq is None:
+                continue
+            prev = self._shard_samples.get(shard_id)
+            # A new session restarts the sequence; skip that window
+            if prev and seq >= prev[0] and now > prev[1]:
+                self.shard_rates[shard_id] = (seq - prev[0]) / (now - prev[1])
+            self._shard_samples[shard_id] = (seq, now)
+
+    def _shard_lines(self):
+        guild_counts = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        lines = []
+        for shard_id, latency in sorted(self.bot.latencies):
+            rate = self.shard_rates.get(shard_id)
+            rate_text = f"{rate:.1f} ev/s" if rate is not None else "-- ev/s"
+            lines.append(
+                f"`#{shard_id}` {round(latency * 1000)}ms • {rate_text} • "
+                f"{guild_counts.get(shard_id, 0)} guilds"
+            )
+
+        if len(lines) > 15:
+            lines = lines[:15] + [f"... and {len(lines) - 15} more"]
+        return "\n".join(lines) or "No shards connected."
 
     def _get_uptime(self):
         current_time = time.time()
         uptime_seconds = int(current_time - self.start_time)
         return str(timedelta(seconds=uptime_seconds))
 
-    # --- COMMAND: !reload ---
+    # --- COMMAND: !health [window] ---
     @commands.command(hidden=True)
     @is_owner()
-    async def health(self, ctx):
-        """Displays system status."""
+    async def health(self, ctx, window: str = "1h"):
+        """Displays system status, with trends over a window (e.g. 30m, 6h, 24h)."""
+        match = WINDOW_PATTERN.match(window.lower())
+        if not match:
+            return await ctx.send("❌ Window must look like `30m`, `6h` or `24h`.")
+        seconds = int(match[1]) * (3600 if match[2] == "h" else 60)
+
+        # Imported lazily: psutil is only needed by this owner command
+        import psutil
+
         async with ctx.typing():
             process = psutil.Process(os.getpid())
             ram_usage = process.memory_info().rss / 1024 / 1024
-            cpu_usage = psutil.cpu_percent(interval=None)
+            # The sampler's reading: a fresh cpu_percent() call here would measure nothing
+            cpu_usage = self.history.latest().get("cpu")
+            if cpu_usage is None:
+                cpu_usage = psutil.cpu_percent(interval=None)
             disk = psutil.disk_usage("/")
             disk_percent = disk.percent
 
@@ -48,8 +259,119 @@ class Health(commands.Cog):
             embed.add_field(name="⚙️ CPU Load", value=f"`{cpu_usage}%`", inline=True)
             embed.add_field(name="Cw Disk Usage", value=f"`{disk_percent}%`", inline=True)
 
+            ready_ms = getattr(self.bot, "ready_ms", None)
+            startup_text = f"`{ready_ms / 1000:.2f}s`" if ready_ms is not None else "`n/a`"
+            embed.add_field(name="🚀 Start → Ready", value=startup_text, inline=True)
+
+            stats = rest.stats
+            embed.add_field(
+                name="📡 REST Scheduler",
+                value=f"`{stats['requests']}` req • `{stats['deduped']}` deduped • "
+                f"`{stats['shed']}` shed • `{rest.queue_size}` queued",
+                inline=False,
+            )
+
+            allowed = sum(s["allowed"] for s in rate_limits.stats.values())
+            limited = sum(s["limited"] for s in rate_limits.stats.values())
+            embed.add_field(
+                name="🚦 Rate Limiter",
+                value=f"`{allowed}` allowed • `{limited}` limited • "
+                f"`{len(rate_limits.buckets)}` buckets",
+                inline=False,
+            )
+
+            cctv = self.bot.get_cog("CCTV")
+            if cctv is not None:
+                monitor = cctv.monitor
+                embed.add_field(
+                    name="📹 CCTV",
+                    value=f"Search: {monitor.search_breaker.describe()}\n"
+                    f"Capture: {monitor.capture_breaker.describe()}",
+                    inline=False,
+                )
+
+            trends = self._trend_lines(seconds)
+            embed.add_field(
+                name=f"📈 Trends ({window}, min/avg/max)",
+                value=f"```\n{trends}\n```" if trends else "Collecting samples...",
+                inline=False,
+            )
+
+            embed.add_field(
+                name=f"🧩 Shards ({self.bot.shard_count})", value=self._shard_lines(), inline=False
+            )
+
             await ctx.send(embed=embed)
 
+    async def _send_report(self, ctx, name, report):
+        file = discord.File(io.BytesIO(report.encode()), filename=f"{name}.txt")
+        await ctx.send(file=file)
+
+    # --- COMMAND: !memstart [frames] ---
+    @commands.command(hidden=True)
+    @is_owner()
+    async def memstart(self, ctx, frames: int = 1):
+        """Starts tracing allocations (slows the bot down until !memstop)."""
+        if tracemalloc.is_tracing():
+            return await ctx.send("⚠️ Already tracing. `!memsnap` to take a snapshot.")
+        tracemalloc.start(max(1, min(frames, 25)))
+        await ctx.send("🔬 Tracing allocations. `!memsnap` now and later, then `!memdiff`.")
+
+    # --- COMMAND: !memsnap ---
+    @commands.command(hidden=True)
+    @is_owner()
+    async def memsnap(self, ctx):
+        """Snapshots traced memory and reports the biggest allocation sites."""
+        if not tracemalloc.is_tracing():
+            return await ctx.send("❌ Not tracing. Start with `!memstart`.")
+        # Snapshotting and walking the heap take seconds on a big bot: off the loop
+        snapshot = await asyncio.to_thread(take_snapshot)
+        sites = await asyncio.to_thread(top_sites, snapshot)
+        views = await asyncio.to_thread(live_views)
+
+        self._snapshot_seq += 1
+        self.snapshots[self._snapshot_seq] = snapshot
+        while len(self.snapshots) > MAX_SNAPSHOTS:
+            self.snapshots.popitem(last=False)
+
+        number = self._snapshot_seq
+        title = f"Snapshot #{number} at {datetime.now():%Y-%m-%d %H:%M:%S}"
+        report = render(title, "Top allocation sites", sites, views, self.bot)
+        await self._send_report(ctx, f"memsnap-{number}", report)
+
+    # --- COMMAND: !memdiff [old] [new] ---
+    @commands.command(hidden=True)
+    @is_owner()
+    async def memdiff(self, ctx, old: int = None, new: int = None):
+        """Reports what grew between two snapshots (default: the last two)."""
+        numbers = list(self.snapshots)
+        if old is None and new is None:
+            if len(numbers) < 2:
+                return await ctx.send("❌ Need two snapshots: run `!memsnap` again later.")
+            old, new = numbers[-2], numbers[-1]
+        elif new is None:
+            new = numbers[-1] if numbers else None
+        if old not in self.snapshots or new not in self.snapshots:
+            kept = ", ".join(f"#{n}" for n in numbers) or "none"
+            return await ctx.send(f"❌ Unknown snapshot. Kept: {kept}.")
+
+        sites = await asyncio.to_thread(diff_sites, self.snapshots[old], self.snapshots[new])
+        views = await asyncio.to_thread(live_views)
+        title = f"Snapshot #{old} -> #{new}"
+        report = render(title, "Biggest changes", sites, views, self.bot)
+        await self._send_report(ctx, f"memdiff-{old}-{new}", report)
+
+    # --- COMMAND: !memstop ---
+    @commands.command(hidden=True)
+    @is_owner()
+    async def memstop(self, ctx):
+        """Stops tracing and drops the kept snapshots."""
+        if not tracemalloc.is_tracing():
+            return await ctx.send("⚠️ Not tracing.")
+        self.snapshots.clear()
+        tracemalloc.stop()
+        await ctx.send("🛑 Tracing stopped, snapshots dropped.")
+
 
 async def setup(bot):
     await bot.add_cog(Health(bot))
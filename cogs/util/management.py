@@ -6,7 +6,9 @@ import discord
 from discord.ext import commands
 
 from core.blacklist import blacklist_store
-from core.iam import is_owner
+from core.iam import is_admin, is_owner
+from core.logger import LOG_FILE
+from core.rate_limit import DEFAULT_LIMITS, SCOPES, rate_limits
 from core.server_settings import server_settings
 
 logger = logging.getLogger("discord.management")
@@ -76,13 +78,32 @@ class Management(commands.Cog):
     @is_owner()
     async def list_cogs(self, ctx):
         loaded_extensions = list(self.bot.extensions.keys())
-        desc = "\n".join([f"• `{ext}`" for ext in loaded_extensions]) or "No extensions loaded."
+        report = getattr(self.bot, "startup_report", {})
 
-        await ctx.send(
-            embed=discord.Embed(
-                title="Active Modules", description=desc, color=discord.Color.blue()
-            )
-        )
+        lines = []
+        for ext in loaded_extensions:
+            entry = report.get(ext)
+            if entry:
+                lines.append(
+                    f"• `{ext}` — import `{entry['import_ms']:.0f}ms`, "
+                    f"setup `{entry['setup_ms']:.0f}ms`"
+                )
+            else:
+                lines.append(f"• `{ext}`")
+
+        # Extensions that failed at startup are not in bot.extensions
+        for name, entry in report.items():
+            if entry["status"] == "failed" and name not in self.bot.extensions:
+                lines.append(f"• ❌ `{name}` — {entry['error']}")
+
+        desc = "\n".join(lines) or "No extensions loaded."
+
+        embed = discord.Embed(title="Active Modules", description=desc, color=discord.Color.blue())
+        total_ms = getattr(self.bot, "startup_report_total_ms", None)
+        if total_ms is not None:
+            embed.set_footer(text=f"Cog startup: {total_ms:.0f}ms")
+
+        await ctx.send(embed=embed)
 
     # ------ BLACKLIST COMMANDS ------#
 
@@ -91,7 +112,7 @@ class Management(commands.Cog):
     @is_owner()
     async def blacklist(self, ctx, user: discord.User, command_name: str):
         cmd = command_name.lower()
-        if blacklist_store.add_block(ctx.guild.id, user.id, cmd):
+        if await blacklist_store.add_block(ctx.guild.id, user.id, cmd):
             await ctx.send(embed=self._success_embed("blacklisted", f"{user.name} from !{cmd}"))
         else:
             await ctx.send(f"⚠️ **{user.name}** is already blacklisted.")
@@ -101,7 +122,7 @@ class Management(commands.Cog):
     @is_owner()
     async def unblacklist(self, ctx, user: discord.User, command_name: str):
         cmd = command_name.lower()
-        if blacklist_store.remove_block(ctx.guild.id, user.id, cmd):
+        if await blacklist_store.remove_block(ctx.guild.id, user.id, cmd):
             await ctx.send(embed=self._success_embed("unblacklisted", f"{user.name} from !{cmd}"))
         else:
             await ctx.send(f"⚠️ **{user.name}** was not blacklisted from `!{cmd}`.")
@@ -139,15 +160,87 @@ class Management(commands.Cog):
             await ctx.send("❌ Prefix is too long.")
             return
 
-        server_settings.set_val(ctx.guild.id, "prefix", new_prefix)
+        await server_settings.set_val(ctx.guild.id, "prefix", new_prefix)
 
         await ctx.send(embed=self._success_embed("updated prefix", f"New prefix is `{new_prefix}`"))
 
+    # --- COMMAND: !ratelimit [command] [scope] [per_minute] [burst] ---
+    @commands.command(hidden=True)
+    @is_admin()
+    async def ratelimit(
+        self,
+        ctx,
+        command: str = None,
+        scope: str = None,
+        per_minute: float = None,
+        burst: int = None,
+    ):
+        """
+        Shows or tunes this server's command rate limits (0 per minute = unlimited).
+        Usage: !ratelimit  |  !ratelimit 9up user 20 5  |  !ratelimit 9up user (reset)
+        """
+        if not ctx.guild:
+            return
+
+        if command is not None:
+            if command not in DEFAULT_LIMITS or scope not in SCOPES:
+                await ctx.send(
+                    f"❌ Usage: `!ratelimit <{'|'.join(DEFAULT_LIMITS)}> "
+                    f"<{'|'.join(SCOPES)}> [per_minute] [burst]`"
+                )
+                return
+            overrides = server_settings.get_val(ctx.guild.id, "rate_limits") or {}
+            command_overrides = dict(overrides.get(command, {}))
+            if per_minute is None:
+                command_overrides.pop(scope, None)
+            else:
+                default_burst = DEFAULT_LIMITS[command].get(scope, (0, 1))[1]
+                command_overrides[scope] = [max(0.0, per_minute), max(1, burst or default_burst)]
+            await server_settings.set_val(
+                ctx.guild.id, "rate_limits", {**overrides, command: command_overrides}
+            )
+
+        lines = []
+        for name in DEFAULT_LIMITS:
+            limits = rate_limits.limits_for(ctx.guild.id, name)
+            text = " • ".join(
+                f"{scope} {limits[scope][0]:g}/min (burst {limits[scope][1]})"
+                for scope in SCOPES
+                if scope in limits
+            )
+            stats = rate_limits.stats[name]
+            lines.append(
+                f"`{name}`: {text or 'unlimited'}\n"
+                f"↳ {stats['allowed']} allowed, {stats['limited']} limited"
+            )
+        embed = discord.Embed(
+            title="🚦 Rate Limits",
+            description="\n".join(lines),
+            color=discord.Color.blue(),
+        )
+        embed.set_footer(text=f"Counts since start • {len(rate_limits.buckets)} active buckets")
+        await ctx.send(embed=embed)
+
+    # --- COMMAND: !sync ---
+    @commands.command(hidden=True)
+    @is_owner()
+    async def sync(self, ctx, scope: str = "global"):
+        """Registers slash commands (hybrid commands) with Discord: global or this guild."""
+        if scope == "guild":
+            self.bot.tree.copy_global_to(guild=ctx.guild)
+            synced = await self.bot.tree.sync(guild=ctx.guild)
+        else:
+            synced = await self.bot.tree.sync()
+        logger.info(f"🔁 Synced {len(synced)} slash commands ({scope})")
+        await ctx.send(
+            embed=self._success_embed("synced slash commands", ", ".join(c.name for c in synced))
+        )
+
     # --- COMMAND: !viewlogs ---
     @commands.command(name="logs", hidden=True)
     @is_owner()
     async def view_logs(self, ctx, lines: int = 10):
-        log_file_path = "logs/discord.log"
+        log_file_path = LOG_FILE
 
         if not os.path.exists(log_file_path):
             await ctx.send("❌ Log file not found.")
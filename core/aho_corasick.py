@@ -0,0 +1,83 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher. One pass over the text finds every pattern,
+    so matching cost depends on the text length, not on how many patterns exist.
+    Matching is case-insensitive.
+    """
+
+    def __init__(self, patterns=()):
+        self.patterns = set()
+        self._goto = [{}]  # node -> {char: node}
+        self._terminal = {}  # node -> pattern ending exactly at that node
+        self._fail = [0]
+        self._out = [()]  # node -> every pattern ending here, including via fail links
+        for pattern in patterns:
+            self._insert(pattern)
+        self._build()
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _insert(self, pattern: str):
+        pattern = pattern.lower()
+        if not pattern or pattern in self.patterns:
+            return
+        self.patterns.add(pattern)
+
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+            node = nxt
+        self._terminal[node] = pattern
+
+    def _build(self):
+        """Computes failure links breadth-first, O(total pattern length)."""
+        size = len(self._goto)
+        self._fail = [0] * size
+        self._out = [()] * size
+
+        queue = deque()
+        for child in self._goto[0].values():
+            self._out[child] = self._own(child)
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._own(child) + self._out[self._fail[child]]
+                queue.append(child)
+
+    def _own(self, node: int) -> tuple:
+        pattern = self._terminal.get(node)
+        return (pattern,) if pattern else ()
+
+    def add(self, pattern: str):
+        """Adds a pattern; only this automaton's failure links are recomputed."""
+        self._insert(pattern)
+        self._build()
+
+    def remove(self, pattern: str):
+        pattern = pattern.lower()
+        if pattern in self.patterns:
+            self.__init__(self.patterns - {pattern})
+
+    def iter_matches(self, text: str):
+        """Yields (start, end, pattern) for every occurrence, in order of end position."""
+        node = 0
+        for i, char in enumerate(text.lower()):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern in self._out[node]:
+                yield i + 1 - len(pattern), i + 1, pattern
@@ -0,0 +1,121 @@
+import random
+import re
+import unicodedata
+
+# Longer prefixes aren't indexed; a query that long is matched as a whole term
+MAX_PREFIX = 24
+# Terms shorter than this get no typo tolerance ("ok" vs "on" is not a typo)
+MIN_FUZZY_LENGTH = 3
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+def words(text: str) -> list:
+    return WORD_PATTERN.findall(normalize(text))
+
+
+def _deletes(term: str) -> set:
+    """Every string one deletion away from `term` (the term itself included)."""
+    return {term} | {term[:i] + term[i + 1 :] for i in range(len(term))}
+
+
+class AssetIndex:
+    """
+    Sticker assets with tags and aliases. Built once and never modified: a reload
+    builds a new index and swaps the reference, so lookups never see a half-built one.
+
+    Lookups are dictionary hits, independent of how many assets exist:
+    - exact: term (tag, alias or filename word) -> asset ids
+    - prefix: every prefix of every term -> asset ids ("cat" finds "catgirl")
+    - fuzzy: one-deletion neighbourhoods (SymSpell style) -> terms, so a query with
+      one missing, extra, wrong or swapped letter ("hapy", "hpapy") still resolves
+    """
+
+    def __init__(self, assets=()):
+        self.urls = []
+        self.tags = {}  # term -> tuple of asset ids
+        self.prefixes = {}  # prefix -> frozenset of asset ids
+        self.fuzzy = {}  # deletion variant -> set of terms
+        terms_by_asset = []
+
+        for asset in assets:
+            if isinstance(asset, str):  # legacy dllm_links.json: a plain URL list
+                asset = {"url": asset}
+            terms = set()
+            for tag in (*asset.get("tags", ()), *asset.get("aliases", ())):
+                tag = normalize(tag)
+                if tag:
+                    terms.add(tag)
+                    terms.update(words(tag))
+            terms_by_asset.append(terms)
+            self.urls.append(asset["url"])
+
+        tags, prefixes = {}, {}
+        for asset_id, terms in enumerate(terms_by_asset):
+            for term in terms:
+                tags.setdefault(term, []).append(asset_id)
+                for end in range(1, min(len(term), MAX_PREFIX) + 1):
+                    prefixes.setdefault(term[:end], set()).add(asset_id)
+        self.tags = {term: tuple(ids) for term, ids in tags.items()}
+        self.prefixes = {prefix: frozenset(ids) for prefix, ids in prefixes.items()}
+        for term in self.tags:
+            if len(term) >= MIN_FUZZY_LENGTH:
+                for variant in _deletes(term):
+                    self.fuzzy.setdefault(variant, set()).add(term)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def _ids_for_word(self, word: str):
+        """Asset ids for one query word: exact term, else prefix, else one typo away."""
+        ids = self.tags.get(word)
+        if ids:
+            return frozenset(ids)
+        ids = self.prefixes.get(word[:MAX_PREFIX])
+        if ids:
+            return ids
+        if len(word) < MIN_FUZZY_LENGTH:
+            return frozenset()
+        matches = set()
+        for variant in _deletes(word):
+            for term in self.fuzzy.get(variant, ()):
+                matches.update(self.tags[term])
+        return frozenset(matches)
+
+    def search(self, query: str) -> frozenset:
+        """Ids of assets matching every word of `query` (a full tag or alias also works)."""
+        query = normalize(query)
+        exact = self.tags.get(query)
+        if exact:
+            return frozenset(exact)
+
+        result = None
+        for word in words(query):
+            ids = self._ids_for_word(word)
+            result = ids if result is None else result & ids
+            if not result:
+                return frozenset()
+        return result or frozenset()
+
+    def pick(self, query: str = None):
+        """A random URL, optionally restricted to `query`. None when nothing matches."""
+        if not self.urls:
+            return None
+        if not query:
+            return random.choice(self.urls)
+        # A whole-term hit is already a tuple: pick without building anything
+        exact = self.tags.get(normalize(query))
+        if exact:
+            return self.urls[random.choice(exact)]
+        ids = self.search(query)
+        return self.urls[random.choice(tuple(ids))] if ids else None
+
+    def top_tags(self, limit: int = 30) -> list:
+        """(tag, asset count) pairs, most used first."""
+        return sorted(
+            ((tag, len(ids)) for tag, ids in self.tags.items()), key=lambda t: (-t[1], t[0])
+        )[:limit]
@@ -0,0 +1,309 @@
+"""
+Online backup, streaming export/import and layout migration for the quotes DB.
+
+CLI:
+    python -m core.backup snapshot [--db db/quotes.db] [-o db/backups/quotes-<ts>.db]
+    python -m core.backup export --guild <id> [--format ndjson|csv] [-o quotes.ndjson.gz]
+    python -m core.backup import <file.ndjson.gz|file.csv.gz> [--guild <id>]
+    python -m core.backup split --layout guild|bucket [--buckets 16]
+
+--db defaults to the file the configured DB_LAYOUT uses for --guild (or db/quotes.db).
+
+Everything here is synchronous sqlite3 so it can run in a worker thread
+(asyncio.to_thread) without blocking the bot's event loop.
+"""
+
+import argparse
+import csv
+import gzip
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from core.db import DB_TIMEOUT, INSERT_QUOTE_IF_NEW, SCHEMA, SINGLE_DB, db_path_for, quote_db
+
+logger = logging.getLogger("discord.backup")
+
+DEFAULT_DB = SINGLE_DB
+BACKUP_DIR = "db/backups"
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# The backup copies this many pages per step and sleeps in between, so writers
+# (quote commands) are never locked out for the whole copy.
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.005
+# Rows per fetchmany()/executemany() round, keeps memory constant for any DB size
+CHUNK_SIZE = 500
+
+COLUMNS = (
+    "id",
+    "guild_id",
+    "user_id",
+    "content",
+    "timestamp",
+    "channel_id",
+    "adder_user_id",
+    "added_timestamp",
+    "uses",
+)
+
+# CSV hands every value back as a string; these are stored as INTEGER (or NULL)
+INTEGER_COLUMNS = ("guild_id", "user_id", "channel_id", "adder_user_id", "added_timestamp")
+
+
+def snapshot(db_path: str = DEFAULT_DB, dest_path: str = None) -> str:
+    """Takes a consistent copy of a live database with SQLite's backup API."""
+    if dest_path is None:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        dest_path = os.path.join(BACKUP_DIR, f"quotes-{stamp}.db")
+
+    src = sqlite3.connect(db_path, timeout=DB_TIMEOUT)
+    dst = sqlite3.connect(dest_path)
+    try:
+        with dst:
+            src.backup(dst, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        dst.close()
+        src.close()
+
+    logger.info(f"💾 Snapshot of {db_path} written to {dest_path}")
+    return dest_path
+
+
+def iter_quotes(db_path: str, guild_id: int):
+    """Yields one guild's quotes as dicts, reading CHUNK_SIZE rows at a time."""
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT)
+    try:
+        cursor = conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM quotes WHERE guild_id = ? ORDER BY id",
+            (guild_id,),
+        )
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(COLUMNS, row))
+    finally:
+        conn.close()
+
+
+def export_quotes(db_path: str, guild_id: int, out_path: str, fmt: str = "ndjson") -> int:
+    """Streams a guild's quotes into a gzip-compressed NDJSON or CSV file."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    count = 0
+    with gzip.open(out_path, "wt", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            for quote in iter_quotes(db_path, guild_id):
+                writer.writerow(quote)
+                count += 1
+        else:
+            for quote in iter_quotes(db_path, guild_id):
+                f.write(json.dumps(quote, ensure_ascii=False) + "\n")
+                count += 1
+
+    logger.info(f"📤 Exported {count} quotes for guild {guild_id} to {out_path}")
+    return count
+
+
+def _read_export(path: str):
+    """Yields quote dicts from an export file, detecting the format from its name."""
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        if ".csv" in os.path.basename(path):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def import_quotes(db_path: str, in_path: str, guild_id: int = None) -> tuple[int, int]:
+    """
+    Streams an export back into a database, skipping quotes that already exist.
+    db_path: None picks the configured layout's file for the export's guild.
+    guild_id: re-home the quotes into another guild (e.g. when moving servers).
+    Returns (imported, skipped).
+    """
+    quotes = _read_export(in_path)
+    first = next(quotes, None)
+    if first is None:
+        return 0, 0
+    if db_path is None:
+        db_path = quote_db.path_for(guild_id if guild_id is not None else int(first["guild_id"]))
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    imported = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal imported, skipped
+        # rowcount, not total_changes: the rollup triggers' writes must not count as quotes
+        with conn:
+            inserted = conn.executemany(INSERT_QUOTE_IF_NEW, batch).rowcount
+        imported += inserted
+        skipped += len(batch) - inserted
+        batch.clear()
+
+    try:
+        for quote in itertools.chain([first], quotes):
+            quote = {col: quote.get(col) for col in COLUMNS if col != "id"}
+            # CSV writes NULL as "": restore it, or the rollups would key stats by ""
+            quote = {col: None if value == "" else value for col, value in quote.items()}
+            for col in INTEGER_COLUMNS:
+                if quote[col] is not None:
+                    quote[col] = int(quote[col])
+            if guild_id is not None:
+                quote["guild_id"] = guild_id
+            quote["uses"] = int(quote["uses"] or 0)
+            batch.append(quote)
+            if len(batch) >= CHUNK_SIZE:
+                flush()
+        if batch:
+            flush()
+    finally:
+        conn.close()
+
+    logger.info(f"📥 Imported {imported} quotes from {in_path} ({skipped} skipped)")
+    return imported, skipped
+
+
+# Files kept open at once while splitting (bucket layouts revisit files)
+SPLIT_MAX_OPEN = 64
+# Small tables keyed by guild_id (first column) that move with their guild
+GUILD_TABLES = ("import_progress", "triggers")
+
+
+def split_database(src_path: str, layout: str, buckets: int = 16) -> dict:
+    """
+    Copies a single quotes DB into per-guild or per-bucket files, keeping quote ids.
+    Safe to re-run (existing ids are skipped). The source file is left untouched.
+    Returns {target_path: rows_copied}.
+    """
+    targets = {}  # path -> [conn, pending rows], insertion order = least recently used
+    copied = {}
+
+    def flush(path):
+        conn, pending = targets[path]
+        if pending:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO quotes ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    pending,
+                )
+            copied[path] = copied.get(path, 0) + len(pending)
+            pending.clear()
+
+    def target(path):
+        if path in targets:
+            targets[path] = targets.pop(path)  # mark as recently used
+            return targets[path]
+        if len(targets) >= SPLIT_MAX_OPEN:
+            oldest = next(iter(targets))
+            flush(oldest)
+            targets.pop(oldest)[0].close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=DB_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        targets[path] = [conn, []]
+        return targets[path]
+
+    src = sqlite3.connect(src_path, timeout=DB_TIMEOUT)
+    try:
+        cursor = src.execute(f"SELECT {', '.join(COLUMNS)} FROM quotes ORDER BY guild_id, id")
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                path = db_path_for(row[1], layout, buckets)
+                _, pending = target(path)
+                pending.append(row)
+                if len(pending) >= CHUNK_SIZE:
+                    flush(path)
+
+        for path in list(targets):
+            flush(path)
+
+        # Per-guild side tables follow their guild (older DBs may not have them)
+        for table in GUILD_TABLES:
+            try:
+                rows = src.execute(f"SELECT * FROM {table}").fetchall()
+            except sqlite3.OperationalError:
+                continue
+            for row in rows:
+                conn, _ = target(db_path_for(row[0], layout, buckets))
+                with conn:
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO {table} VALUES ({', '.join('?' * len(row))})", row
+                    )
+    finally:
+        src.close()
+        for conn, _ in targets.values():
+            conn.close()
+
+    logger.info(f"🔀 Split {sum(copied.values())} quotes into {len(copied)} {layout} files")
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up, export and import quotes.")
+    parser.add_argument("--db", help="quotes database path")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p_snap = sub.add_parser("snapshot", help="consistent online copy of the database")
+    p_snap.add_argument("-o", "--output")
+
+    p_exp = sub.add_parser("export", help="stream one guild's quotes to a gzip file")
+    p_exp.add_argument("--guild", type=int, required=True)
+    p_exp.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    p_exp.add_argument("-o", "--output")
+
+    p_imp = sub.add_parser("import", help="load an export file, skipping duplicates")
+    p_imp.add_argument("file")
+    p_imp.add_argument("--guild", type=int, help="override the guild id of every quote")
+
+    p_split = sub.add_parser("split", help="split db/quotes.db into per-guild/bucket files")
+    p_split.add_argument("--layout", choices=("guild", "bucket"), required=True)
+    p_split.add_argument("--buckets", type=int, default=16)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.db is None and args.action != "import":
+        guild = getattr(args, "guild", None)
+        args.db = quote_db.path_for(guild) if guild is not None else DEFAULT_DB
+
+    if args.action == "split":
+        split_database(args.db, args.layout, args.buckets)
+    elif args.action == "snapshot":
+        snapshot(args.db, args.output)
+    elif args.action == "export":
+        out = args.output or f"quotes-{args.guild}.{args.format}.gz"
+        # Export from a snapshot so the file reflects a single point in time
+        snap = snapshot(args.db, out + ".snapshot.db")
+        try:
+            export_quotes(snap, args.guild, out, args.format)
+        finally:
+            os.remove(snap)
+    else:
+        import_quotes(args.db, args.file, args.guild)
+
+
+if __name__ == "__main__":
+    main()
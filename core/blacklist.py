@@ -1,86 +1,71 @@
-import json
 import os
 
+from core.json_store import SharedJSONFile
+
 DATA_DIR = "data"
 BLACKLIST_FILE = os.path.join(DATA_DIR, "blacklist.json")
 
 
 class BlacklistManager:
     def __init__(self):
-        self._ensure_dir()
-        self.data = self._load()
-
-    def _ensure_dir(self):
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-
-    def _load(self):
-        if not os.path.exists(BLACKLIST_FILE):
-            return {}
-        try:
-            with open(BLACKLIST_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-
-    def _save(self):
-        with open(BLACKLIST_FILE, "w") as f:
-            json.dump(self.data, f, indent=4)
-
-    def add_block(self, guild_id: int, user_id: int, command_name: str):
-        gid = str(guild_id)
-        uid = str(user_id)
+        # Shared with the other launcher.py workers
+        self.store = SharedJSONFile(BLACKLIST_FILE)
 
-        # 1. Initialize Guild if missing
-        if gid not in self.data:
-            self.data[gid] = {}
+    @property
+    def data(self):
+        return self.store.data
 
-        # 2. Initialize User if missing in that Guild
-        if uid not in self.data[gid]:
-            self.data[gid][uid] = []
+    async def add_block(self, guild_id: int, user_id: int, command_name: str):
+        gid = str(guild_id)
+        uid = str(user_id)
 
-        # 3. Add Command
-        if command_name not in self.data[gid][uid]:
-            self.data[gid][uid].append(command_name)
-            self._save()
+        def _add(data):
+            # Initialize Guild and User if missing, then add Command
+            blocks = data.setdefault(gid, {}).setdefault(uid, [])
+            if command_name in blocks:
+                return False
+            blocks.append(command_name)
             return True
-        return False
 
-    def remove_block(self, guild_id: int, user_id: int, command_name: str):
+        return await self.store.update_async(_add)
+
+    async def remove_block(self, guild_id: int, user_id: int, command_name: str):
         gid = str(guild_id)
         uid = str(user_id)
 
-        # Check if Guild and User exist
-        if gid in self.data and uid in self.data[gid]:
-            if command_name in self.data[gid][uid]:
-                self.data[gid][uid].remove(command_name)
+        def _remove(data):
+            # Check if Guild and User exist
+            if command_name not in data.get(gid, {}).get(uid, []):
+                return False
+            data[gid][uid].remove(command_name)
 
-                # Cleanup: If list is empty, remove the user key
-                if not self.data[gid][uid]:
-                    del self.data[gid][uid]
+            # Cleanup: If list is empty, remove the user key
+            if not data[gid][uid]:
+                del data[gid][uid]
 
-                # Cleanup: If guild is empty, remove the guild key
-                if not self.data[gid]:
-                    del self.data[gid]
+            # Cleanup: If guild is empty, remove the guild key
+            if not data[gid]:
+                del data[gid]
+            return True
 
-                self._save()
-                return True
-        return False
+        return await self.store.update_async(_remove)
 
     def is_blocked(self, guild_id: int, user_id: int, command_name: str) -> bool:
         gid = str(guild_id)
         uid = str(user_id)
 
+        data = self.data
+
         # 1. Check Guild
-        if gid not in self.data:
+        if gid not in data:
             return False
 
         # 2. Check User
-        if uid not in self.data[gid]:
+        if uid not in data[gid]:
             return False
 
         # 3. Check Command
-        user_blocks = self.data[gid][uid]
+        user_blocks = data[gid][uid]
         return command_name in user_blocks or "all" in user_blocks
 
 
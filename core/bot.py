@@ -1,17 +1,30 @@
+import asyncio
+import logging
+import time
+
 import discord
 from discord.ext import commands
 
+from core.config import settings
+from core.loader import preload_heavy_modules
 from core.server_settings import server_settings
 
-from .logger import setup_logging
-
-# Logger
-setup_logging()
+logger = logging.getLogger("discord")
 
 # Intents
 intents = discord.Intents.default()
 intents.message_content = True
 
+# Member cache
+if settings.MEMBER_CACHE == "all":
+    intents.members = True
+    member_cache_flags = discord.MemberCacheFlags.all()
+elif settings.MEMBER_CACHE == "voice":
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.voice = True
+else:
+    member_cache_flags = discord.MemberCacheFlags.none()
+
 
 # Instantiate
 def get_prefix(bot, message):
@@ -21,16 +34,37 @@ def get_prefix(bot, message):
     return server_settings.get_prefix(message.guild.id)
 
 
-bot = commands.Bot(command_prefix=get_prefix, intents=intents)
+bot = commands.AutoShardedBot(
+    command_prefix=get_prefix,
+    intents=intents,
+    max_messages=settings.MAX_MESSAGES or None,
+    member_cache_flags=member_cache_flags,
+    chunk_guilds_at_startup=settings.MEMBER_CACHE == "all",
+    shard_count=settings.SHARD_COUNT,
+    shard_ids=settings.SHARD_IDS,
+)
+
+# Startup timing (start -> first READY), reported by !health
+bot.launch_time = time.perf_counter()
+bot.ready_ms = None
+bot.preload_task = None
 
 
 # Define Standard Events
 @bot.event
 async def on_ready():
-    import logging
-
-    logger = logging.getLogger("discord")
     logger.info("---------------------------------------------")
     logger.info(f"👤 Logged in as: {bot.user.name}")
     logger.info(f"🆔 ID: {bot.user.id}")
     logger.info("---------------------------------------------")
+
+    # on_ready fires again on reconnects; only the first one is the cold start
+    if bot.ready_ms is None:
+        bot.ready_ms = (time.perf_counter() - bot.launch_time) * 1000
+        logger.info(f"🚀 Start → READY in {bot.ready_ms:.0f}ms")
+        bot.preload_task = asyncio.create_task(preload_heavy_modules())
+
+
+@bot.event
+async def on_shard_ready(shard_id):
+    logger.info(f"🧩 Shard {shard_id}/{bot.shard_count} ready")
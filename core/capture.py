@@ -1,9 +1,116 @@
-import json
+import math
 import os
 import subprocess
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from yt_dlp import YoutubeDL
+from core.config import settings
+from core.json_store import SharedJSONFile
+
+# Seconds between a cache change and its write to disk; changes in between coalesce
+SAVE_DELAY = 5
+# Hard limits for one yt-dlp channel scan / one frame grab
+SEARCH_TIMEOUT = 30
+CAPTURE_TIMEOUT = 30
+# Clips: frame rate and bounding box (low bitrate on purpose, it's a glance not a VOD)
+CLIP_FPS = 10
+CLIP_SIZE = (640, 360)
+
+
+class CaptureUnavailable(Exception):
+    """Raised instead of launching yt-dlp/ffmpeg while their circuit breaker is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} unavailable, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency. Opens after `threshold` failures in a row or
+    when `failure_rate` of the last `window` calls failed; while open, check() raises
+    CaptureUnavailable without running anything. When the backoff expires one caller
+    is let through as a probe (half-open): success closes the breaker, failure opens
+    it again for twice as long, up to `max_backoff`.
+    """
+
+    def __init__(
+        self, name, threshold=3, window=10, failure_rate=0.5, base_backoff=30, max_backoff=600
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.failure_rate = failure_rate
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.results = deque(maxlen=window)  # True = failed
+        self.consecutive = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.backoff = 0
+        self.trips = 0
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.backoff - time.monotonic())
+
+    def check(self):
+        with self._lock:
+            if self.state == "open" and self.retry_after() <= 0:
+                # This caller becomes the probe; everyone else keeps failing fast
+                self.state = "half_open"
+                print(f"🔌 [Breaker] {self.name} half-open, probing")
+            elif self.state != "closed":
+                self.stats["rejected"] += 1
+                raise CaptureUnavailable(self.name, self.retry_after())
+            self.stats["calls"] += 1
+
+    def record_success(self):
+        with self._lock:
+            if self.state == "half_open":
+                print(f"✅ [Breaker] {self.name} recovered")
+                self.results.clear()
+                self.trips = 0
+            self.state = "closed"
+            self.consecutive = 0
+            self.results.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self.consecutive += 1
+            self.results.append(True)
+            failed = sum(self.results)
+            rate_tripped = (
+                len(self.results) == self.results.maxlen
+                and failed / len(self.results) >= self.failure_rate
+            )
+            if self.state == "half_open" or self.consecutive >= self.threshold or rate_tripped:
+                self._trip()
+
+    def _trip(self):
+        self.trips += 1
+        self.backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.trips - 1))
+        self.opened_at = time.monotonic()
+        self.state = "open"
+        print(f"🚫 [Breaker] {self.name} open for {self.backoff}s (trip {self.trips})")
+
+    def describe(self) -> str:
+        with self._lock:
+            if self.state == "open":
+                status = f"🔴 open, retry in {self.retry_after():.0f}s"
+            elif self.state == "half_open":
+                status = "🟡 probing"
+            else:
+                status = f"🟢 {sum(self.results)}/{len(self.results)} recent failures"
+            stats = self.stats
+            return (
+                f"{status} • {stats['calls']} calls, {stats['failures']} failed, "
+                f"{stats['rejected']} rejected"
+            )
 
 
 class Capture:
@@ -11,49 +118,136 @@ class Capture:
         self.channel_url = channel_url
         self.cache_file = cache_file
         self.img_dir = img_dir
-        self.cache_ttl = 3600
+        self.cache_ttl = settings.CCTV_STREAM_TTL
+        self.negative_ttl = settings.CCTV_OFFLINE_TTL
         self.cookie_file = "/app/data/cookies.txt"  # Cookie: bypass youtube check
 
-        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
         os.makedirs(self.img_dir, exist_ok=True)
 
-    def _load_cache(self):
-        if not os.path.exists(self.cache_file):
-            return {}
-        try:
-            with open(self.cache_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
+        # (game, side) -> {"url", "title", "timestamp"} or {"offline": True, "timestamp"}.
+        # The JSON file backs this up across restarts and shares found streams with the
+        # other launcher.py workers; saves merge by timestamp instead of overwriting.
+        self.store = SharedJSONFile(self.cache_file)
+        self.cache = {}
+        for game, sides in self.store.data.items():
+            for side, entry in sides.items():
+                if isinstance(entry, dict) and "title" in entry:
+                    self.cache[(game, side)] = entry
+        # get_stream_info runs in executor threads
+        self._lock = threading.Lock()
+        self._search_locks = {}
+        self._save_timer = None
+
+        # Output profile for captured frames, applied in the same ffmpeg call
+        self.max_width = settings.CCTV_MAX_WIDTH
+        self.max_height = settings.CCTV_MAX_HEIGHT
+        self.image_format = settings.CCTV_FORMAT
+        self.quality = max(1, min(100, settings.CCTV_QUALITY))
+        self.crops = settings.CCTV_CROPS
+        self.burst_frames = settings.CCTV_BURST_FRAMES
+        self.burst_interval = settings.CCTV_BURST_INTERVAL
+        self.clip_seconds = settings.CCTV_CLIP_SECONDS
+        # Every ffmpeg run goes through this pool, so concurrent !cctv requests can't
+        # start more encoders than the container has cores for
+        self.encode_pool = ThreadPoolExecutor(
+            max_workers=settings.CCTV_ENCODE_WORKERS, thread_name_prefix="cctv-encode"
+        )
+
+        self.search_breaker = CircuitBreaker("yt-dlp search")
+        self.capture_breaker = CircuitBreaker("frame capture")
+
+    def _save_cache(self):
+        with self._lock:
+            self._save_timer = None
+            # Offline results are short-lived; only found streams are worth persisting
+            found = {key: entry for key, entry in self.cache.items() if not entry.get("offline")}
+
+        def _merge(data):
+            # Another worker may have found a newer stream for the same key
+            for (game, side), entry in found.items():
+                current = data.setdefault(game, {}).get(side)
+                if not current or current.get("timestamp", 0) <= entry["timestamp"]:
+                    data[game][side] = entry
 
-    def _save_cache(self, data):
         try:
-            with open(self.cache_file, "w") as f:
-                json.dump(data, f, indent=4)
-        except IOError:
+            self.store.update(_merge)
+        except OSError:
             pass
 
+    def _schedule_save(self):
+        # Called with self._lock held. Write-behind: the caller never waits on disk.
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY, self._save_cache)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Writes pending cache changes now (e.g. on unload)."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self._save_cache()
+
+    def _cached(self, key, now):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        ttl = self.negative_ttl if entry.get("offline") else self.cache_ttl
+        if now - entry.get("timestamp", 0) < ttl:
+            return entry
+        return None
+
     def get_stream_info(self, game, side):
-        cache = self._load_cache()
-        current_time = time.time()
         game, side = game.lower(), side.upper()
+        key = (game, side)
 
-        cached_entry = cache.get(game, {}).get(side)
-        if cached_entry and "title" in cached_entry:
-            if current_time - cached_entry.get("timestamp", 0) < self.cache_ttl:
-                print(f"🚀 [Cache] Found URL for {game.upper()} {side}")
-                return cached_entry
-
-        result = self._search_youtube_live(game, side)
-
-        if result:
-            url, title = result
-            if game not in cache:
-                cache[game] = {}
-            cache[game][side] = {"url": url, "title": title, "timestamp": current_time}
-            self._save_cache(cache)
-            return cache[game][side]
-        return None
+        with self._lock:
+            entry = self._cached(key, time.time())
+            search_lock = self._search_locks.setdefault(key, threading.Lock())
+        if entry is not None:
+            return self._hit(game, side, entry)
+
+        # One yt-dlp scan per stream at a time; concurrent requests wait and reuse it
+        with search_lock:
+            with self._lock:
+                # A stream another worker found since is as good as our own
+                shared = self.store.data.get(game, {}).get(side)
+                if shared and shared.get("timestamp", 0) > self.cache.get(key, {}).get(
+                    "timestamp", 0
+                ):
+                    self.cache[key] = shared
+                entry = self._cached(key, time.time())
+            if entry is not None:
+                return self._hit(game, side, entry)
+
+            # Raises CaptureUnavailable while YouTube keeps failing us
+            self.search_breaker.check()
+            try:
+                result = self._search_youtube_live(game, side)
+            except Exception as e:
+                print(f"❌ [Search Error] {e}")
+                self.search_breaker.record_failure()
+                return None
+            self.search_breaker.record_success()
+
+            if result:
+                url, title = result
+                entry = {"url": url, "title": title, "timestamp": time.time()}
+            else:
+                entry = {"offline": True, "timestamp": time.time()}
+            with self._lock:
+                self.cache[key] = entry
+                self._schedule_save()
+        return None if entry.get("offline") else entry
+
+    @staticmethod
+    def _hit(game, side, entry):
+        if entry.get("offline"):
+            print(f"💤 [Cache] {game.upper()} {side} was offline moments ago")
+            return None
+        print(f"🚀 [Cache] Found URL for {game.upper()} {side}")
+        return entry
 
     def _search_youtube_live(self, game, side):
         if game == "sdvx":
@@ -77,21 +271,93 @@ class Capture:
         if os.path.exists(self.cookie_file):
             cmd.insert(1, f"--cookies={self.cookie_file}")
 
-        try:
-            result = subprocess.check_output(cmd).decode("utf-8").strip()
-            if not result:
-                return None
-            for line in result.split("\n"):
-                if "::::" in line:
-                    vid, title = line.split("::::", 1)
-                    if target_tag in title:
-                        return (f"https://www.youtube.com/watch?v={vid}", title)
-            return None
-        except Exception as e:
-            print(f"❌ [Search Error] {e}")
+        # Errors propagate so get_stream_info can tell "offline" from "failing"
+        result = subprocess.check_output(cmd, timeout=SEARCH_TIMEOUT).decode("utf-8").strip()
+        if not result:
             return None
+        for line in result.split("\n"):
+            if "::::" in line:
+                vid, title = line.split("::::", 1)
+                if target_tag in title:
+                    return (f"https://www.youtube.com/watch?v={vid}", title)
+        return None
+
+    @property
+    def extension(self):
+        return "webp" if self.image_format == "webp" else "jpg"
 
-    def capture_frame(self, video_url, filename):
+    def crop_for(self, game, side):
+        return self.crops.get(f"{game.lower()}_{side.upper()}") or self.crops.get(game.lower())
+
+    def _scale_filters(self, crop, max_width, max_height):
+        filters = [f"crop={crop}"] if crop else []
+        # Fit inside the box, keep the aspect ratio, never upscale; even sizes for yuv420
+        filters.append(
+            f"scale='min({max_width},iw)':'min({max_height},ih)'"
+            ":force_original_aspect_ratio=decrease:force_divisible_by=2"
+        )
+        return filters
+
+    def _image_codec_args(self):
+        if self.image_format == "webp":
+            return ["-c:v", "libwebp", "-quality", str(self.quality)]
+        # mjpeg's -q:v runs from 2 (best) to 31
+        return ["-q:v", str(round(2 + (100 - self.quality) * 29 / 100))]
+
+    def encode_args(self, crop=None):
+        """ffmpeg filter and codec arguments for one output image."""
+        filters = self._scale_filters(crop, self.max_width, self.max_height)
+        return ["-vf", ",".join(filters), *self._image_codec_args()]
+
+    def burst_args(self, crop=None, frames=None, interval=None):
+        """Input and output arguments for one grid image of `frames` frames taken
+        `interval` seconds apart."""
+        frames = frames or self.burst_frames
+        interval = interval or self.burst_interval
+        cols = math.ceil(math.sqrt(frames))
+        rows = math.ceil(frames / cols)
+        filters = [
+            f"fps=1/{interval}",
+            *self._scale_filters(crop, self.max_width // cols, self.max_height // rows),
+            f"tile={cols}x{rows}",
+        ]
+        output = ["-vf", ",".join(filters), "-frames:v", "1", *self._image_codec_args()]
+        return ["-t", str(frames * interval)], output
+
+    def clip_args(self, crop=None, seconds=None):
+        """Input and output arguments for a short, silent, low-bitrate H.264 clip."""
+        seconds = seconds or self.clip_seconds
+        filters = [f"fps={CLIP_FPS}", *self._scale_filters(crop, *CLIP_SIZE)]
+        output = [
+            "-vf",
+            ",".join(filters),
+            "-an",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            "32",
+            "-pix_fmt",
+            "yuv420p",
+            "-movflags",
+            "+faststart",
+        ]
+        return ["-t", str(seconds)], output
+
+    def capture_frame(self, video_url, filename, crop=None):
+        return self._run_ffmpeg(video_url, filename, [], ["-vframes", "1", *self.encode_args(crop)])
+
+    def capture_burst(self, video_url, filename, crop=None):
+        input_args, output_args = self.burst_args(crop)
+        return self._run_ffmpeg(video_url, filename, input_args, output_args)
+
+    def capture_clip(self, video_url, filename, crop=None):
+        input_args, output_args = self.clip_args(crop)
+        return self._run_ffmpeg(video_url, filename, input_args, output_args)
+
+    def _run_ffmpeg(self, video_url, filename, input_args, output_args):
+        """Resolves the stream and runs one ffmpeg process writing data/img/<filename>."""
         full_path = os.path.join(self.img_dir, filename)
 
         if os.path.exists(full_path):
@@ -100,19 +366,44 @@ class Capture:
                 print(f"⏩ [Img Cache] Reusing fresh image: {filename}")
                 return full_path
 
+        # Imported lazily: yt_dlp is heavy and most sessions never run !cctv
+        from yt_dlp import YoutubeDL
+
         ydl_opts = {"format": "best", "quiet": True, "noplaylist": True}
 
         if os.path.exists(self.cookie_file):
             ydl_opts["cookiefile"] = self.cookie_file
 
+        # Reading from a live stream takes as long as the footage itself
+        duration = float(input_args[1]) if input_args[:1] == ["-t"] else 0
+        self.capture_breaker.check()
         try:
             with YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(video_url, download=False)
                 direct_url = info.get("url")
 
-            cmd = ["ffmpeg", "-y", "-i", direct_url, "-vframes", "1", "-q:v", "2", full_path]
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return full_path
+            cmd = [
+                "ffmpeg",
+                "-y",
+                *input_args,
+                "-i",
+                direct_url,
+                *output_args,
+                # One encoder thread per process; the pool bounds the process count
+                "-threads",
+                "1",
+                full_path,
+            ]
+            subprocess.run(
+                cmd,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=CAPTURE_TIMEOUT + duration,
+            )
         except Exception as e:
             print(f"❌ [Capture Error] {e}")
+            self.capture_breaker.record_failure()
             return None
+        self.capture_breaker.record_success()
+        return full_path
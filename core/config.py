@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 
@@ -7,6 +9,53 @@ class Settings(BaseSettings):
     OWNER_ID: int
     ADMIN_ROLE_NAME: str
 
+    # Sharding: leave unset to let Discord recommend a shard count.
+    # SHARD_IDS is a JSON list (e.g. SHARD_IDS=[0,1]) and requires SHARD_COUNT.
+    SHARD_COUNT: Optional[int] = None
+    SHARD_IDS: Optional[list[int]] = None
+    # Number of processes launcher.py splits SHARD_COUNT across
+    SHARD_WORKERS: int = 1
+
+    # Gateway cache policy: bound the message cache (0 disables it) and choose which
+    # members discord.py keeps. "all" needs the privileged members intent.
+    MAX_MESSAGES: int = 200
+    MEMBER_CACHE: Literal["all", "voice", "none"] = "none"
+    # LRU of (guild, user) -> name/avatar/color used by the quote commands
+    MEMBER_PROFILE_CACHE_SIZE: int = 2048
+
+    # Quotes storage: one shared file, one file per guild, or DB_BUCKETS hashed files.
+    # Switch layouts with `python -m core.backup split`.
+    DB_LAYOUT: Literal["single", "guild", "bucket"] = "single"
+    DB_BUCKETS: int = 16
+    # Max SQLite files kept open at once (least recently used idle files are closed) and
+    # connections per file, i.e. how many commands can use one file at the same time
+    DB_MAX_OPEN: int = 32
+    DB_POOL_SIZE: int = 4
+
+    # !cctv stream lookups: seconds a found stream / an "offline" result is reused
+    # before yt-dlp scans the channel again
+    CCTV_STREAM_TTL: int = 3600
+    CCTV_OFFLINE_TTL: int = 60
+    # Captured frame output: bounding box (aspect ratio kept, never upscaled), format and
+    # quality 1-100. CCTV_CROPS maps "<game>_<side>" (or "<game>") to an ffmpeg crop "w:h:x:y"
+    # (expressions allowed), e.g. CCTV_CROPS={"sdvx_L": "iw/2:ih:0:0"}
+    CCTV_MAX_WIDTH: int = 1280
+    CCTV_MAX_HEIGHT: int = 720
+    CCTV_FORMAT: Literal["webp", "jpeg"] = "webp"
+    CCTV_QUALITY: int = 75
+    CCTV_CROPS: dict[str, str] = {}
+    # !cctv ... burst: frames tiled into one image, seconds apart; clip: seconds of video.
+    # CCTV_ENCODE_WORKERS caps concurrent ffmpeg processes.
+    CCTV_BURST_FRAMES: int = 4
+    CCTV_BURST_INTERVAL: float = 2.0
+    CCTV_CLIP_SECONDS: int = 4
+    CCTV_ENCODE_WORKERS: int = 2
+
+    # Hong Kong Observatory open data (point HKO_API_URL at a local stand-in for testing)
+    HKO_API_URL: str = "https://data.weather.gov.hk/weatherAPI/opendata/weather.php"
+    HKO_LANG: Literal["en", "tc", "sc"] = "en"
+    HKO_POLL_SECONDS: int = 300
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,380 @@
+import asyncio
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from core.config import settings
+
+logger = logging.getLogger("discord.db")
+
+# Several shard worker processes may write to the same SQLite file (see launcher.py).
+# WAL lets readers run alongside the single writer; the timeout makes a writer wait for
+# the lock instead of failing with "database is locked".
+DB_TIMEOUT = 30
+
+DB_ROOT = "db"
+SINGLE_DB = os.path.join(DB_ROOT, "quotes.db")
+LAYOUTS = ("single", "guild", "bucket")
+
+# Per-guild counters for 9upstats, kept current by triggers on every write path
+# (save, import, restore, delete, uses increments), so stats never scan the quotes table.
+WEEK = 7 * 86400
+
+# Moving uses from one quote to another (9updupes merge) isn't new usage: run after the
+# UPDATE, in the same transaction, to take back what stats_on_use credited to this week.
+UNCOUNT_WEEK_USES = f"""
+    UPDATE stats_week SET used = used - ?
+    WHERE guild_id = ? AND week = CAST(strftime('%s', 'now') AS INTEGER) / {WEEK}
+"""
+
+ROLLUP_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS stats_author (
+        guild_id INTEGER,
+        user_id INTEGER,
+        quotes INTEGER DEFAULT 0,
+        uses INTEGER DEFAULT 0,
+        PRIMARY KEY (guild_id, user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_adder (
+        guild_id INTEGER,
+        adder_user_id INTEGER,
+        quotes INTEGER DEFAULT 0,
+        PRIMARY KEY (guild_id, adder_user_id)
+    )
+    """,
+    # adder_user_id 0 = unknown (legacy rows). week = unix time // WEEK;
+    # "used" only counts uses made since the rollups were created.
+    """
+    CREATE TABLE IF NOT EXISTS stats_week (
+        guild_id INTEGER,
+        week INTEGER,
+        saved INTEGER DEFAULT 0,
+        used INTEGER DEFAULT 0,
+        PRIMARY KEY (guild_id, week)
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stats_on_insert AFTER INSERT ON quotes BEGIN
+        INSERT INTO stats_author (guild_id, user_id, quotes, uses)
+        VALUES (NEW.guild_id, NEW.user_id, 1, COALESCE(NEW.uses, 0))
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET
+            quotes = quotes + 1, uses = uses + excluded.uses;
+        INSERT INTO stats_adder (guild_id, adder_user_id, quotes)
+        VALUES (NEW.guild_id, COALESCE(NEW.adder_user_id, 0), 1)
+        ON CONFLICT (guild_id, adder_user_id) DO UPDATE SET quotes = quotes + 1;
+        INSERT INTO stats_week (guild_id, week, saved)
+        SELECT NEW.guild_id, NEW.added_timestamp / {WEEK}, 1
+        WHERE NEW.added_timestamp IS NOT NULL
+        ON CONFLICT (guild_id, week) DO UPDATE SET saved = saved + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stats_on_delete AFTER DELETE ON quotes BEGIN
+        UPDATE stats_author SET quotes = quotes - 1, uses = uses - COALESCE(OLD.uses, 0)
+        WHERE guild_id = OLD.guild_id AND user_id = OLD.user_id;
+        UPDATE stats_adder SET quotes = quotes - 1
+        WHERE guild_id = OLD.guild_id AND adder_user_id = COALESCE(OLD.adder_user_id, 0);
+        UPDATE stats_week SET saved = saved - 1
+        WHERE guild_id = OLD.guild_id AND week = OLD.added_timestamp / {WEEK};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stats_on_use AFTER UPDATE OF uses ON quotes BEGIN
+        UPDATE stats_author SET uses = uses + NEW.uses - OLD.uses
+        WHERE guild_id = NEW.guild_id AND user_id = NEW.user_id;
+        INSERT INTO stats_week (guild_id, week, used)
+        VALUES (NEW.guild_id, CAST(strftime('%s', 'now') AS INTEGER) / {WEEK}, NEW.uses - OLD.uses)
+        ON CONFLICT (guild_id, week) DO UPDATE SET used = used + excluded.used;
+    END
+    """,
+    # One-time backfill for databases created before the rollups existed. Runs in the
+    # same schema pass that creates the triggers, so no write is counted twice.
+    "CREATE TABLE IF NOT EXISTS stats_state (backfilled INTEGER)",
+    """
+    INSERT INTO stats_author (guild_id, user_id, quotes, uses)
+    SELECT guild_id, user_id, COUNT(*), COALESCE(SUM(uses), 0) FROM quotes
+    WHERE NOT EXISTS (SELECT 1 FROM stats_state)
+    GROUP BY guild_id, user_id
+    """,
+    """
+    INSERT INTO stats_adder (guild_id, adder_user_id, quotes)
+    SELECT guild_id, COALESCE(adder_user_id, 0), COUNT(*) FROM quotes
+    WHERE NOT EXISTS (SELECT 1 FROM stats_state)
+    GROUP BY guild_id, COALESCE(adder_user_id, 0)
+    """,
+    f"""
+    INSERT INTO stats_week (guild_id, week, saved)
+    SELECT guild_id, added_timestamp / {WEEK}, COUNT(*) FROM quotes
+    WHERE added_timestamp IS NOT NULL AND NOT EXISTS (SELECT 1 FROM stats_state)
+    GROUP BY guild_id, added_timestamp / {WEEK}
+    """,
+    "INSERT INTO stats_state SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM stats_state)",
+)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS quotes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER,
+        user_id INTEGER,
+        content TEXT,
+        timestamp TEXT,
+        channel_id INTEGER,
+        adder_user_id INTEGER,
+        added_timestamp INTEGER,
+        uses INTEGER DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_guild_user ON quotes(guild_id, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_uses ON quotes(uses DESC)",
+    # Checkpoints for 9upimport, so an interrupted import can resume
+    """
+    CREATE TABLE IF NOT EXISTS import_progress (
+        guild_id INTEGER,
+        channel_id INTEGER,
+        source TEXT,
+        last_message_id INTEGER,
+        imported INTEGER DEFAULT 0,
+        PRIMARY KEY (guild_id, channel_id, source)
+    )
+    """,
+    # Auto-reply trigger phrases (cogs/features/triggers.py)
+    """
+    CREATE TABLE IF NOT EXISTS triggers (
+        guild_id INTEGER,
+        phrase TEXT,
+        user_id INTEGER,
+        adder_user_id INTEGER,
+        PRIMARY KEY (guild_id, phrase)
+    )
+    """,
+    # MinHash LSH band hashes for near-duplicate detection (core/near_dup.py)
+    """
+    CREATE TABLE IF NOT EXISTS quote_lsh (
+        guild_id INTEGER,
+        band INTEGER,
+        hash INTEGER,
+        quote_id INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON quote_lsh(guild_id, band, hash)",
+    "CREATE INDEX IF NOT EXISTS idx_lsh_quote ON quote_lsh(guild_id, quote_id)",
+    # Quotes still waiting for their band hashes. Every insert lands here (imports and
+    # restores included) and leaves once indexed, so the save path finds the backlog
+    # with an indexed lookup instead of comparing the whole guild against quote_lsh.
+    """
+    CREATE TABLE IF NOT EXISTS quote_lsh_pending (
+        guild_id INTEGER,
+        quote_id INTEGER,
+        PRIMARY KEY (guild_id, quote_id)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS lsh_on_insert AFTER INSERT ON quotes BEGIN
+        INSERT OR IGNORE INTO quote_lsh_pending (guild_id, quote_id) VALUES (NEW.guild_id, NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS lsh_on_delete AFTER DELETE ON quotes BEGIN
+        DELETE FROM quote_lsh WHERE guild_id = OLD.guild_id AND quote_id = OLD.id;
+        DELETE FROM quote_lsh_pending WHERE guild_id = OLD.guild_id AND quote_id = OLD.id;
+    END
+    """,
+    # One-time backfill for databases whose quotes predate the pending table
+    "CREATE TABLE IF NOT EXISTS lsh_state (backfilled INTEGER)",
+    """
+    INSERT OR IGNORE INTO quote_lsh_pending (guild_id, quote_id)
+    SELECT q.guild_id, q.id FROM quotes q
+    WHERE NOT EXISTS (SELECT 1 FROM lsh_state) AND NOT EXISTS (
+        SELECT 1 FROM quote_lsh l WHERE l.guild_id = q.guild_id AND l.quote_id = q.id
+    )
+    """,
+    "INSERT INTO lsh_state SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM lsh_state)",
+    *ROLLUP_SCHEMA,
+)
+
+
+def connect(db_path: str):
+    return aiosqlite.connect(db_path, timeout=DB_TIMEOUT)
+
+
+def db_path_for(guild_id: int, layout: str, buckets: int, root: str = DB_ROOT) -> str:
+    """Maps a guild to its SQLite file for the given storage layout."""
+    if layout == "guild":
+        return os.path.join(root, "guilds", f"{guild_id}.db")
+    if layout == "bucket":
+        # crc32 rather than hash(): stable across processes and restarts
+        bucket = zlib.crc32(str(guild_id).encode()) % buckets
+        return os.path.join(root, "buckets", f"{bucket:03d}.db")
+    return os.path.join(root, "quotes.db")
+
+
+class _FilePool:
+    """Open connections to one SQLite file, handed out one command at a time each."""
+
+    __slots__ = ("idle", "size", "slots", "users", "ready", "init_lock", "closed")
+
+    def __init__(self, size: int):
+        self.idle = []  # connections nobody holds
+        self.size = 0  # connections open, idle or held
+        # One holder per connection, so transactions from different commands never
+        # interleave on a connection; up to `size` commands use the file in parallel
+        self.slots = asyncio.Semaphore(size)
+        self.users = 0  # holders + waiters; a pool with users is never evicted
+        self.ready = False  # schema created
+        self.init_lock = asyncio.Lock()
+        self.closed = False
+
+
+class QuoteDatabase:
+    """
+    Routes each guild to its SQLite file (one shared file, one per guild, or one per
+    hash bucket) and keeps a bounded LRU of files with open connections.
+    Each file gets a small pool of WAL connections, so commands on the same file run in
+    parallel like separate connections would. Idle files are closed when evicted; a file
+    in use is never closed, so the pool may briefly hold more than `max_open` files.
+    """
+
+    def __init__(
+        self, layout: str = "single", buckets: int = 16, max_open: int = 32, pool_size: int = 4
+    ):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown DB layout: {layout}")
+        self.layout = layout
+        self.buckets = buckets
+        self.max_open = max_open
+        self.pool_size = max(1, pool_size)
+        self._pools = OrderedDict()  # path -> _FilePool, least recently used first
+        self._draining = set()  # closed pools whose connections are still held
+
+    def path_for(self, guild_id: int) -> str:
+        return db_path_for(guild_id, self.layout, self.buckets)
+
+    @property
+    def open_count(self) -> int:
+        """Files with at least one open connection."""
+        return sum(1 for pool in self._pools.values() if pool.size)
+
+    def connection_counts(self) -> tuple[int, int]:
+        """(held, idle) open connections across every file."""
+        held = idle = 0
+        for pool in (*self._pools.values(), *self._draining):
+            held += pool.size - len(pool.idle)
+            idle += len(pool.idle)
+        return held, idle
+
+    async def _open_conn(self, path: str, pool: _FilePool):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = await connect(path)
+        try:
+            await conn.execute("PRAGMA journal_mode=WAL")
+            async with pool.init_lock:
+                if not pool.ready:
+                    for statement in SCHEMA:
+                        await conn.execute(statement)
+                    await conn.commit()
+                    pool.ready = True
+        except BaseException:
+            await conn.close()
+            raise
+        return conn
+
+    async def _acquire(self, path: str, pool: _FilePool):
+        await pool.slots.acquire()
+        if pool.idle:
+            return pool.idle.pop()
+        pool.size += 1
+        try:
+            return await self._open_conn(path, pool)
+        except BaseException:
+            pool.size -= 1
+            pool.slots.release()
+            raise
+
+    async def _release(self, pool: _FilePool, conn):
+        try:
+            # Never hand a half-finished transaction to the next user
+            if conn.in_transaction:
+                await conn.rollback()
+        finally:
+            if pool.closed:
+                pool.size -= 1
+                if not pool.size:
+                    self._draining.discard(pool)
+                await conn.close()
+            else:
+                pool.idle.append(conn)
+            pool.slots.release()
+
+    async def _evict(self):
+        # Close least recently used files nobody holds or waits for
+        for path in list(self._pools):
+            if self.open_count <= self.max_open:
+                break
+            pool = self._pools[path]
+            if pool.users or not pool.size:
+                continue
+            await self._close_pool(path, pool)
+
+    async def _close_pool(self, path: str, pool: _FilePool):
+        if self._pools.get(path) is pool:
+            del self._pools[path]
+        pool.closed = True
+        idle, pool.idle = pool.idle, []
+        pool.size -= len(idle)
+        if pool.size:
+            self._draining.add(pool)
+        for conn in idle:
+            await conn.close()
+
+    @asynccontextmanager
+    async def connect(self, guild_id: int):
+        """Yields a pooled connection to a guild's file, held exclusively until exit."""
+        path = self.path_for(guild_id)
+        pool = self._pools.get(path)
+        if pool is None:
+            pool = self._pools[path] = _FilePool(self.pool_size)
+        self._pools.move_to_end(path)
+
+        pool.users += 1
+        try:
+            conn = await self._acquire(path, pool)
+            try:
+                yield conn
+            finally:
+                await self._release(pool, conn)
+        finally:
+            pool.users -= 1
+            await self._evict()
+
+    async def close_all(self):
+        """Closes idle connections now; held ones close as their users finish."""
+        for path, pool in list(self._pools.items()):
+            await self._close_pool(path, pool)
+
+
+quote_db = QuoteDatabase(
+    settings.DB_LAYOUT, settings.DB_BUCKETS, settings.DB_MAX_OPEN, settings.DB_POOL_SIZE
+)
+
+
+# Insert that silently skips a quote already saved for the same guild/user/content.
+# Used by bulk paths (9upimport, backup restore) with executemany over dict rows.
+INSERT_QUOTE_IF_NEW = """
+    INSERT INTO quotes (
+    guild_id, user_id, content, timestamp,
+    channel_id, adder_user_id, added_timestamp, uses)
+    SELECT :guild_id, :user_id, :content, :timestamp,
+        :channel_id, :adder_user_id, :added_timestamp, :uses
+    WHERE NOT EXISTS (
+        SELECT 1 FROM quotes
+        WHERE guild_id = :guild_id AND user_id = :user_id AND content = :content
+    )
+"""
@@ -3,6 +3,7 @@ from discord.ext import commands
 
 from core.blacklist import blacklist_store
 from core.config import settings
+from core.rate_limit import rate_limits
 
 
 def is_owner():
@@ -21,7 +22,7 @@ def is_admin():
 
         role = discord.utils.get(ctx.author.roles, name=settings.ADMIN_ROLE_NAME)
         if role is None:
-            raise commands.MissingRole(settings.admin_role_name)
+            raise commands.MissingRole(settings.ADMIN_ROLE_NAME)
 
         return True
 
@@ -41,6 +42,29 @@ def not_blacklisted():
     return commands.check(predicate)
 
 
+class RateLimited(commands.CheckFailure):
+    def __init__(self, retry_after: float, scope: str, first: bool):
+        super().__init__(f"Rate limited ({scope}), retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+        self.first = first
+
+
+def rate_limited():
+    """Token-bucket limit per user, channel and guild (see core/rate_limit.py)."""
+
+    async def predicate(ctx):
+        if ctx.guild is None:
+            return True
+
+        limited = rate_limits.hit(ctx.command.name, ctx.guild.id, ctx.channel.id, ctx.author.id)
+        if limited is not None:
+            raise RateLimited(*limited)
+        return True
+
+    return commands.check(predicate)
+
+
 """
 def in_channel(allowed_channels: list[int]):
     def predicate(ctx: commands.Context) -> bool:
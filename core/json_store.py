@@ -0,0 +1,102 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single worker there
+    fcntl = None
+
+logger = logging.getLogger("core.json_store")
+
+# Seconds between checks for changes written by other processes
+RELOAD_INTERVAL = 1.0
+
+
+class SharedJSONFile:
+    """
+    A JSON object on disk that several bot processes (launcher.py workers) share.
+
+    A write takes an exclusive file lock, re-reads the file, applies the change and
+    atomically replaces it, so a worker never overwrites another worker's changes with
+    its stale copy. Reads are served from memory and pick up other workers' writes
+    when the file changes (checked at most every RELOAD_INTERVAL seconds).
+
+    Coroutines write with `await update_async(...)`: waiting for another process's
+    lock must not stall the event loop. `update` is the blocking form for threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._data = {}
+        self._version = None
+        self._checked = 0.0
+        # Serialises this process's writers (they share one tmp file name)
+        self._write_lock = threading.Lock()
+        self._reload()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _reload(self):
+        self._checked = time.monotonic()
+        version = self._stat()
+        if version == self._version:
+            return
+        self._version = version
+        if version is None:
+            self._data = {}
+            return
+        try:
+            with open(self.path, "r") as f:
+                self._data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            logger.error(f"Failed to load {self.path}. Keeping the last good copy.")
+
+    @property
+    def data(self) -> dict:
+        if time.monotonic() - self._checked >= RELOAD_INTERVAL:
+            self._reload()
+        return self._data
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def update(self, mutate):
+        """Applies `mutate(data)` to the latest file contents and saves; returns its result."""
+        with self._write_lock, self._locked():
+            self._reload()
+            # Mutate a copy and swap it in, so readers on other threads never see a
+            # half-applied change
+            data = copy.deepcopy(self._data)
+            result = mutate(data)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp, self.path)
+            self._data = data
+            self._version = self._stat()
+        return result
+
+    async def update_async(self, mutate):
+        """`update` in a worker thread, for use on the event loop."""
+        return await asyncio.to_thread(self.update, mutate)
@@ -1,23 +1,229 @@
+import ast
+import asyncio
+import importlib
+import importlib.abc
+import importlib.machinery
 import logging
 import os
+import sys
+import time
 
 logger = logging.getLogger("discord")
 
+# Extensions can declare load-order dependencies with a module-level literal:
+#   DEPENDS_ON = ("cogs.features.quotes_record",)
+DEPENDS_ON_ATTR = "DEPENDS_ON"
+
+
+def _inspect_extension(path: str):
+    """Statically checks a cog file for a `setup` entry point and its DEPENDS_ON list."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError) as e:
+        logger.error(f"❌ Could not parse {path}: {e}")
+        return False, ()
+
+    has_setup = False
+    depends_on = ()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "setup":
+            has_setup = True
+        elif isinstance(node, ast.Assign):
+            if any(isinstance(t, ast.Name) and t.id == DEPENDS_ON_ATTR for t in node.targets):
+                try:
+                    depends_on = tuple(ast.literal_eval(node.value))
+                except ValueError:
+                    logger.warning(f"⚠️ Ignoring non-literal {DEPENDS_ON_ATTR} in {path}")
+
+    return has_setup, depends_on
+
+
+def discover_extensions(root_dir: str = "cogs"):
+    """Returns {extension_name: depends_on} for every cog module that defines `setup`."""
+    extensions = {}
+    for root, dirs, files in os.walk(root_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.endswith(".py") or filename == "__init__.py":
+                continue
+
+            relative_path = os.path.relpath(root, ".")
+            module_path = relative_path.replace(os.path.sep, ".")
+            extension_name = f"{module_path}.{filename[:-3]}"
+
+            has_setup, depends_on = _inspect_extension(os.path.join(root, filename))
+            if not has_setup:
+                logger.info(f"⏭️ Skipped {extension_name} (no setup entry point)")
+                continue
+            extensions[extension_name] = depends_on
+
+    return extensions
+
+
+def _cyclic_extensions(extensions) -> set:
+    """Returns the extensions that can never load because they sit on (or behind) a cycle."""
+    remaining = {name: {d for d in deps if d in extensions} for name, deps in extensions.items()}
+    ready = [name for name, deps in remaining.items() if not deps]
+    while ready:
+        name = ready.pop()
+        del remaining[name]
+        for other, deps in remaining.items():
+            if name in deps:
+                deps.discard(name)
+                if not deps:
+                    ready.append(other)
+    return set(remaining)
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps an extension's loader to time its module body and its `setup(bot)`."""
+
+    def __init__(self, loader, entry):
+        self.loader = loader
+        self.entry = entry
+
+    def __getattr__(self, name):  # get_source, get_code, ... for tracebacks and inspect
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        t0 = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.entry["import_ms"] = (time.perf_counter() - t0) * 1000
+
+        setup = getattr(module, "setup", None)
+        if setup is None:
+            return
+        entry = self.entry
+
+        async def timed_setup(bot):
+            t0 = time.perf_counter()
+            try:
+                await setup(bot)
+            finally:
+                entry["setup_ms"] = (time.perf_counter() - t0) * 1000
+
+        module.setup = timed_setup
+
+
+class _TimedExtensionFinder(importlib.abc.MetaPathFinder):
+    """
+    Installed while load_cogs runs: gives the extensions in `report` a timed loader,
+    so the single load_extension call reports import and setup time separately.
+    """
+
+    def __init__(self, report):
+        self.report = report
+
+    def find_spec(self, fullname, path=None, target=None):
+        entry = self.report.get(fullname)
+        if entry is None:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+        if spec is not None and spec.loader is not None:
+            spec.loader = _TimedLoader(spec.loader, entry)
+        return spec
+
+
+def format_startup_report(report) -> str:
+    lines = []
+    entries = sorted(report.values(), key=lambda e: e["load_ms"], reverse=True)
+    for entry in entries:
+        status = "✅" if entry["status"] == "loaded" else "❌"
+        lines.append(
+            f"{status} {entry['name']}: {entry['load_ms']:.1f}ms "
+            f"(import {entry['import_ms']:.1f}ms, setup {entry['setup_ms']:.1f}ms)"
+        )
+    return "\n".join(lines)
+
 
 async def load_cogs(bot):
     if not os.path.exists("cogs"):
         logger.warning("No 'cogs' directory found.")
         return
 
-    for root, dirs, files in os.walk("./cogs"):
-        for filename in files:
-            if filename.endswith(".py") and filename != "__init__.py":
-                relative_path = os.path.relpath(root, ".")
-                module_path = relative_path.replace(os.path.sep, ".")
-                extension_name = f"{module_path}.{filename[:-3]}"
+    started = time.perf_counter()
+    extensions = discover_extensions("cogs")
+    report = {
+        name: {
+            "name": name,
+            "load_ms": 0.0,
+            "import_ms": 0.0,
+            "setup_ms": 0.0,
+            "status": "pending",
+            "error": None,
+        }
+        for name in extensions
+    }
+    bot.startup_report = report
 
-                try:
-                    await bot.load_extension(extension_name)
-                    logger.info(f"📦 Loaded extension: {extension_name}")
-                except Exception as e:
-                    logger.error(f"❌ Failed to load {extension_name}: {e}", exc_info=True)
+    for name in _cyclic_extensions(extensions):
+        report[name]["status"] = "failed"
+        report[name]["error"] = "dependency cycle"
+        logger.error(f"❌ Not loading {name}: dependency cycle")
+
+    # load_extension executes the module itself (it does not reuse sys.modules), so each
+    # cog is imported once, by it; the timed finder splits that call into the module
+    # import and setup + cog_load. Independent extensions load concurrently.
+    done = {name: asyncio.Event() for name in extensions}
+
+    async def _load(name):
+        entry = report[name]
+        try:
+            if entry["status"] == "failed":
+                return
+
+            for dep in extensions[name]:
+                if dep not in done:
+                    raise RuntimeError(f"unknown dependency {dep}")
+                await done[dep].wait()
+                if report[dep]["status"] != "loaded":
+                    raise RuntimeError(f"dependency {dep} failed to load")
+
+            t0 = time.perf_counter()
+            try:
+                await bot.load_extension(name)
+            finally:
+                entry["load_ms"] = (time.perf_counter() - t0) * 1000
+            entry["status"] = "loaded"
+            logger.info(
+                f"📦 Loaded extension: {name} (import {entry['import_ms']:.1f}ms, "
+                f"setup {entry['setup_ms']:.1f}ms)"
+            )
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            logger.error(f"❌ Failed to load {name}: {e}", exc_info=True)
+        finally:
+            done[name].set()
+
+    finder = _TimedExtensionFinder(report)
+    sys.meta_path.insert(0, finder)
+    try:
+        await asyncio.gather(*(_load(name) for name in extensions))
+    finally:
+        sys.meta_path.remove(finder)
+
+    total_ms = (time.perf_counter() - started) * 1000
+    bot.startup_report_total_ms = total_ms
+    logger.info(f"⏱️ Cog startup finished in {total_ms:.1f}ms\n{format_startup_report(report)}")
+
+
+# Optional heavy dependencies that cogs import lazily on first use.
+HEAVY_MODULES = ("yt_dlp", "psutil")
+
+
+async def preload_heavy_modules(modules=HEAVY_MODULES):
+    """Warms sys.modules in a worker thread once the bot is READY."""
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            await asyncio.to_thread(importlib.import_module, name)
+            logger.info(f"📥 Preloaded {name} in {(time.perf_counter() - t0) * 1000:.1f}ms")
+        except ImportError as e:
+            logger.warning(f"⚠️ Could not preload {name}: {e}")
@@ -3,6 +3,9 @@ import os
 import sys
 from logging.handlers import RotatingFileHandler
 
+# Overridden per worker by launcher.py so processes never rotate the same file
+LOG_FILE = os.environ.get("LOG_FILE", "logs/discord.log")
+
 
 def setup_logging():
     if not os.path.exists("logs"):
@@ -28,7 +31,7 @@ def setup_logging():
 
     # File Handler
     file_handler = RotatingFileHandler(
-        filename="logs/discord.log", encoding="utf-8", maxBytes=32 * 1024 * 1024, backupCount=5
+        filename=LOG_FILE, encoding="utf-8", maxBytes=32 * 1024 * 1024, backupCount=5
     )
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -0,0 +1,117 @@
+import re
+import time
+from collections import OrderedDict
+
+import discord
+from discord.ext import commands
+
+from core.config import settings
+from core.rest import rest
+
+# Profiles go stale when users rename or change avatars; refresh them occasionally.
+PROFILE_TTL = 3600
+
+
+class CachedAvatar:
+    __slots__ = ("url",)
+
+    def __init__(self, url):
+        self.url = url
+
+
+class MemberProfile:
+    """The few Member attributes the quote commands render, without holding a Member."""
+
+    __slots__ = ("id", "display_name", "display_avatar", "color", "bot", "cached_at")
+
+    def __init__(self, user_id, display_name, avatar_url, color, bot=False):
+        self.id = user_id
+        self.display_name = display_name
+        self.display_avatar = CachedAvatar(avatar_url)
+        self.color = color
+        self.bot = bot
+        self.cached_at = time.monotonic()
+
+    @classmethod
+    def from_member(cls, member):
+        return cls(
+            member.id, member.display_name, member.display_avatar.url, member.color, member.bot
+        )
+
+
+class MemberProfileCache:
+    """Bounded LRU of (guild_id, user_id) -> MemberProfile."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, guild_id: int, user_id: int):
+        key = (guild_id, user_id)
+        profile = self.data.get(key)
+        if profile is None or time.monotonic() - profile.cached_at > PROFILE_TTL:
+            if profile is not None:
+                del self.data[key]
+            self.misses += 1
+            return None
+
+        self.data.move_to_end(key)
+        self.hits += 1
+        return profile
+
+    def put(self, guild_id: int, profile: MemberProfile):
+        key = (guild_id, profile.id)
+        self.data[key] = profile
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+        return profile
+
+    def put_member(self, member: discord.Member):
+        return self.put(member.guild.id, MemberProfile.from_member(member))
+
+    async def resolve(self, guild: discord.Guild, user_id: int):
+        """Member cache -> profile LRU -> REST. Returns None if the user left the guild."""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        profile = self.get(guild.id, user_id)
+        if profile is not None:
+            return profile
+
+        try:
+            member = await rest.request(
+                f"members:{guild.id}",
+                lambda: guild.fetch_member(user_id),
+                dedup_key=("member", guild.id, user_id),
+            )
+        except discord.NotFound:
+            return None
+        self.put_member(member)
+        return member
+
+
+member_profiles = MemberProfileCache(settings.MEMBER_PROFILE_CACHE_SIZE)
+
+
+class CachedMember(commands.MemberConverter):
+    """MemberConverter that consults the profile LRU before querying the gateway or REST."""
+
+    async def convert(self, ctx, argument):
+        match = self._get_id_match(argument) or re.match(r"<@!?([0-9]{15,20})>$", argument)
+        if match and ctx.guild:
+            user_id = int(match.group(1))
+            cached = ctx.guild.get_member(user_id) or discord.utils.get(
+                ctx.message.mentions, id=user_id
+            )
+            if cached is None:
+                profile = member_profiles.get(ctx.guild.id, user_id)
+                if profile is not None:
+                    return profile
+
+        member = await super().convert(ctx, argument)
+        member_profiles.put_member(member)
+        return member
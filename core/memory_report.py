@@ -0,0 +1,129 @@
+import gc
+import os
+import tracemalloc
+from collections import Counter
+
+import discord
+
+from core.blacklist import blacklist_store
+from core.db import quote_db
+from core.member_cache import member_profiles
+from core.quote_index import quote_index
+from core.rate_limit import rate_limits
+from core.server_settings import server_settings
+
+# Allocation sites listed per report
+TOP_SITES = 25
+
+# Tracing and import machinery are noise, not leaks
+_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n:.0f} B"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+def _site(trace) -> str:
+    frame = trace.traceback[0]
+    return f"{os.path.relpath(frame.filename)}:{frame.lineno}"
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_NOISE)
+
+
+def top_sites(snapshot, limit: int = TOP_SITES) -> list:
+    """Lines of the biggest live allocation sites, by file and line."""
+    lines = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        lines.append(f"{_size(stat.size):>12} {stat.count:>9} blocks  {_site(stat)}")
+    return lines
+
+
+def diff_sites(old, new, limit: int = TOP_SITES) -> list:
+    """Lines of the sites that grew (or shrank) the most between two snapshots."""
+    lines = []
+    for stat in new.compare_to(old, "lineno")[:limit]:
+        if not stat.size_diff:
+            break
+        sign = "+" if stat.size_diff > 0 else ""
+        lines.append(
+            f"{sign + _size(stat.size_diff):>12} {stat.count_diff:>+9} blocks  "
+            f"(now {_size(stat.size)})  {_site(stat)}"
+        )
+    return lines
+
+
+def live_views() -> list:
+    """
+    (class name, instances, rows held) for every live discord.ui.View.
+    Walks every object on the heap: run it in a worker thread (asyncio.to_thread).
+    """
+    views = Counter()
+    rows = Counter()
+    for obj in gc.get_objects():
+        if isinstance(obj, discord.ui.View):
+            name = type(obj).__name__
+            views[name] += 1
+            # PaginationView keeps every row it pages through
+            data = getattr(obj, "data", None)
+            if isinstance(data, (list, tuple)):
+                rows[name] += len(data)
+    return [(name, count, rows[name]) for name, count in views.most_common()]
+
+
+def cache_sizes(bot) -> list:
+    """(cache, size) pairs for the discord.py caches and the bot's own stores."""
+    guilds = getattr(bot, "guilds", ())
+    sizes = [
+        ("discord.py guilds", len(guilds)),
+        ("discord.py members", sum(len(g.members) for g in guilds)),
+        ("discord.py users", len(getattr(bot, "users", ()))),
+        ("discord.py messages", len(getattr(bot, "cached_messages", ()))),
+        ("discord.py emojis", len(getattr(bot, "emojis", ()))),
+        ("server_settings guilds", len(server_settings.data)),
+        ("blacklist_store guilds", len(blacklist_store.data)),
+        ("quote_index guilds", len(quote_index.indexes)),
+        ("quote_index recent channels", len(quote_index.recent)),
+        ("member_profiles", len(member_profiles.data)),
+        ("rate_limits buckets", len(rate_limits.buckets)),
+        ("quote_db open files", quote_db.open_count),
+        ("quote_db open connections", sum(quote_db.connection_counts())),
+    ]
+    cctv = bot.get_cog("CCTV")
+    if cctv is not None:
+        sizes.append(("cctv stream cache", len(cctv.monitor.cache)))
+    dllm = bot.get_cog("dllm")
+    if dllm is not None:
+        sizes.append(("dllm index terms", len(dllm.index.tags)))
+    return sizes
+
+
+def render(title: str, sites_title: str, sites: list, views: list, bot) -> str:
+    """The plain text report sent back as an attachment (`views` from live_views())."""
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [
+        title,
+        f"Traced: {_size(current)} now, {_size(peak)} peak "
+        f"(tracemalloc itself: {_size(tracemalloc.get_tracemalloc_memory())})",
+        "",
+        f"== {sites_title} ==",
+        *(sites or ["(nothing)"]),
+        "",
+        "== Live discord.ui.View ==",
+    ]
+    lines += [f"{count:>7} {name} ({rows} rows held)" for name, count, rows in views]
+    if not views:
+        lines.append("(none)")
+    lines += ["", "== Caches =="]
+    lines += [f"{size:>9} {name}" for name, size in cache_sizes(bot)]
+    return "\n".join(lines) + "\n"
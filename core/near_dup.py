@@ -0,0 +1,201 @@
+"""
+Near-duplicate detection for quotes with character-shingle MinHash and LSH buckets.
+
+Every indexed quote stores one hash per LSH band in the quote_lsh table. A new quote
+only has to look at quotes sharing a band hash with it (an indexed lookup), then the
+few candidates are confirmed with exact shingle Jaccard similarity.
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import unicodedata
+import zlib
+
+SHINGLE_SIZE = 3
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# Jaccard similarity at which two quotes are treated as the same quote.
+# With 8 bands of 4 rows, pairs above ~0.6 almost always share a bucket.
+THRESHOLD = 0.8
+# Quotes indexed per call on the save path; 9updupes indexes the rest
+INDEX_BATCH = 500
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures must be identical across processes and restarts
+_rng = random.Random(9)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_IGNORED = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """
+    Case, width, whitespace, punctuation and emoji differences don't count, unless
+    that is all the quote has: then only case and whitespace are ignored, so "😂😂😂"
+    and "???" stay different quotes.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _IGNORED.sub("", text) or "".join(text.split())
+
+
+def shingles(text: str) -> set:
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0  # nothing to compare (blank quotes) is never a match
+    return len(a & b) / len(a | b)
+
+
+def signature(shingle_set: set) -> list:
+    hashes = [zlib.crc32(s.encode()) for s in shingle_set] or [0]
+    return [min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMS]
+
+
+def band_hashes(sig: list) -> list:
+    """One signed 64-bit hash per band, so it fits an SQLite INTEGER."""
+    out = []
+    for band in range(BANDS):
+        chunk = sig[band * ROWS : (band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(chunk).encode(), digest_size=8).digest()
+        out.append(int.from_bytes(digest, "big", signed=True))
+    return out
+
+
+def lsh_rows(guild_id: int, quote_id: int, content: str) -> list:
+    hashes = band_hashes(signature(shingles(content)))
+    return [(guild_id, band, h, quote_id) for band, h in enumerate(hashes)]
+
+
+INSERT_LSH = "INSERT INTO quote_lsh (guild_id, band, hash, quote_id) VALUES (?, ?, ?, ?)"
+DELETE_PENDING = "DELETE FROM quote_lsh_pending WHERE guild_id = ? AND quote_id = ?"
+SELECT_PENDING = """
+    SELECT q.id, q.content FROM quote_lsh_pending p
+    JOIN quotes q ON q.id = p.quote_id
+    WHERE p.guild_id = ?
+    ORDER BY p.quote_id LIMIT ?
+"""
+
+
+async def add_to_index(db, guild_id: int, quote_id: int, content: str):
+    await db.executemany(INSERT_LSH, lsh_rows(guild_id, quote_id, content))
+    await db.execute(DELETE_PENDING, (guild_id, quote_id))
+
+
+async def index_pending(db, guild_id: int, limit: int = INDEX_BATCH) -> int:
+    """
+    Indexes quotes added without a signature (9upimport, restores, older databases),
+    up to `limit` per call. Returns how many were indexed; the caller commits.
+    The backlog comes from quote_lsh_pending, so an empty one costs one index probe.
+    """
+    async with db.execute(SELECT_PENDING, (guild_id, limit)) as cursor:
+        pending = await cursor.fetchall()
+    if not pending:
+        return 0
+
+    rows = await asyncio.to_thread(
+        lambda: [r for qid, content in pending for r in lsh_rows(guild_id, qid, content)]
+    )
+    await db.executemany(INSERT_LSH, rows)
+    await db.executemany(DELETE_PENDING, [(guild_id, qid) for qid, _ in pending])
+    return len(pending)
+
+
+async def find_near_duplicate(db, guild_id: int, user_id: int, content: str):
+    """Returns (quote_id, content, similarity) of the closest saved quote by the same
+    author at or above THRESHOLD, or None."""
+    target = shingles(content)
+    hashes = band_hashes(signature(target))
+    clauses = " OR ".join("(band = ? AND hash = ?)" for _ in hashes)
+    params = [p for band, h in enumerate(hashes) for p in (band, h)]
+
+    async with db.execute(
+        f"""
+        SELECT q.id, q.content FROM quotes q
+        WHERE q.guild_id = ? AND q.user_id = ? AND q.id IN (
+            SELECT quote_id FROM quote_lsh WHERE guild_id = ? AND ({clauses})
+        )
+        """,
+        (guild_id, user_id, guild_id, *params),
+    ) as cursor:
+        candidates = await cursor.fetchall()
+
+    best = None
+    for quote_id, other in candidates:
+        similarity = jaccard(target, shingles(other))
+        if similarity >= THRESHOLD and (best is None or similarity > best[2]):
+            best = (quote_id, other, similarity)
+    return best
+
+
+async def scan_guild(db, guild_id: int) -> list:
+    """
+    Finds clusters of near-duplicate quotes by the same author.
+    Returns a list of clusters, each a list of (id, user_id, content, uses), oldest first.
+    """
+    async with db.execute(
+        """
+        SELECT GROUP_CONCAT(quote_id) FROM quote_lsh WHERE guild_id = ?
+        GROUP BY band, hash HAVING COUNT(*) > 1
+        """,
+        (guild_id,),
+    ) as cursor:
+        buckets = [[int(i) for i in row[0].split(",")] for row in await cursor.fetchall()]
+    if not buckets:
+        return []
+
+    ids = sorted({qid for bucket in buckets for qid in bucket})
+    quotes = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start : start + 500]
+        async with db.execute(
+            f"SELECT id, user_id, content, uses FROM quotes "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        ) as cursor:
+            for row in await cursor.fetchall():
+                quotes[row[0]] = row
+
+    def cluster():
+        parent = {}
+
+        def find(x):
+            while parent.get(x, x) != x:
+                x = parent[x]
+            return x
+
+        cached = {}
+
+        def shingles_of(qid):
+            if qid not in cached:
+                cached[qid] = shingles(quotes[qid][2])
+            return cached[qid]
+
+        checked = set()
+        for bucket in buckets:
+            bucket = [qid for qid in bucket if qid in quotes]
+            for i, a in enumerate(bucket):
+                for b in bucket[i + 1 :]:
+                    pair = (min(a, b), max(a, b))
+                    if pair in checked or quotes[a][1] != quotes[b][1]:
+                        continue
+                    checked.add(pair)
+                    if jaccard(shingles_of(a), shingles_of(b)) >= THRESHOLD:
+                        parent[find(max(a, b))] = find(min(a, b))
+
+        groups = {}
+        for qid in parent:
+            groups.setdefault(find(qid), set()).add(qid)
+        return [
+            [quotes[qid] for qid in sorted(members | {root})] for root, members in groups.items()
+        ]
+
+    return await asyncio.to_thread(cluster)
@@ -0,0 +1,256 @@
+import random
+import time
+from collections import OrderedDict, deque
+
+from core.db import quote_db
+
+# Selection modes for 9up. "uniform" is the plain ORDER BY RANDOM() pick.
+MODES = ("uniform", "popular", "rare", "recent")
+# "recent": a quote added this long before another is half as likely to be picked
+RECENCY_HALF_LIFE = 30 * 86400
+# Guild indexes kept in memory at once
+MAX_INDEXES = 64
+# Channels whose recent picks are remembered for the no-repeat window
+MAX_CHANNELS = 4096
+# Resamples before accepting a repeat (tiny guilds can't avoid repeats)
+NO_REPEAT_TRIES = 8
+# Float drift from incremental updates is reset by rebuilding after this many
+REBUILD_AFTER_UPDATES = 100_000
+
+
+class FenwickTree:
+    """
+    Prefix sums over non-negative weights: O(log n) point update, append and
+    weighted sampling, so weighted picks never rescan the whole guild.
+    """
+
+    def __init__(self, weights=()):
+        self.weights = list(weights)
+        self.tree = [0.0] + self.weights
+        size = len(self.tree)
+        for i in range(1, size):  # O(n) build
+            parent = i + (i & -i)
+            if parent < size:
+                self.tree[parent] += self.tree[i]
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.weights)
+
+    def _prefix(self, i: int) -> float:
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    @property
+    def total(self) -> float:
+        return self._prefix(len(self.weights))
+
+    def set(self, pos: int, weight: float):
+        delta = weight - self.weights[pos]
+        self.weights[pos] = weight
+        i = pos + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+        self.updates += 1
+
+    def append(self, weight: float):
+        i = len(self.tree)
+        # Node i covers (i - lowbit(i), i]; everything but the new weight already exists
+        self.tree.append(weight + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self.weights.append(weight)
+
+    def find(self, target: float) -> int:
+        """Position whose cumulative weight range contains `target` (0 <= target < total)."""
+        pos = 0
+        step = 1 << (len(self.tree).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt < len(self.tree) and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return min(pos, len(self.weights) - 1)
+
+    def sample(self, rng=random):
+        total = self.total
+        if total <= 0:
+            return None
+        return self.find(rng.random() * total)
+
+
+class GuildQuoteIndex:
+    """A guild's clean quotes (id, author, uses, added time) with one tree per mode."""
+
+    def __init__(self, rows):
+        self.ids = []
+        self.positions = {}  # quote id -> position
+        self.users = []
+        self.uses = []
+        self.added = []
+        self.alive = []
+        self.by_user = {}  # user id -> positions of their quotes
+        self.user_slot = []  # position -> its index in by_user[author]
+        # Recency weights are relative to this; exponential decay is shift-invariant,
+        # so weights never need refreshing as time passes.
+        self.reference = time.time()
+        self.trees = {}
+        # (user id, mode) -> tree over by_user[user id], built when that member is asked for
+        self.user_trees = {}
+        for row in rows:
+            self._append(*row)
+
+    def _append(self, quote_id, user_id, uses, added_ts):
+        pos = len(self.ids)
+        self.positions[quote_id] = pos
+        by_user = self.by_user.setdefault(user_id, [])
+        self.user_slot.append(len(by_user))
+        by_user.append(pos)
+        self.ids.append(quote_id)
+        self.users.append(user_id)
+        self.uses.append(uses or 0)
+        self.added.append(added_ts or 0)
+        self.alive.append(True)
+
+    def weight(self, mode: str, pos: int) -> float:
+        if not self.alive[pos]:
+            return 0.0
+        if mode == "popular":
+            return self.uses[pos] + 1.0
+        if mode == "rare":
+            return 1.0 / (self.uses[pos] + 1)
+        if mode == "recent":
+            exponent = (self.added[pos] - self.reference) / RECENCY_HALF_LIFE
+            return 2.0 ** max(-60.0, min(60.0, exponent))
+        return 1.0
+
+    def _tree(self, mode: str) -> FenwickTree:
+        tree = self.trees.get(mode)
+        if tree is None or tree.updates > REBUILD_AFTER_UPDATES:
+            tree = self.trees[mode] = FenwickTree(
+                self.weight(mode, pos) for pos in range(len(self.ids))
+            )
+        return tree
+
+    def _user_tree(self, user_id, mode: str):
+        key = (user_id, mode)
+        tree = self.user_trees.get(key)
+        if tree is None or tree.updates > REBUILD_AFTER_UPDATES:
+            tree = self.user_trees[key] = FenwickTree(
+                self.weight(mode, pos) for pos in self.by_user[user_id]
+            )
+        return tree
+
+    def _refresh(self, pos: int):
+        for mode, tree in self.trees.items():
+            tree.set(pos, self.weight(mode, pos))
+        for mode in MODES:
+            tree = self.user_trees.get((self.users[pos], mode))
+            if tree is not None:
+                tree.set(self.user_slot[pos], self.weight(mode, pos))
+
+    def used(self, quote_id: int):
+        pos = self.positions.get(quote_id)
+        if pos is not None:
+            self.uses[pos] += 1
+            self._refresh(pos)
+
+    def added_quote(self, quote_id, user_id, added_ts):
+        self._append(quote_id, user_id, 0, added_ts)
+        pos = len(self.ids) - 1
+        for mode, tree in self.trees.items():
+            tree.append(self.weight(mode, pos))
+        for mode in MODES:
+            tree = self.user_trees.get((user_id, mode))
+            if tree is not None:
+                tree.append(self.weight(mode, pos))
+
+    def deleted(self, quote_id: int):
+        pos = self.positions.pop(quote_id, None)
+        if pos is not None:
+            self.alive[pos] = False
+            self._refresh(pos)
+
+    def sample(self, mode: str, user_id=None, exclude=()):
+        """Returns a weighted-random quote id, avoiding `exclude` when possible."""
+        if user_id is None:
+            pick = self._tree(mode).sample
+        else:
+            # Same as the guild-wide pick, over a tree of just this member's quotes
+            if user_id not in self.by_user:
+                return None
+            tree, positions = self._user_tree(user_id, mode), self.by_user[user_id]
+
+            def pick():
+                slot = tree.sample()
+                return None if slot is None else positions[slot]
+
+        pos = None
+        for _ in range(NO_REPEAT_TRIES):
+            pos = pick()
+            if pos is None or self.ids[pos] not in exclude:
+                break
+        return None if pos is None else self.ids[pos]
+
+
+class QuoteIndexCache:
+    """LRU of per-guild indexes plus each channel's recently posted quote ids."""
+
+    def __init__(self, max_indexes: int = MAX_INDEXES):
+        self.max_indexes = max_indexes
+        self.indexes = OrderedDict()  # guild_id -> GuildQuoteIndex
+        self.recent = OrderedDict()  # channel_id -> deque of quote ids
+
+    async def get(self, guild_id: int) -> GuildQuoteIndex:
+        index = self.indexes.get(guild_id)
+        if index is not None:
+            self.indexes.move_to_end(guild_id)
+            return index
+
+        async with quote_db.connect(guild_id) as db:
+            async with db.execute(
+                """
+                SELECT id, user_id, uses, added_timestamp FROM quotes
+                WHERE guild_id = ? AND content NOT LIKE '%http%'
+                ORDER BY id
+                """,
+                (guild_id,),
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        index = self.indexes[guild_id] = GuildQuoteIndex(rows)
+        while len(self.indexes) > self.max_indexes:
+            self.indexes.popitem(last=False)
+        return index
+
+    # Write-path hooks; guilds without a loaded index are simply skipped
+    def used(self, guild_id: int, quote_id: int):
+        if guild_id in self.indexes:
+            self.indexes[guild_id].used(quote_id)
+
+    def added(self, guild_id: int, quote_id: int, user_id: int, content: str, added_ts: int):
+        if guild_id in self.indexes and "http" not in content:
+            self.indexes[guild_id].added_quote(quote_id, user_id, added_ts)
+
+    def deleted(self, guild_id: int, quote_id: int):
+        if guild_id in self.indexes:
+            self.indexes[guild_id].deleted(quote_id)
+
+    def invalidate(self, guild_id: int):
+        """For bulk writes (imports); the index is rebuilt on next use."""
+        self.indexes.pop(guild_id, None)
+
+    def recent_picks(self, channel_id: int, window: int):
+        picks = self.recent.get(channel_id)
+        if picks is None or picks.maxlen != window:
+            picks = self.recent[channel_id] = deque(picks or (), maxlen=window)
+        self.recent.move_to_end(channel_id)
+        while len(self.recent) > MAX_CHANNELS:
+            self.recent.popitem(last=False)
+        return picks
+
+
+quote_index = QuoteIndexCache()
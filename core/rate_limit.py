@@ -0,0 +1,111 @@
+import time
+from collections import OrderedDict, defaultdict
+
+from core.server_settings import server_settings
+
+SCOPES = ("user", "channel", "guild")
+
+# command -> scope -> (uses per minute, burst). Guilds override these through the
+# "rate_limits" server setting; a scope set to 0 per minute is unlimited.
+DEFAULT_LIMITS = {
+    "9up": {"user": (12, 4), "channel": (30, 8), "guild": (120, 30)},
+    "save": {"user": (6, 3), "channel": (20, 6), "guild": (60, 20)},
+    "dllm": {"user": (15, 5), "channel": (30, 10), "guild": (120, 30)},
+}
+
+# Buckets kept in memory at most; a full (idle) bucket is the same as no bucket
+MAX_BUCKETS = 50_000
+# Least recently used buckets checked for idleness on each insert
+EVICT_SCAN = 8
+
+
+class _Bucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "warned")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.warned = False
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_idle(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """
+    Token buckets per (command, user), (command, channel) and (command, guild).
+    A command runs only if every scope has a token; then each scope pays one, so a
+    rejected call costs nothing. Buckets refill lazily, and idle ones are evicted.
+    """
+
+    def __init__(self, defaults=None, max_buckets=MAX_BUCKETS):
+        self.defaults = DEFAULT_LIMITS if defaults is None else defaults
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()  # (command, scope, id) -> _Bucket, LRU order
+        self.stats = defaultdict(lambda: {"allowed": 0, "limited": 0})  # command -> counts
+        self.limited_by_scope = defaultdict(int)  # (command, scope) -> rejections
+
+    def limits_for(self, guild_id: int, command: str) -> dict:
+        """Effective scope -> (per minute, burst) for a command in a guild."""
+        limits = dict(self.defaults.get(command, {}))
+        overrides = (server_settings.get_val(guild_id, "rate_limits") or {}).get(command, {})
+        for scope, value in overrides.items():
+            limits[scope] = tuple(value)
+        return {scope: v for scope, v in limits.items() if v and v[0] > 0}
+
+    def _bucket(self, key, per_minute: float, burst: int, now: float) -> _Bucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            bucket = self.buckets[key] = _Bucket(per_minute / 60, max(1, burst), now)
+        else:
+            self.buckets.move_to_end(key)
+            # Limits may have been retuned since the bucket was created
+            bucket.rate, bucket.capacity = per_minute / 60, max(1, burst)
+            bucket.refill(now)
+        return bucket
+
+    def _evict(self, now: float):
+        for _ in range(min(EVICT_SCAN, len(self.buckets))):
+            key, bucket = next(iter(self.buckets.items()))
+            if not bucket.is_idle(now) and len(self.buckets) < self.max_buckets:
+                break
+            del self.buckets[key]
+
+    def hit(self, command: str, guild_id: int, channel_id: int, user_id: int, now=None):
+        """
+        Takes one token in every scope, or none. Returns None when allowed, else
+        (retry_after, scope, first) where `first` is True for the first rejection since
+        the bucket last allowed a call (worth telling the user once, not on every spam).
+        """
+        limits = self.limits_for(guild_id, command)
+        if not limits:
+            return None
+        now = time.monotonic() if now is None else now
+        ids = {"user": user_id, "channel": channel_id, "guild": guild_id}
+
+        buckets = []
+        for scope, (per_minute, burst) in limits.items():
+            bucket = self._bucket((command, scope, ids[scope]), per_minute, burst, now)
+            if bucket.tokens < 1:
+                self.stats[command]["limited"] += 1
+                self.limited_by_scope[(command, scope)] += 1
+                first, bucket.warned = not bucket.warned, True
+                return (1 - bucket.tokens) / bucket.rate, scope, first
+            buckets.append(bucket)
+
+        for bucket in buckets:
+            bucket.tokens -= 1
+            bucket.warned = False
+        self.stats[command]["allowed"] += 1
+        return None
+
+
+rate_limits = RateLimiter()
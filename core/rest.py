@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger("discord.rest")
+
+# Priorities (lower runs first)
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Stay under Discord's 50 req/s global limit, leaving headroom for discord.py's own calls.
+# Webhook executes authenticate with the webhook token and don't count against it.
+GLOBAL_RATE = 40
+GLOBAL_BURST = 40
+# discord.py already waits on each route's real bucket (from the X-RateLimit-* response
+# headers) and retries 429s, so this only stops one busy route from hogging the queue.
+# It is set above Discord's per-route limits so the real limit, not a guess, applies.
+ROUTE_RATE = 10
+ROUTE_BURST = 10
+MAX_ROUTES = 1024
+
+# Background work that can't start in time is shed instead of piling up
+MAX_BACKGROUND_QUEUE = 50
+MAX_BACKGROUND_WAIT = 10
+
+
+class RequestShed(Exception):
+    """Raised for background requests dropped because the budget is exhausted."""
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RestScheduler:
+    """
+    Central budget for outbound REST calls made by the cogs.
+    Requests wait for a global and a per-route token, interactive ones first.
+    Identical in-flight fetches (same dedup_key) share one call.
+    """
+
+    def __init__(self):
+        self.global_bucket = _TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.routes = {}
+        self.inflight = {}
+        self._queue = []  # [priority, seq, route, future, deadline, uses_global]
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump_task = None
+        self.stats = {"requests": 0, "deduped": 0, "shed": 0, "queued": 0}
+
+    def _route_bucket(self, route: str) -> _TokenBucket:
+        bucket = self.routes.get(route)
+        if bucket is None:
+            if len(self.routes) >= MAX_ROUTES:
+                now = time.monotonic()
+                self.routes = {k: b for k, b in self.routes.items() if not b.is_idle(now)}
+            bucket = self.routes[route] = _TokenBucket(ROUTE_RATE, ROUTE_BURST)
+        return bucket
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._queue)
+
+    def _background_waiting(self) -> int:
+        return sum(1 for entry in self._queue if entry[0] == BACKGROUND)
+
+    async def _acquire(self, route: str, priority: int, uses_global: bool = True):
+        if priority == BACKGROUND and self._background_waiting() >= MAX_BACKGROUND_QUEUE:
+            self.stats["shed"] += 1
+            raise RequestShed(route)
+
+        future = asyncio.get_running_loop().create_future()
+        deadline = time.monotonic() + MAX_BACKGROUND_WAIT
+        self._queue.append([priority, next(self._seq), route, future, deadline, uses_global])
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    async def _pump(self):
+        while self._queue:
+            self._wakeup.clear()
+            now = time.monotonic()
+            self._queue.sort(key=lambda e: (e[0], e[1]))
+
+            global_wait = self.global_bucket.wait_time(now)
+            next_wait = float("inf")
+            for entry in list(self._queue):
+                priority, _, route, future, deadline, uses_global = entry
+                if future.done():  # caller was cancelled
+                    self._queue.remove(entry)
+                    continue
+                if priority == BACKGROUND and now > deadline:
+                    self._queue.remove(entry)
+                    self.stats["shed"] += 1
+                    future.set_exception(RequestShed(route))
+                    continue
+                if uses_global and global_wait > 0:
+                    next_wait = min(next_wait, global_wait)
+                    continue
+
+                route_wait = self._route_bucket(route).wait_time(now)
+                if route_wait == 0:
+                    self._queue.remove(entry)
+                    if uses_global:
+                        self.global_bucket.consume()
+                    self.routes[route].consume()
+                    future.set_result(None)
+                    next_wait = 0
+                    break
+                next_wait = min(next_wait, route_wait)
+
+            if next_wait > 0 and self._queue:
+                self.stats["queued"] += 1
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(next_wait, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _run(self, route, factory, priority, uses_global=True):
+        await self._acquire(route, priority, uses_global)
+        return await factory()
+
+    async def request(
+        self, route: str, factory, *, priority=INTERACTIVE, dedup_key=None, uses_global=True
+    ):
+        """
+        Runs `factory()` (a coroutine function making one REST call) within budget.
+        route: rate-limit bucket, e.g. f"webhooks:{channel.id}".
+        dedup_key: callers passing the same key while a call is in flight share its result.
+        uses_global: False for calls outside the bot's global limit (webhook executes).
+        """
+        self.stats["requests"] += 1
+        if dedup_key is None:
+            return await self._run(route, factory, priority, uses_global)
+
+        task = self.inflight.get(dedup_key)
+        if task is not None:
+            self.stats["deduped"] += 1
+        else:
+            task = asyncio.ensure_future(self._run(route, factory, priority, uses_global))
+            self.inflight[dedup_key] = task
+            task.add_done_callback(lambda t: self.inflight.pop(dedup_key, None))
+        return await asyncio.shield(task)
+
+
+rest = RestScheduler()
+
+# Strong references so fire-and-forget tasks aren't garbage collected mid-flight
+_background_tasks = set()
+
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+# --- Webhooks ---
+# Channel webhooks rarely change, so remember them instead of listing them on every send.
+_webhooks = {}  # (channel_id, name) -> discord.Webhook
+MAX_WEBHOOKS = 4096
+
+
+async def get_webhook(channel, name: str, match=None):
+    """
+    Returns a cached webhook for `channel`, listing/creating it at most once.
+    match: predicate picking an existing webhook (defaults to matching `name`).
+    """
+    match = match or (lambda w: w.name == name)
+    key = (channel.id, name)
+    webhook = _webhooks.get(key)
+    if webhook is not None:
+        return webhook
+
+    async def _fetch():
+        webhooks = await channel.webhooks()
+        found = next((w for w in webhooks if match(w)), None)
+        if found is None:
+            found = await rest.request(
+                f"webhooks:{channel.id}", lambda: channel.create_webhook(name=name)
+            )
+        return found
+
+    webhook = await rest.request(f"webhooks:{channel.id}", _fetch, dedup_key=("webhooks", key))
+    _webhooks[key] = webhook
+    if len(_webhooks) > MAX_WEBHOOKS:
+        _webhooks.pop(next(iter(_webhooks)))
+    return webhook
+
+
+def forget_webhook(channel_id: int, name: str):
+    """Drops a cached webhook, e.g. after it was deleted (send raised NotFound)."""
+    _webhooks.pop((channel_id, name), None)
+
+
+async def send_webhook(webhook: discord.Webhook, **kwargs):
+    return await rest.request(
+        f"webhook:{webhook.id}", lambda: webhook.send(**kwargs), uses_global=False
+    )
+
+
+async def delete_message(message: discord.Message):
+    """Best-effort background delete; shed under load rather than delaying replies."""
+    try:
+        await rest.request(f"messages:{message.channel.id}", message.delete, priority=BACKGROUND)
+    except (discord.Forbidden, discord.NotFound, RequestShed):
+        pass
@@ -1,56 +1,65 @@
-import json
-import logging
 import os
 
-logger = logging.getLogger("core.settings")
+from core.json_store import SharedJSONFile
 
 DATA_DIR = "data"
 SETTINGS_FILE = os.path.join(DATA_DIR, "server_settings.json")
 
 DEFAULT_SETTINGS = {
     "prefix": "!",
+    # Seconds between keyword auto-replies in the same channel
+    "trigger_cooldown": 60,
+    # Quote of the day: channel id (None = off), hours between posts, first post "HH:MM" UTC
+    "qotd_channel": None,
+    "qotd_interval": 24,
+    "qotd_time": "09:00",
+    # Quote of the day: the last schedule slot posted (epoch seconds), None before the first
+    "qotd_last": None,
+    # Default 9up selection mode (see core/quote_index.MODES)
+    "quote_mode": "uniform",
+    # Quotes a channel won't see again until this many others were posted there (0 = off)
+    "quote_no_repeat": 0,
+    # Channel id for HKO weather warning alerts (None = off)
+    "hko_channel": None,
+    # Per-command limit overrides: {"9up": {"user": [per_minute, burst]}} (see core/rate_limit)
+    "rate_limits": {},
 }
 
 
 class ServerSettingsManager:
     def __init__(self):
-        self._ensure_dir()
-        self.data = self._load()
-
-    def _ensure_dir(self):
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-
-    def _load(self):
-        if not os.path.exists(SETTINGS_FILE):
-            return {}
-        try:
-            with open(SETTINGS_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            logger.error("Failed to load server settings. Starting with empty defaults.")
-            return {}
-
-    def _save(self):
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(self.data, f, indent=4)
+        # Shared with the other launcher.py workers
+        self.store = SharedJSONFile(SETTINGS_FILE)
+
+    @property
+    def data(self):
+        return self.store.data
 
     def get_val(self, guild_id: int, key: str):
         gid = str(guild_id)
+        data = self.data
 
-        if gid not in self.data:
+        if gid not in data:
             return DEFAULT_SETTINGS.get(key)
 
-        return self.data[gid].get(key, DEFAULT_SETTINGS.get(key))
+        return data[gid].get(key, DEFAULT_SETTINGS.get(key))
 
-    def set_val(self, guild_id: int, key: str, value):
+    async def set_val(self, guild_id: int, key: str, value):
         gid = str(guild_id)
 
-        if gid not in self.data:
-            self.data[gid] = {}
+        def _set(data):
+            data.setdefault(gid, {})[key] = value
+
+        await self.store.update_async(_set)
+
+    async def set_vals(self, updates):
+        """Sets many (guild_id, key, value) at once, with a single write."""
+
+        def _set(data):
+            for guild_id, key, value in updates:
+                data.setdefault(str(guild_id), {})[key] = value
 
-        self.data[gid][key] = value
-        self._save()
+        await self.store.update_async(_set)
 
     def get_prefix(self, guild_id: int) -> str:
         return self.get_val(guild_id, "prefix")
@@ -1,7 +1,8 @@
 import discord
-import aiosqlite
 
 from core.config import settings
+from core.db import quote_db
+from core.quote_index import quote_index
 
 class PaginationView(discord.ui.View):
     def __init__(self, data, title, member, per_page=5):
@@ -79,10 +80,9 @@ class PaginationView(discord.ui.View):
 
 
 class DeleteQuoteView(PaginationView):
-    def __init__(self, data, title, member, ctx, db_path):
+    def __init__(self, data, title, member, ctx):
         super().__init__(data, title, member, per_page=5)
         self.ctx = ctx
-        self.db_path = db_path
         self.selected_item = None 
         self.message = None
 
@@ -162,9 +162,10 @@ class DeleteQuoteView(PaginationView):
         # Get ID (last element)
         quote_id = self.selected_item[-1] 
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with quote_db.connect(self.ctx.guild.id) as db:
             await db.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
             await db.commit()
+        quote_index.deleted(self.ctx.guild.id, quote_id)
         
         # Remove from local data list
         self.data.remove(self.selected_item)
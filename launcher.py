@@ -0,0 +1,87 @@
+"""
+Multi-process launcher: splits SHARD_COUNT shards across SHARD_WORKERS processes.
+
+Usage: SHARD_COUNT=4 SHARD_WORKERS=2 python launcher.py
+
+Each worker is a plain `python main.py` with SHARD_IDS set to its contiguous slice
+of the shard range and its own LOG_FILE. All workers share db/quotes.db, which is
+safe because the DB runs in WAL mode and connections wait on locks (core/db.py).
+The JSON stores in data/ (server settings, blacklist, stream cache) are shared
+through core/json_store.py: writes re-read and merge under a file lock, and reads
+pick up other workers' changes within a second.
+"""
+
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from core.config import settings
+from core.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger("discord.launcher")
+
+RESTART_DELAY = 5
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """Splits range(shard_count) into `workers` contiguous, near-equal slices."""
+    workers = max(1, min(workers, shard_count))
+    base, extra = divmod(shard_count, workers)
+    slices, start = [], 0
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        slices.append(list(range(start, start + size)))
+        start += size
+    return slices
+
+
+def spawn_worker(index: int, shard_ids: list[int], shard_count: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["SHARD_COUNT"] = str(shard_count)
+    env["SHARD_IDS"] = json.dumps(shard_ids)
+    env["LOG_FILE"] = f"logs/discord.worker{index}.log"
+    logger.info(f"🚀 Worker {index}: shards {shard_ids}")
+    return subprocess.Popen([sys.executable, "main.py"], env=env)
+
+
+def main():
+    if settings.SHARD_COUNT is None:
+        logger.critical("❌ SHARD_COUNT must be set to use the multi-process launcher.")
+        sys.exit(1)
+
+    slices = split_shards(settings.SHARD_COUNT, settings.SHARD_WORKERS)
+    workers = {i: spawn_worker(i, ids, settings.SHARD_COUNT) for i, ids in enumerate(slices)}
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for proc in workers.values():
+            proc.send_signal(signal.SIGINT)
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    # Supervise: restart crashed workers until we are asked to stop
+    while not stopping:
+        time.sleep(1)
+        for i, proc in list(workers.items()):
+            code = proc.poll()
+            if code is not None and not stopping:
+                logger.error(f"❌ Worker {i} exited with code {code}, restarting...")
+                time.sleep(RESTART_DELAY)
+                workers[i] = spawn_worker(i, slices[i], settings.SHARD_COUNT)
+
+    for proc in workers.values():
+        proc.wait()
+    logger.info("🛑 All workers stopped.")
+
+
+if __name__ == "__main__":
+    main()
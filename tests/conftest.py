@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import fakes, shims  # noqa: E402
+
+# Before any `core` import: settings come from the environment and every data/ and
+# db/ path resolves inside a scratch directory.
+fakes.prepare_environment()
+shims.install()
+
+
+@pytest.fixture(scope="session")
+def loop():
+    # One loop for the whole session, like the bot: the core singletons (REST
+    # scheduler, pooled DB connections) bind to the loop they first run on.
+    loop = asyncio.new_event_loop()
+    yield loop
+    from core.db import quote_db
+
+    loop.run_until_complete(quote_db.close_all())
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    fakes.Network.reset()
+    return loop.run_until_complete
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    # Like cooldowns, command rate limits are off unless a test turns them on
+    from core.rate_limit import rate_limits
+
+    monkeypatch.setattr(rate_limits, "defaults", {})
+    rate_limits.buckets.clear()
+
+
+@pytest.fixture
+def bot():
+    return fakes.FakeBot()
+
+
+@pytest.fixture
+def guild(bot):
+    return bot.add_guild()
+
+
+@pytest.fixture
+def channel(guild):
+    return guild.add_channel()
+
+
+@pytest.fixture
+def member(guild):
+    return guild.add_member("alice")
+
+
+@pytest.fixture
+def admin(guild):
+    return guild.add_member("admin", roles=[fakes.ADMIN_ROLE])
+
+
+@pytest.fixture
+def make_ctx(bot, guild, channel):
+    def make(author, content="", reference=None):
+        return fakes.FakeContext(bot, guild, channel, author, content, reference)
+
+    return make
@@ -0,0 +1,416 @@
+"""
+In-memory stand-ins for the discord.py objects the cogs touch: bot, guild, channel,
+member, message, webhook and command Context. No gateway or HTTP is involved; every
+outbound call is recorded, and an optional `latency` simulates Discord's round trip.
+
+Import this module before anything from `core`: `prepare_environment()` must run first
+because the core singletons read settings and create data/ and db/ relative to the cwd.
+"""
+
+import asyncio
+import itertools
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import discord
+from discord.ext import commands
+
+OWNER_ID = 1
+ADMIN_ROLE = "Admin"
+
+_ids = itertools.count(10_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+def prepare_environment(workdir: str = None) -> str:
+    """Points settings at fake credentials and moves into a scratch directory."""
+    os.environ.setdefault("BOT_TOKEN", "test-token")
+    os.environ.setdefault("OWNER_ID", str(OWNER_ID))
+    os.environ.setdefault("ADMIN_ROLE_NAME", ADMIN_ROLE)
+    os.environ.setdefault("LOG_FILE", "logs/test.log")
+    workdir = workdir or tempfile.mkdtemp(prefix="bot-harness-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    return workdir
+
+
+class Network:
+    """Shared knobs for all fakes: simulated REST latency and a log of every call."""
+
+    latency = 0.0
+    calls = []
+
+    @classmethod
+    async def call(cls, name: str, **details):
+        cls.calls.append((name, details))
+        if cls.latency:
+            await asyncio.sleep(cls.latency)
+
+    @classmethod
+    def reset(cls):
+        cls.latency = 0.0
+        cls.calls = []
+
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.id = next_id()
+        self.name = name
+
+
+class FakeMember:
+    def __init__(self, guild=None, name=None, user_id=None, bot=False, roles=()):
+        self.id = user_id or next_id()
+        self.name = name or f"user{self.id}"
+        self.display_name = self.name
+        self.global_name = self.name
+        self.display_avatar = FakeAsset(f"https://cdn.example/avatars/{self.id}.png")
+        self.avatar = self.display_avatar
+        self.color = self.colour = discord.Color.default()
+        self.bot = bot
+        self.guild = guild
+        self.roles = [FakeRole(r) for r in roles]
+        self.mention = f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content="", reference=None, created_at=None):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.reference = reference
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.webhook_id = None
+        self.reactions = []
+        self.mentions = []
+        self.attachments = []
+        self.embeds = []
+        self.deleted = False
+        self.edits = []
+
+    async def delete(self, *, delay=None):
+        await Network.call("message.delete", message=self.id)
+        self.deleted = True
+        self.channel.messages.pop(self.id, None)
+
+    async def edit(self, **kwargs):
+        await Network.call("message.edit", message=self.id)
+        self.edits.append(kwargs)
+        if "content" in kwargs:
+            self.content = kwargs["content"]
+        return self
+
+    def reply_to(self):
+        """A reference pointing at this message, as when a user replies to it."""
+        return discord.MessageReference(message_id=self.id, channel_id=self.channel.id)
+
+
+class FakeWebhook:
+    def __init__(self, channel, name, user=None):
+        self.id = next_id()
+        self.channel = channel
+        self.name = name
+        self.user = user
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await Network.call("webhook.send", webhook=self.id)
+        self.sent.append({"content": content, **kwargs})
+        message = FakeMessage(self.channel, FakeMember(name=kwargs.get("username")), content)
+        message.webhook_id = self.id
+        return message
+
+
+class FakeTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    def __init__(self, guild, name="general"):
+        self.id = next_id()
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self.messages = {}
+        self.sent = []
+        self.webhook_list = []
+        self.pinned = []
+        self.permissions = discord.Permissions.all()
+
+    def permissions_for(self, _member):
+        return self.permissions
+
+    def typing(self):
+        return FakeTyping()
+
+    def post(self, author, content, **kwargs) -> FakeMessage:
+        """A message written by a user (no REST call involved)."""
+        message = FakeMessage(self, author, content, **kwargs)
+        self.messages[message.id] = message
+        return message
+
+    async def send(self, content=None, **kwargs):
+        await Network.call("channel.send", channel=self.id)
+        message = FakeMessage(self, self.guild.me, content)
+        message.embeds = [kwargs["embed"]] if kwargs.get("embed") else kwargs.get("embeds", [])
+        self.sent.append({"content": content, **kwargs, "message": message})
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id):
+        await Network.call("channel.fetch_message", channel=self.id)
+        message = self.messages.get(message_id)
+        if message is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Message")
+        return message
+
+    async def webhooks(self):
+        await Network.call("channel.webhooks", channel=self.id)
+        return list(self.webhook_list)
+
+    async def create_webhook(self, name, **_):
+        await Network.call("channel.create_webhook", channel=self.id)
+        webhook = FakeWebhook(self, name, self.guild.me)
+        self.webhook_list.append(webhook)
+        return webhook
+
+    async def pins(self, **_):
+        for message in self.pinned:
+            yield message
+
+    async def history(self, limit=None, after=None, oldest_first=False, **_):
+        messages = sorted(self.messages.values(), key=lambda m: m.id, reverse=not oldest_first)
+        for message in messages:
+            if after is not None and message.id <= after.id:
+                continue
+            yield message
+
+
+class _FakeResponse:
+    """Enough of aiohttp.ClientResponse for discord.HTTPException subclasses."""
+
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Fake"
+
+
+class FakeGuild:
+    def __init__(self, name="Test Guild", guild_id=None, me=None):
+        self.id = guild_id or next_id()
+        self.name = name
+        self.icon = None
+        self.me = me or FakeMember(self, name="Bot", bot=True)
+        self.me.guild = self
+        self.members = {self.me.id: self.me}
+        self.channels = []
+        self.filesize_limit = 10 * 1024 * 1024
+
+    def add_member(self, name=None, **kwargs) -> FakeMember:
+        member = FakeMember(self, name=name, **kwargs)
+        self.members[member.id] = member
+        return member
+
+    def add_channel(self, name="general") -> FakeChannel:
+        channel = FakeChannel(self, name)
+        self.channels.append(channel)
+        return channel
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    async def fetch_member(self, user_id):
+        await Network.call("guild.fetch_member", guild=self.id)
+        member = self.members.get(user_id)
+        if member is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Member")
+        return member
+
+    def get_channel(self, channel_id):
+        return next((c for c in self.channels if c.id == channel_id), None)
+
+    get_channel_or_thread = get_channel
+
+
+class FakeBot:
+    """The parts of commands.Bot that cogs use, without a gateway connection."""
+
+    def __init__(self):
+        self.user = FakeMember(name="Bot", bot=True)
+        self.owner_id = OWNER_ID
+        self.guilds = []
+        self.cogs = {}
+        self.extensions = {}
+        self.latency = 0.05
+        self.startup_report = {}
+        self.startup_report_total_ms = 0.0
+        self.loop = None
+        self.events = []  # listener tasks scheduled by dispatch()
+
+    def add_guild(self, name="Test Guild", guild_id=None) -> FakeGuild:
+        me = FakeMember(name="Bot", user_id=self.user.id, bot=True)
+        guild = FakeGuild(name, guild_id, me=me)
+        self.guilds.append(guild)
+        return guild
+
+    def get_guild(self, guild_id):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+    def get_user(self, user_id):
+        for guild in self.guilds:
+            member = guild.get_member(user_id)
+            if member is not None:
+                return member
+        return None
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    async def add_cog(self, cog):
+        self.cogs[cog.qualified_name] = cog
+        await discord.utils.maybe_coroutine(cog.cog_load)
+
+    async def remove_cogs(self):
+        for cog in list(self.cogs.values()):
+            await discord.utils.maybe_coroutine(cog.cog_unload)
+        self.cogs.clear()
+
+    def dispatch(self, event, *args):
+        """Schedules the cogs' `on_<event>` listeners, like discord.py's event dispatch."""
+        for cog in self.cogs.values():
+            for name, listener in cog.get_listeners():
+                if name == f"on_{event}":
+                    self.events.append(asyncio.ensure_future(listener(*args)))
+
+    async def drain_events(self):
+        while self.events:
+            await self.events.pop(0)
+
+    async def can_run(self, ctx, *, call_once=False):
+        return True
+
+    async def wait_until_ready(self):
+        return None
+
+    def is_ready(self):
+        return True
+
+
+class FakeInteractionResponse:
+    def __init__(self):
+        self.deferred = False
+
+    def is_done(self):
+        return self.deferred
+
+    async def defer(self, **_):
+        await Network.call("interaction.defer")
+        self.deferred = True
+
+
+class FakeInteraction:
+    """A slash invocation: deferred, then answered by editing the original response."""
+
+    def __init__(self, ctx):
+        # discord.py runs a hybrid command's checks against interaction.client/_baton
+        self.client = ctx.bot
+        self._baton = ctx
+        self.channel = ctx.channel
+        self.guild = ctx.guild
+        self.user = ctx.author
+        self.response = FakeInteractionResponse()
+        self.edits = []
+
+    async def edit_original_response(self, **kwargs):
+        await Network.call("interaction.edit_original_response")
+        self.edits.append(kwargs)
+
+
+class FakeContext:
+    def __init__(
+        self, bot, guild, channel, author, content="", reference=None, prefix="!", slash=False
+    ):
+        self.bot = bot
+        self.guild = guild
+        self.channel = channel
+        self.author = author
+        self.prefix = prefix
+        self.message = channel.post(author, content, reference=reference)
+        self.command = None
+        self.cog = None
+        self.invoked_with = None
+        self.interaction = FakeInteraction(self) if slash else None
+
+    async def defer(self, **kwargs):
+        if self.interaction is not None:
+            await self.interaction.response.defer(**kwargs)
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+    def typing(self, **_):
+        return FakeTyping()
+
+    @property
+    def sent(self):
+        return self.channel.sent
+
+
+async def invoke(
+    ctx, cog, command_name: str, *args, checks: bool = True, errors: bool = False, **kwargs
+):
+    """
+    Runs a cog command the way discord.py would after argument parsing: command checks
+    (blacklist, admin/owner) first, then the callback. Cooldowns and concurrency
+    limits are skipped so load tests measure the command itself.
+    errors: hand failures to the command's error handler and the bot's
+    `on_command_error` listeners instead of raising them.
+    """
+    command = next(c for c in cog.get_commands() if c.name == command_name)
+    ctx.command = command
+    ctx.cog = cog
+    ctx.invoked_with = command_name
+    try:
+        if checks and not await command.can_run(ctx):
+            raise commands.CheckFailure(command_name)
+        return await command.callback(cog, ctx, *args, **kwargs)
+    except Exception as e:
+        if not errors:
+            raise
+        if not isinstance(e, commands.CommandError):
+            e = commands.CommandInvokeError(e)
+        command.cog = cog  # FakeBot.add_cog doesn't inject; dispatch_error passes the cog
+        await command.dispatch_error(ctx, e)
+        await ctx.bot.drain_events()
+
+
+@asynccontextmanager
+async def latency(seconds: float):
+    """Temporarily simulates a REST round trip of `seconds` on every fake call."""
+    previous = Network.latency
+    Network.latency = seconds
+    try:
+        yield
+    finally:
+        Network.latency = previous
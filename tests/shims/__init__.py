@@ -0,0 +1,42 @@
+"""
+Subprocess shims for yt-dlp and ffmpeg, so !cctv runs end to end without network
+access or the real binaries. `install()` puts tests/shims/bin first on PATH and
+replaces the yt_dlp Python API (used by Capture.capture_frame) with a local fake.
+Behaviour is tuned through environment variables, see the scripts in bin/.
+"""
+
+import os
+import sys
+import types
+
+BIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin")
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        if os.environ.get("SHIM_FAIL") == "1":
+            raise RuntimeError("yt_dlp shim failure")
+        return {"url": f"shim://{url.rsplit('=', 1)[-1]}", "title": "shim stream"}
+
+
+def install(**env):
+    """Activates the shims for this process and its children. Returns the previous PATH."""
+    previous = os.environ.get("PATH", "")
+    if not previous.startswith(BIN_DIR):
+        os.environ["PATH"] = BIN_DIR + os.pathsep + previous
+    for key, value in env.items():
+        os.environ[key] = str(value)
+
+    module = types.ModuleType("yt_dlp")
+    module.YoutubeDL = FakeYoutubeDL
+    sys.modules["yt_dlp"] = module
+    return previous
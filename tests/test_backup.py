@@ -0,0 +1,66 @@
+import pytest
+
+from core import backup
+from core.db import SCHEMA, WEEK
+
+
+def make_db(path, rows):
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:  # includes the 9upstats rollup triggers
+        conn.execute(statement)
+    conn.executemany(
+        "INSERT INTO quotes (guild_id, user_id, content, timestamp, channel_id, "
+        "adder_user_id, added_timestamp, uses) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize("fmt", backup.EXPORT_FORMATS)
+def test_import_counts_quotes_not_trigger_writes(tmp_path, fmt):
+    src, dst = tmp_path / "src.db", tmp_path / "dst.db"
+    make_db(src, [(7, 1, "only quote", "1700000000", 3, 2, 1700000000, 4)])
+    out = str(tmp_path / f"quotes.{fmt}.gz")
+    assert backup.export_quotes(str(src), 7, out, fmt) == 1
+
+    assert backup.import_quotes(str(dst), out) == (1, 0)
+    assert backup.import_quotes(str(dst), out) == (0, 1)
+
+
+def test_csv_round_trip_keeps_nulls_and_integer_types(tmp_path):
+    import sqlite3
+
+    src, dst = tmp_path / "src.db", tmp_path / "dst.db"
+    make_db(
+        src,
+        [
+            (7, 1, "legacy, no adder", "1600000000", 3, None, None, 0),
+            (7, 2, 'says "hi"\nthen leaves', "1700000000", 3, 5, 1700000000, 2),
+        ],
+    )
+    out = str(tmp_path / "quotes.csv.gz")
+    backup.export_quotes(str(src), 7, out, "csv")
+    assert backup.import_quotes(str(dst), out) == (2, 0)
+
+    columns = ", ".join(f"typeof({col})" for col in backup.COLUMNS[1:])
+    conn = sqlite3.connect(dst)
+    try:
+        assert conn.execute(f"SELECT {columns} FROM quotes ORDER BY id").fetchall() == [
+            ("integer", "integer", "text", "text", "integer", "null", "null", "integer"),
+            ("integer",) * 2 + ("text",) * 2 + ("integer",) * 4,
+        ]
+        assert conn.execute("SELECT content FROM quotes ORDER BY id").fetchall() == [
+            ("legacy, no adder",),
+            ('says "hi"\nthen leaves',),
+        ]
+        # Unknown adders roll up under 0, and undated quotes have no week
+        assert conn.execute("SELECT adder_user_id FROM stats_adder ORDER BY 1").fetchall() == [
+            (0,),
+            (5,),
+        ]
+        assert conn.execute("SELECT week FROM stats_week").fetchall() == [(1700000000 // WEEK,)]
+    finally:
+        conn.close()
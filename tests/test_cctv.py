@@ -0,0 +1,151 @@
+import os
+
+import pytest
+
+from tests.fakes import FakeContext, Network, invoke
+
+
+@pytest.fixture
+def cctv(run, bot):
+    from cogs.features.cctv import CCTV
+
+    cog = CCTV(bot)
+    run(bot.add_cog(cog))
+    return cog
+
+
+@pytest.fixture(autouse=True)
+def clean_capture_cache():
+    for path in ("data/stream_links_cache.json",):
+        if os.path.exists(path):
+            os.remove(path)
+    yield
+    for key in ("SHIM_LIVE", "SHIM_FAIL", "SHIM_DELAY"):
+        os.environ.pop(key, None)
+
+
+def test_cctv_uploads_a_frame(run, cctv, make_ctx, member):
+    ctx = make_ctx(member, "!cctv sdvx L")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "L"))
+
+    upload = ctx.sent[-1]
+    assert upload["file"].filename == f"cctv_sdvx_L.{cctv.monitor.extension}"
+    assert "SILVERCORD - L" in upload["embed"].title
+
+
+def test_cctv_fast_request_sends_one_message(run, cctv, make_ctx, member):
+    ctx = make_ctx(member, "!cctv sdvx L")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "L"))
+    assert [name for name, _ in Network.calls] == ["channel.send"]
+
+
+def test_cctv_slow_request_edits_one_message(run, cctv, make_ctx, member, monkeypatch):
+    from cogs.features import cctv as cctv_module
+
+    monkeypatch.setattr(cctv_module, "PROGRESS_DELAY", 0.05)
+    os.environ["SHIM_DELAY"] = "0.2"
+    ctx = make_ctx(member, "!cctv sdvx R")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "R"))
+
+    assert len(ctx.sent) == 1
+    status = ctx.sent[0]["message"]
+    assert "Searching" in ctx.sent[0]["content"]
+    assert status.edits[-1]["attachments"][0].filename.startswith("cctv_sdvx_R")
+    assert not any(name == "message.delete" for name, _ in Network.calls)
+
+
+def test_cctv_slash_defers_and_edits_original(run, cctv, bot, guild, channel, member):
+    ctx = FakeContext(bot, guild, channel, member, slash=True)
+    run(invoke(ctx, cctv, "cctv", "sdvx", "L"))
+
+    assert ctx.interaction.response.deferred
+    assert ctx.sent == []
+    assert "SILVERCORD - L" in ctx.interaction.edits[-1]["embed"].title
+
+
+def test_cctv_queued_slash_request_defers_before_waiting(run, cctv, bot, guild, channel):
+    import asyncio
+
+    os.environ["SHIM_DELAY"] = "0.3"
+    first = FakeContext(bot, guild, channel, guild.add_member("a"), slash=True)
+    second = FakeContext(bot, guild, channel, guild.add_member("b"), slash=True)
+
+    async def scenario():
+        running = asyncio.create_task(invoke(first, cctv, "cctv", "sdvx", "L"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(invoke(second, cctv, "cctv", "sdvx", "L"))
+        await asyncio.sleep(0.05)
+        # Answered within Discord's deadline even though the guild's capture is busy
+        assert second.interaction.response.deferred and not running.done()
+        await asyncio.gather(running, queued)
+
+    run(scenario())
+    for ctx in (first, second):
+        assert "SILVERCORD - L" in ctx.interaction.edits[-1]["embed"].title
+
+
+def test_cctv_reports_offline_stream(run, cctv, make_ctx, member):
+    os.environ["SHIM_LIVE"] = ""
+    ctx = make_ctx(member, "!cctv sdvx R")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "R"))
+    assert "Stream Offline" in ctx.sent[-1]["content"]
+
+
+def test_cctv_caches_offline_result(run, cctv, make_ctx, member):
+    os.environ["SHIM_LIVE"] = ""
+    run(invoke(make_ctx(member, "!cctv sdvx R"), cctv, "cctv", "sdvx", "R"))
+
+    # Back live, but the "offline" answer is still fresh: no new yt-dlp scan
+    os.environ["SHIM_LIVE"] = "L,R"
+    ctx = make_ctx(member, "!cctv sdvx R")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "R"))
+    assert "Stream Offline" in ctx.sent[-1]["content"]
+
+    cctv.monitor.negative_ttl = 0
+    ctx = make_ctx(member, "!cctv sdvx R")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "R"))
+    assert "SILVERCORD - R" in ctx.sent[-1]["embed"].title
+
+
+def test_cctv_rejects_unknown_side(run, cctv, make_ctx, member):
+    ctx = make_ctx(member, "!cctv sdvx X")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "X"))
+    assert "Invalid side" in ctx.sent[-1]["content"]
+
+
+def test_cctv_fails_fast_while_youtube_is_failing(run, cctv, make_ctx, member):
+    os.environ["SHIM_FAIL"] = "1"
+    for _ in range(cctv.monitor.search_breaker.threshold):
+        run(invoke(make_ctx(member, "!cctv sdvx L"), cctv, "cctv", "sdvx", "L"))
+    assert cctv.monitor.search_breaker.state == "open"
+
+    ctx = make_ctx(member, "!cctv sdvx L")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "L"))
+    assert "temporarily unavailable" in ctx.sent[-1]["content"]
+    assert cctv.monitor.search_breaker.stats["rejected"] == 1
+
+    # Backoff over: one probe goes through, succeeds and closes the breaker
+    os.environ.pop("SHIM_FAIL")
+    cctv.monitor.search_breaker.opened_at -= cctv.monitor.search_breaker.backoff
+    ctx = make_ctx(member, "!cctv sdvx L")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "L"))
+    assert "SILVERCORD - L" in ctx.sent[-1]["embed"].title
+    assert cctv.monitor.search_breaker.state == "closed"
+
+
+def test_cctv_burst_is_one_grid_image(run, cctv, make_ctx, member):
+    ctx = make_ctx(member, "!cctv sdvx L burst")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "L", "burst"))
+
+    upload = ctx.sent[-1]
+    assert upload["file"].filename == f"cctv_sdvx_L_burst.{cctv.monitor.extension}"
+    assert upload["embed"].image.url == f"attachment://{upload['file'].filename}"
+
+
+def test_cctv_clip_without_side(run, cctv, make_ctx, member):
+    ctx = make_ctx(member, "!cctv sdvx clip")
+    run(invoke(ctx, cctv, "cctv", "sdvx", "clip"))
+
+    upload = ctx.sent[-1]
+    assert upload["file"].filename.endswith("_clip.mp4")
+    assert upload["embed"].image.url is None
@@ -0,0 +1,50 @@
+import asyncio
+
+
+def test_pool_never_closes_a_file_in_use(run, tmp_path, monkeypatch):
+    from core import db
+
+    monkeypatch.setattr(db, "db_path_for", lambda gid, *_: str(tmp_path / f"{gid}.db"))
+    pool = db.QuoteDatabase("guild", max_open=1)
+
+    async def nested():
+        async with pool.connect(1) as first:
+            async with pool.connect(2) as second:
+                # Over max_open while both are held, rather than closing one of them
+                assert pool.open_count == 2
+                assert pool.connection_counts() == (2, 0)
+                await second.execute("SELECT 1")
+            await first.execute("SELECT 1")
+        assert pool.open_count == 1
+        assert pool.connection_counts() == (0, 1)
+        await pool.close_all()
+
+    run(asyncio.wait_for(nested(), timeout=5))
+
+
+def test_one_file_serves_concurrent_readers(run, tmp_path, monkeypatch):
+    from core import db
+
+    monkeypatch.setattr(db, "db_path_for", lambda gid, *_: str(tmp_path / "quotes.db"))
+    pool = db.QuoteDatabase("single", pool_size=3)
+    held = []
+
+    async def reader(release):
+        async with pool.connect(1) as conn:
+            held.append(conn)
+            await release.wait()
+
+    async def scenario():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(reader(release)) for _ in range(3)]
+        while len(held) < 3:
+            await asyncio.sleep(0.01)
+        assert len({id(conn) for conn in held}) == 3
+        assert pool.connection_counts() == (3, 0)
+        await pool.close_all()  # e.g. shutdown while commands still hold connections
+        assert pool.connection_counts() == (3, 0)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert pool.connection_counts() == (0, 0)
+
+    run(asyncio.wait_for(scenario(), timeout=5))
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from core.asset_index import AssetIndex
+from tests.fakes import invoke
+
+
+@pytest.fixture
+def dllm_cog(run, bot):
+    from cogs.features.dllm import dllm
+
+    cog = dllm(bot)
+    cog.index = AssetIndex(
+        [
+            {"url": "https://cdn.example/sticker.gif", "tags": ["happy cat"]},
+            {"url": "https://cdn.example/frog.png", "tags": ["frog"], "aliases": ["青蛙"]},
+        ]
+    )
+    run(bot.add_cog(cog))
+    return cog
+
+
+def test_dllm_impersonates_author_and_deletes_command(run, dllm_cog, make_ctx, member, channel):
+    ctx = make_ctx(member, "!dllm cat")
+    run(invoke(ctx, dllm_cog, "dllm", query="cat"))
+    # The delete runs in the background; let it finish
+    run(asyncio.sleep(0.05))
+
+    webhook = channel.webhook_list[0]
+    assert webhook.sent[-1]["content"] == "https://cdn.example/sticker.gif"
+    assert webhook.sent[-1]["username"] == member.display_name
+    assert ctx.message.deleted
+
+
+def test_dllm_falls_back_without_webhook_permission(run, dllm_cog, make_ctx, member, channel):
+    channel.permissions.manage_webhooks = False
+    ctx = make_ctx(member, "!dllm happy")
+    run(invoke(ctx, dllm_cog, "dllm", query="happy"))
+    assert ctx.sent[-1]["content"] == "https://cdn.example/sticker.gif"
+
+
+def test_dllm_resolves_aliases_prefixes_and_typos(dllm_cog):
+    assert dllm_cog.index.pick("青蛙") == "https://cdn.example/frog.png"
+    assert dllm_cog.index.pick("fro") == "https://cdn.example/frog.png"
+    assert dllm_cog.index.pick("hapy cat") == "https://cdn.example/sticker.gif"
+
+
+def test_dllm_reports_unknown_tag(run, dllm_cog, make_ctx, member, channel):
+    ctx = make_ctx(member, "!dllm dinosaur")
+    run(invoke(ctx, dllm_cog, "dllm", query="dinosaur"))
+    assert "No sticker matches" in ctx.sent[-1]["content"]
+    assert channel.webhook_list == []
@@ -0,0 +1,63 @@
+import tracemalloc
+
+from cogs.util.health import SPARK_CHARS, Health, HealthHistory, sparkline
+from tests.fakes import OWNER_ID, FakeMember, invoke
+
+
+def test_history_keeps_the_newest_samples_in_order():
+    history = HealthHistory(size=4)
+    for t in range(6):
+        history.append(float(t), {"rss": t * 10})
+
+    assert history.count == 4
+    assert history.latest()["rss"] == 50
+    assert history.window(60, now=5.0)["rss"] == [20, 30, 40, 50]
+    assert history.window(1.5, now=5.0)["rss"] == [40, 50]
+
+
+def test_sparkline_downsamples_to_width():
+    line = sparkline(list(range(100)), width=10)
+    assert len(line) == 10
+    assert line[0] == SPARK_CHARS[0] and line[-1] == SPARK_CHARS[-1]
+    assert sparkline([5, 5, 5]) == SPARK_CHARS[0] * 3
+    assert sparkline([]) == ""
+
+
+def test_memory_snapshots_diff_and_stop(run, bot, guild, make_ctx, monkeypatch):
+    import asyncio
+
+    health = Health(bot)
+    offloaded = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(func, *args):
+        offloaded.append(func.__name__)
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", recording_to_thread)
+    owner = FakeMember(guild, "owner", user_id=OWNER_ID)
+    guild.members[owner.id] = owner
+
+    def report(ctx):
+        fp = ctx.sent[-1]["file"].fp
+        fp.seek(0)
+        return fp.read().decode()
+
+    run(invoke(make_ctx(owner), health, "memstart"))
+    assert tracemalloc.is_tracing()
+    try:
+        ctx = make_ctx(owner)
+        run(invoke(ctx, health, "memsnap"))
+        assert "Top allocation sites" in report(ctx) and "quote_db open files" in report(ctx)
+
+        leak = [bytearray(1024) for _ in range(500)]  # noqa: F841
+        run(invoke(make_ctx(owner), health, "memsnap"))
+        ctx = make_ctx(owner)
+        run(invoke(ctx, health, "memdiff"))
+        assert "Snapshot #1 -> #2" in report(ctx)
+        assert "test_health.py:" in report(ctx)
+        # The heap walks and snapshot work never run on the event loop
+        assert {"take_snapshot", "top_sites", "diff_sites", "live_views"} <= set(offloaded)
+    finally:
+        run(invoke(make_ctx(owner), health, "memstop"))
+    assert not tracemalloc.is_tracing() and not health.snapshots
@@ -0,0 +1,126 @@
+import pytest
+from aiohttp import web
+
+from tests.fakes import invoke
+
+CURRENT = {
+    "temperature": {"data": [{"place": "Hong Kong Observatory", "value": 28, "unit": "C"}]},
+    "humidity": {"data": [{"place": "Hong Kong Observatory", "value": 81, "unit": "percent"}]},
+    "icon": [51],
+    "updateTime": "2026-07-01T10:02:00+08:00",
+}
+FORECAST = {"forecastDesc": "Mainly cloudy with a few showers.", "outlook": "Hot."}
+TYPHOON_3 = {"WTCSGNL": {"name": "Strong Wind Signal No. 3", "code": "TC3", "actionCode": "ISSUE"}}
+TYPHOON_8 = {
+    "WTCSGNL": {"name": "Gale or Storm Signal No. 8 NE", "code": "TC8NE", "actionCode": "REPLACE"}
+}
+
+
+class StandIn:
+    """Local stand-in for the HKO API, honouring If-None-Match like the real one."""
+
+    def __init__(self):
+        self.datasets = {"rhrread": CURRENT, "flw": FORECAST, "warnsum": {}}
+        self.versions = {name: 1 for name in self.datasets}
+        self.hits = []
+
+    def set(self, name, payload):
+        self.datasets[name] = payload
+        self.versions[name] += 1
+
+    async def handle(self, request):
+        name = request.query["dataType"]
+        etag = f'"{name}-{self.versions[name]}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.hits.append((name, 304))
+            return web.Response(status=304)
+        self.hits.append((name, 200))
+        return web.json_response(self.datasets[name], headers={"ETag": etag})
+
+
+@pytest.fixture
+def stand_in(run):
+    server = StandIn()
+    app = web.Application()
+    app.router.add_get("/weather.php", server.handle)
+    runner = web.AppRunner(app)
+    run(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    run(site.start())
+    port = runner.addresses[0][1]
+    server.url = f"http://127.0.0.1:{port}/weather.php"
+    yield server
+    run(runner.cleanup())
+
+
+@pytest.fixture
+def hko(run, bot, stand_in):
+    from cogs.features.hko import HKO
+
+    cog = HKO(bot)
+    cog.feed.base_url = stand_in.url
+    run(bot.add_cog(cog))
+    cog.poll.cancel()  # tests drive refresh() themselves
+    yield cog
+    run(cog.cog_unload())
+
+
+def test_conditional_requests_skip_unchanged_feeds(run, hko, stand_in):
+    run(hko.refresh())
+    run(hko.refresh())
+    assert [status for _, status in stand_in.hits].count(304) == 3
+    assert hko.feed.stats["not_modified"] == 3
+    assert hko.feed.data["rhrread"]["temperature"] == 28
+
+
+def test_weather_is_served_from_the_shared_cache(run, hko, stand_in, make_ctx, member):
+    run(invoke(make_ctx(member, "!weather"), hko, "weather"))
+    fetched = len(stand_in.hits)
+    ctx = make_ctx(member, "!weather")
+    run(invoke(ctx, hko, "weather"))
+
+    assert len(stand_in.hits) == fetched
+    embed = ctx.sent[-1]["embed"]
+    assert "Mainly cloudy" in embed.description
+    assert any(f.value == "28°C" for f in embed.fields)
+
+
+def test_warning_changes_push_to_subscribed_channels(run, hko, stand_in, guild, channel):
+    from core.server_settings import server_settings
+
+    run(server_settings.set_val(guild.id, "hko_channel", channel.id))
+    try:
+        stand_in.set("warnsum", TYPHOON_3)
+        run(hko.refresh())  # baseline: nothing announced on startup
+        assert channel.sent == []
+
+        stand_in.set("warnsum", TYPHOON_8)
+        run(hko.refresh())
+        run(hko.refresh())  # unchanged: no second post
+        assert len(channel.sent) == 1
+        assert "Signal No. 8" in channel.sent[0]["embed"].fields[0].value
+
+        stand_in.set("warnsum", {})
+        run(hko.refresh())
+        assert channel.sent[-1]["embed"].fields[0].name == "Cancelled"
+    finally:
+        run(server_settings.set_val(guild.id, "hko_channel", None))
+
+
+def test_warning_push_is_not_shed_when_background_work_is_saturated(
+    run, hko, stand_in, guild, channel, monkeypatch
+):
+    from core import rest as rest_module
+    from core.server_settings import server_settings
+
+    # A full background queue sheds any further BACKGROUND request immediately
+    monkeypatch.setattr(rest_module.rest, "_background_waiting", lambda: 10**6)
+    run(server_settings.set_val(guild.id, "hko_channel", channel.id))
+    try:
+        stand_in.set("warnsum", {})
+        run(hko.refresh())
+        stand_in.set("warnsum", TYPHOON_8)
+        run(hko.refresh())
+        assert len(channel.sent) == 1
+    finally:
+        run(server_settings.set_val(guild.id, "hko_channel", None))
@@ -0,0 +1,114 @@
+import pytest
+from discord.ext import commands
+
+from tests.fakes import OWNER_ID, FakeMember, invoke
+
+
+@pytest.fixture
+def management(run, bot):
+    from cogs.util.management import Management
+
+    cog = Management(bot)
+    run(bot.add_cog(cog))
+    return cog
+
+
+@pytest.fixture
+def owner(guild):
+    owner = FakeMember(guild, "owner", user_id=OWNER_ID)
+    guild.members[owner.id] = owner
+    return owner
+
+
+def test_setprefix_updates_server_settings(run, management, make_ctx, guild, owner):
+    from core.server_settings import server_settings
+
+    run(invoke(make_ctx(owner), management, "setprefix", "?"))
+    assert server_settings.get_prefix(guild.id) == "?"
+
+
+def test_owner_commands_refuse_others(run, management, make_ctx, member):
+    with pytest.raises(commands.NotOwner):
+        run(invoke(make_ctx(member), management, "setprefix", "?"))
+
+
+def test_blacklist_round_trip(run, management, make_ctx, guild, owner, member):
+    from core.blacklist import blacklist_store
+
+    run(invoke(make_ctx(owner), management, "blacklist", member, "9up"))
+    assert blacklist_store.is_blocked(guild.id, member.id, "9up")
+
+    run(invoke(make_ctx(owner), management, "unblacklist", member, "9up"))
+    assert not blacklist_store.is_blocked(guild.id, member.id, "9up")
+
+
+def test_workers_do_not_overwrite_each_others_settings(run, guild):
+    # Two launcher.py workers: each holds its own copy of data/server_settings.json
+    from core.server_settings import ServerSettingsManager, server_settings
+
+    other_worker = ServerSettingsManager()
+    run(server_settings.set_val(guild.id, "prefix", "?"))
+    run(other_worker.set_val(guild.id, "trigger_cooldown", 5))
+    run(server_settings.set_val(guild.id, "quote_mode", "rare"))
+
+    fresh = ServerSettingsManager()
+    assert fresh.get_val(guild.id, "prefix") == "?"
+    assert fresh.get_val(guild.id, "trigger_cooldown") == 5
+    assert fresh.get_val(guild.id, "quote_mode") == "rare"
+
+
+def test_startup_report_times_import_and_setup_separately(run, tmp_path, monkeypatch):
+    import sys
+
+    import discord
+
+    import cogs
+    from core.loader import load_cogs
+
+    (tmp_path / "cogs").mkdir()
+    (tmp_path / "cogs" / "probe_import.py").write_text(
+        "import time\n"
+        "open('execs.log', 'a').write(__name__ + '\\n')\n"
+        "time.sleep(0.05)\n\n"
+        "async def setup(bot):\n    pass\n"
+    )
+    (tmp_path / "cogs" / "probe_setup.py").write_text(
+        "import asyncio\n"
+        "open('execs.log', 'a').write(__name__ + '\\n')\n\n"
+        "async def setup(bot):\n    await asyncio.sleep(0.05)\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cogs, "__path__", [str(tmp_path / "cogs")])
+    for name in ("cogs.probe_import", "cogs.probe_setup"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    run(load_cogs(bot))
+
+    report = bot.startup_report
+    assert {e["status"] for e in report.values()} == {"loaded"}
+    assert report["cogs.probe_import"]["import_ms"] >= 50 > report["cogs.probe_import"]["setup_ms"]
+    assert report["cogs.probe_setup"]["setup_ms"] >= 50 > report["cogs.probe_setup"]["import_ms"]
+    # Each cog's module body ran once: load_extension is the only import
+    assert sorted((tmp_path / "execs.log").read_text().split()) == sorted(report)
+    for name in report:
+        sys.modules.pop(name, None)
+
+
+def test_settings_write_waits_for_another_workers_lock_off_the_loop(run, guild):
+    import asyncio
+    import fcntl
+
+    from core.server_settings import server_settings
+
+    async def scenario():
+        with open(f"{server_settings.store.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # another worker mid-write
+            write = asyncio.create_task(server_settings.set_val(guild.id, "prefix", "$"))
+            await asyncio.sleep(0.1)  # the loop keeps running meanwhile
+            assert not write.done()
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        await write
+
+    run(scenario())
+    assert server_settings.get_val(guild.id, "prefix") == "$"
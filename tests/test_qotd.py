@@ -0,0 +1,56 @@
+import pytest
+
+from cogs.features.qotd import DAY, current_slot, next_fire_time
+
+
+def test_first_post_is_the_configured_time_then_every_interval():
+    now = 10 * DAY + 8 * 3600  # 08:00 UTC
+    first = next_fire_time(1, "09:00", 5, None, now)
+    assert 0 <= first - (10 * DAY + 9 * 3600) < 600  # 09:00 plus the guild's jitter
+    # 5h doesn't divide a day: still steps from the last slot, not from the epoch
+    assert next_fire_time(1, "09:00", 5, first, now) == first + 5 * 3600
+
+
+def test_missed_slot_catches_up_once():
+    last = 10 * DAY
+    now = last + 30 * 3600  # down for a day; 24h slot is 6h overdue
+    fire_at = next_fire_time(1, "00:00", 24, last, now)
+    assert fire_at <= now  # due immediately on startup
+    slot = current_slot(fire_at, 24, now)
+    assert next_fire_time(1, "00:00", 24, slot, now) > now  # then back on schedule
+
+
+@pytest.fixture
+def qotd(run, bot):
+    from cogs.features.qotd import QuoteOfTheDay
+    from cogs.features.quotes_record import Recorder
+
+    run(bot.add_cog(Recorder(bot)))
+    return QuoteOfTheDay(bot)
+
+
+def test_wave_skips_quotes_by_bots(run, qotd, guild, channel, member, monkeypatch):
+    from cogs.features import qotd as qotd_module
+    from core.db import quote_db
+    from core.server_settings import server_settings
+
+    robot = guild.add_member("robot", bot=True)
+
+    async def seed():
+        async with quote_db.connect(guild.id) as db:
+            await db.executemany(
+                "INSERT INTO quotes (guild_id, user_id, content, uses) VALUES (?, ?, ?, 0)",
+                [(guild.id, robot.id, f"beep {i}") for i in range(5)]
+                + [(guild.id, member.id, "human words")],
+            )
+            await db.commit()
+
+    run(seed())
+    monkeypatch.setattr(qotd_module, "CANDIDATES", 10)
+    monkeypatch.setattr(qotd_module, "POST_SPACING", 0)
+    run(server_settings.set_val(guild.id, "qotd_channel", channel.id))
+
+    run(qotd._dispatch_wave([guild.id]))
+
+    assert channel.webhook_list[0].sent[-1]["content"] == "human words"
+    assert not any("bot message" in (sent["content"] or "") for sent in channel.sent)
@@ -0,0 +1,321 @@
+import pytest
+
+from tests.fakes import invoke
+
+
+@pytest.fixture
+def recorder(run, bot):
+    from cogs.features.quotes_record import Recorder
+
+    cog = Recorder(bot)
+    run(bot.add_cog(cog))
+    return cog
+
+
+def save(run, recorder, make_ctx, saver, author, content):
+    original = make_ctx(author, content).message
+    ctx = make_ctx(saver, "!save", reference=original.reply_to())
+    run(invoke(ctx, recorder, "save"))
+    return ctx.sent[-1]["embed"]
+
+
+def test_save_then_9up_posts_through_webhook(run, recorder, make_ctx, member, admin, channel):
+    embed = save(run, recorder, make_ctx, admin, member, "the cake is a lie")
+    assert "Recorded" in embed.author.name
+
+    ctx = make_ctx(admin, "!9up")
+    run(invoke(ctx, recorder, "9up", None))
+
+    webhook = channel.webhook_list[0]
+    assert webhook.name == "MimicBot"
+    assert webhook.sent[-1]["content"] == "the cake is a lie"
+    assert webhook.sent[-1]["username"] == f"🗣️ {member.display_name}"
+
+
+def test_save_rejects_exact_and_near_duplicates(run, recorder, make_ctx, member, admin):
+    save(run, recorder, make_ctx, admin, member, "see you tomorrow at the arcade")
+
+    exact = save(run, recorder, make_ctx, admin, member, "see you tomorrow at the arcade")
+    assert "already have" in exact.description
+
+    near = save(run, recorder, make_ctx, admin, member, "See you tomorrow at the arcade!! 😂")
+    assert "almost the same" in near.description
+
+
+def test_emoji_and_punctuation_quotes_are_not_near_duplicates():
+    from core import near_dup
+
+    laugh, huh = near_dup.shingles("😂😂😂"), near_dup.shingles("???")
+    assert near_dup.jaccard(laugh, huh) == 0.0
+    assert near_dup.band_hashes(near_dup.signature(laugh)) != near_dup.band_hashes(
+        near_dup.signature(huh)
+    )
+    assert near_dup.jaccard(laugh, near_dup.shingles("😂😂 😂")) == 1.0
+    assert near_dup.jaccard(set(), set()) == 0.0
+
+
+def test_save_accepts_distinct_emoji_quotes(run, recorder, make_ctx, member, admin):
+    save(run, recorder, make_ctx, admin, member, "😂😂😂")
+    embed = save(run, recorder, make_ctx, admin, member, "???")
+    assert "Recorded" in embed.author.name
+
+
+def test_save_rejects_links_and_bots(run, recorder, make_ctx, guild, member, admin):
+    link = save(run, recorder, make_ctx, admin, member, "look https://example.com")
+    assert "links" in link.description
+
+    robot = guild.add_member("robot", bot=True)
+    assert "bots" in save(run, recorder, make_ctx, admin, robot, "beep").description
+
+
+def test_9up_counts_uses_for_9uptop(run, recorder, make_ctx, member, admin):
+    save(run, recorder, make_ctx, admin, member, "only quote")
+    for _ in range(3):
+        run(invoke(make_ctx(admin), recorder, "9up", None))
+
+    ctx = make_ctx(admin, "!9uptop")
+    run(invoke(ctx, recorder, "9uptop", None))
+    assert "**3** uses" in ctx.sent[-1]["embed"].description
+
+
+@pytest.mark.parametrize("mode", ["popular", "rare", "recent"])
+def test_weighted_modes_pick_saved_quotes(run, recorder, make_ctx, member, admin, channel, mode):
+    for i in range(5):
+        save(run, recorder, make_ctx, admin, member, f"weighted quote number {i} {mode}")
+
+    run(invoke(make_ctx(admin), recorder, "9up", None, flags=mode))
+    assert channel.webhook_list[0].sent[-1]["content"].startswith("weighted quote number")
+
+
+def test_blacklisted_user_is_refused(run, recorder, make_ctx, guild, member):
+    from discord.ext import commands
+
+    from core.blacklist import blacklist_store
+
+    run(blacklist_store.add_block(guild.id, member.id, "9up"))
+    with pytest.raises(commands.CheckFailure):
+        run(invoke(make_ctx(member), recorder, "9up", None))
+
+
+def test_rate_limit_sheds_spam_before_the_database(run, recorder, make_ctx, member, monkeypatch):
+    from core.iam import RateLimited
+    from core.rate_limit import rate_limits
+
+    monkeypatch.setattr(rate_limits, "defaults", {"9up": {"user": (60, 2)}})
+    run(invoke(make_ctx(member), recorder, "9up", None))
+    run(invoke(make_ctx(member), recorder, "9up", None))
+    with pytest.raises(RateLimited) as first:
+        run(invoke(make_ctx(member), recorder, "9up", None))
+    with pytest.raises(RateLimited) as second:
+        run(invoke(make_ctx(member), recorder, "9up", None))
+
+    assert first.value.first and not second.value.first
+    assert rate_limits.stats["9up"]["limited"] >= 2
+
+
+def test_rate_limited_9up_is_answered_once_by_the_global_handler(
+    run, recorder, bot, make_ctx, member, monkeypatch
+):
+    from cogs.util.error_handler import ErrorHandler
+    from core.rate_limit import rate_limits
+
+    run(bot.add_cog(ErrorHandler(bot)))
+    monkeypatch.setattr(rate_limits, "defaults", {"9up": {"user": (60, 1)}})
+    run(invoke(make_ctx(member), recorder, "9up", None, errors=True))
+    ctx = make_ctx(member)
+    sent = len(ctx.sent)
+    for _ in range(3):
+        run(invoke(ctx, recorder, "9up", None, errors=True))
+
+    replies = [m["content"] for m in ctx.sent[sent:]]
+    assert len(replies) == 1 and replies[0].startswith("🚦 Slow down")
+
+
+def test_index_samples_one_member_without_scanning_the_guild():
+    from core.quote_index import GuildQuoteIndex
+
+    index = GuildQuoteIndex([(i, i % 3, 0, 0) for i in range(30)])
+    for mode in ("uniform", "popular", "rare"):
+        assert {index.sample(mode, user_id=1) for _ in range(200)} == set(range(1, 30, 3))
+
+    # Kept current by add/delete/use once the member's tree exists
+    index.added_quote(100, 1, 0)
+    for quote_id in range(1, 30, 3):
+        index.deleted(quote_id)
+    assert {index.sample("popular", user_id=1) for _ in range(20)} == {100}
+    index.deleted(100)
+    assert index.sample("rare", user_id=1) is None
+    assert index.sample("uniform", user_id=7) is None
+
+
+def insert_unindexed(run, guild_id, rows):
+    """Quotes written like 9upimport/restore do: no near-duplicate signature."""
+    from core.db import quote_db
+
+    async def insert():
+        async with quote_db.connect(guild_id) as db:
+            await db.executemany(
+                "INSERT INTO quotes (guild_id, user_id, content, uses) VALUES (?, ?, ?, ?)",
+                [(guild_id, *row) for row in rows],
+            )
+            await db.commit()
+
+    run(insert())
+
+
+def test_backlog_is_indexed_even_below_newer_saves(run, recorder, make_ctx, guild, member, admin):
+    from core import near_dup
+    from core.db import quote_db
+
+    insert_unindexed(
+        run, guild.id, [(member.id, f"legacy line {i} of the old db", 0) for i in range(1200)]
+    )
+    save(run, recorder, make_ctx, admin, member, "a brand new quote")
+
+    async def drain():
+        total = 0
+        async with quote_db.connect(guild.id) as db:
+            while indexed := await near_dup.index_pending(db, guild.id):
+                total += indexed
+            await db.commit()
+            async with db.execute(
+                "SELECT COUNT(*) FROM quote_lsh WHERE guild_id = ? AND band = 0", (guild.id,)
+            ) as cursor:
+                return total, (await cursor.fetchone())[0]
+
+    remaining, indexed = run(drain())
+    assert remaining == 1200 - near_dup.INDEX_BATCH
+    assert indexed == 1201
+
+
+def test_pending_backlog_is_found_without_scanning_the_guild(run, guild, member):
+    from core import near_dup
+    from core.db import quote_db
+
+    insert_unindexed(run, guild.id, [(member.id, "imported and gone", 0)])
+
+    async def check():
+        async with quote_db.connect(guild.id) as db:
+            async with db.execute(
+                f"EXPLAIN QUERY PLAN {near_dup.SELECT_PENDING}", (guild.id, 1)
+            ) as cursor:
+                plan = [row[-1] for row in await cursor.fetchall()]
+            # Deleted before it was indexed: leaves the backlog too
+            await db.execute("DELETE FROM quotes WHERE guild_id = ?", (guild.id,))
+            await db.commit()
+            return plan, await near_dup.index_pending(db, guild.id)
+
+    plan, indexed = run(check())
+    assert not any(step.startswith("SCAN") for step in plan), plan
+    assert indexed == 0
+
+
+def test_9updupes_lists_then_merges_near_duplicates(run, recorder, make_ctx, guild, member, admin):
+    from core.db import quote_db
+
+    insert_unindexed(
+        run,
+        guild.id,
+        [
+            (member.id, "see you tomorrow at the arcade", 2),
+            (member.id, "See you tomorrow at the arcade!! 😂", 3),
+            (member.id, "something else entirely", 0),
+        ],
+    )
+
+    ctx = make_ctx(admin, "!9updupes")
+    run(invoke(ctx, recorder, "9updupes"))
+    assert "1 duplicate clusters" in ctx.sent[-1]["embed"].title
+
+    ctx = make_ctx(admin, "!9updupes merge")
+    run(invoke(ctx, recorder, "9updupes", "merge"))
+    assert "Merged 1" in ctx.sent[-1]["embed"].title
+
+    async def remaining():
+        async with quote_db.connect(guild.id) as db:
+            async with db.execute(
+                "SELECT content, uses FROM quotes WHERE guild_id = ? ORDER BY id", (guild.id,)
+            ) as cursor:
+                return await cursor.fetchall()
+
+    assert run(remaining()) == [
+        ("see you tomorrow at the arcade", 5),
+        ("something else entirely", 0),
+    ]
+
+    async def stats():
+        async with quote_db.connect(guild.id) as db:
+            async with db.execute(
+                "SELECT quotes, uses FROM stats_author WHERE guild_id = ?", (guild.id,)
+            ) as cursor:
+                author = await cursor.fetchone()
+            async with db.execute(
+                "SELECT COALESCE(SUM(used), 0) FROM stats_week WHERE guild_id = ?", (guild.id,)
+            ) as cursor:
+                return author, (await cursor.fetchone())[0]
+
+    # The merged quote's old uses stay on the author but aren't this week's usage
+    assert run(stats()) == ((2, 5), 0)
+
+
+def test_9upimport_counts_imported_quotes_not_trigger_writes(
+    run, recorder, make_ctx, guild, channel, member, admin
+):
+    from core.db import quote_db
+
+    channel.pinned = [
+        channel.post(member, text) for text in ("pin one", "pin two", "pin three", "pin one")
+    ]
+    ctx = make_ctx(admin, "!9upimport")
+    run(invoke(ctx, recorder, "9upimport", None, None))
+    status = ctx.sent[0]["message"]
+    assert "Imported **3** • Skipped **1**" in status.edits[-1]["content"]
+
+    async def checkpoint():
+        async with quote_db.connect(guild.id) as db:
+            async with db.execute(
+                "SELECT imported FROM import_progress WHERE guild_id = ?", (guild.id,)
+            ) as cursor:
+                return (await cursor.fetchone())[0]
+
+    assert run(checkpoint()) == 3
+
+
+def test_9upimport_by_reaction_resumes_after_its_checkpoint(
+    run, recorder, make_ctx, guild, channel, member, admin
+):
+    from types import SimpleNamespace
+
+    from core.db import quote_db
+
+    def post(author, content, starred=True):
+        message = channel.post(author, content)
+        message.reactions = [SimpleNamespace(emoji="⭐")] if starred else []
+        return message
+
+    post(member, "starred and quotable")
+    post(member, "nobody starred this", starred=False)
+    post(member, "starred link https://example.com")
+    run(invoke(make_ctx(admin, "!9upimport"), recorder, "9upimport", None, "⭐"))
+
+    # The second run only reads messages posted after the first run's checkpoint
+    last = post(member, "starred later on")
+    ctx = make_ctx(admin, "!9upimport")
+    run(invoke(ctx, recorder, "9upimport", None, "⭐"))
+    assert "Imported **1** • Skipped **0**" in ctx.sent[-1]["message"].edits[-1]["content"]
+
+    async def state():
+        async with quote_db.connect(guild.id) as db:
+            async with db.execute(
+                "SELECT content FROM quotes WHERE guild_id = ? ORDER BY id", (guild.id,)
+            ) as cursor:
+                quotes = [row[0] for row in await cursor.fetchall()]
+            async with db.execute(
+                "SELECT last_message_id, imported FROM import_progress WHERE guild_id = ?",
+                (guild.id,),
+            ) as cursor:
+                return quotes, await cursor.fetchone()
+
+    quotes, (checkpoint, imported) = run(state())
+    assert quotes == ["starred and quotable", "starred later on"]
+    assert imported == 2 and checkpoint >= last.id
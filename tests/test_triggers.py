@@ -0,0 +1,60 @@
+import pytest
+
+from tests.fakes import invoke
+
+
+@pytest.fixture
+def recorder(run, bot):
+    from cogs.features.quotes_record import Recorder
+
+    cog = Recorder(bot)
+    run(bot.add_cog(cog))
+    return cog
+
+
+@pytest.fixture
+def triggers(run, bot, recorder):
+    from cogs.features.triggers import Triggers
+
+    cog = Triggers(bot)
+    run(bot.add_cog(cog))
+    return cog
+
+
+def test_automaton_finds_every_overlapping_phrase_in_one_pass():
+    from core.aho_corasick import AhoCorasick
+
+    automaton = AhoCorasick(["he", "she", "HERS", "his"])
+    found = [(start, end, p) for start, end, p in automaton.iter_matches("uSHErs")]
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+    automaton.remove("she")
+    automaton.add("rs")
+    assert [p for *_, p in automaton.iter_matches("ushers")] == ["he", "hers", "rs"]
+
+
+def test_engine_respects_word_boundaries_but_not_for_cjk():
+    from cogs.features.triggers import TriggerEngine
+
+    engine = TriggerEngine([("cat", 1), ("早晨", 2)])
+    assert engine.match("what a category") is None
+    assert engine.match("my Cat, again") == ("cat", 1)
+    assert engine.match("大家早晨呀") == ("早晨", 2)
+
+
+def test_phrase_summons_a_quote_then_cools_down(
+    run, recorder, triggers, make_ctx, channel, member, admin
+):
+    original = make_ctx(member, "rise and shine, losers").message
+    run(invoke(make_ctx(admin, "!save", reference=original.reply_to()), recorder, "save"))
+    run(invoke(make_ctx(admin), triggers, "9uptrigger", "good morning", member))
+
+    run(triggers.on_message(channel.post(admin, "!9up good morning")))  # a command, not chatter
+    assert channel.webhook_list == []
+
+    run(triggers.on_message(channel.post(admin, "Good morning everyone")))
+    assert channel.webhook_list[0].sent[-1]["content"] == "rise and shine, losers"
+
+    # Within trigger_cooldown the channel gets no second reply
+    run(triggers.on_message(channel.post(admin, "good morning again")))
+    assert len(channel.webhook_list[0].sent) == 1 and triggers.fired == 1